@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Microbenchmark do codec binário Estapar: custo por frame antes e depois.
+
+"Antes" reproduz a implementação anterior ao módulo protocol: dois
+struct.pack com string de formato + concatenação na serialização, e
+struct.unpack de todos os campos da resposta. "Depois" usa protocol.COMMAND /
+protocol.RESPONSE (Structs compiladas, pack_into em buffer pré-alocado e
+leitura só dos campos usados, com uma projeção compilada, a partir de
+memoryview).
+
+Uso:
+    python scripts/bench_codec.py [iterações]
+"""
+
+import struct
+import sys
+import timeit
+from pathlib import Path
+
+src_path = Path(__file__).resolve().parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from totalatacadot1.protocol import COMMAND, RESPONSE, safe_decode  # noqa: E402
+from totalatacadot1.schemas import DiscountRequest  # noqa: E402
+
+LEGACY_RESPONSE_FORMAT = "<HI15s16sIII64sI128s128s128sIHHI"
+
+
+def legacy_serialize(request: DiscountRequest) -> bytes:
+    cmd_data = struct.pack(
+        "<I64sIIIIIIII",
+        request.cmd_term_id,
+        request.cmd_card_id.encode("ascii").ljust(64, b"\x00"),
+        int(round(request.cmd_op_value * 100)),
+        request.cmd_op_seq_no,
+        request.cmd_ruf_0,
+        request.cmd_ruf_1,
+        request.cmd_sale_type,
+        request.cmd_op_display_len,
+        request.cmd_cust_display_len,
+        request.cmd_printer_line_len,
+    )
+    cmd_header = struct.pack(
+        "<HI15s16sII",
+        0,
+        request.cmd_type.value,
+        request.cmd_signature.encode("ascii").ljust(15, b"\x00"),
+        request.cmd_company_sign,
+        request.cmd_tmt,
+        request.cmd_seq_no,
+    )
+    message = cmd_header + cmd_data
+    return struct.pack("<H", len(message)) + message
+
+
+def legacy_parse(payload: bytes) -> tuple:
+    unpacked = struct.unpack(LEGACY_RESPONSE_FORMAT, payload)
+    return unpacked[5], unpacked[8], safe_decode(unpacked[11]), unpacked[12], unpacked[13]
+
+
+PARSED_FIELDS = RESPONSE.projection(
+    "rspSeqNo", "rspStatus", "rspPrinterLineTxt", "rspEntryTimeStamp", "rspVehicleType"
+)
+
+
+def codec_parse(payload: memoryview) -> tuple:
+    seq_no, status, printer_line, entry_ts, vehicle = PARSED_FIELDS.unpack(payload)
+    return seq_no, status, safe_decode(printer_line), entry_ts, vehicle
+
+
+def bench(label: str, func, iterations: int) -> float:
+    seconds = min(timeit.repeat(func, number=iterations, repeat=5))
+    per_frame_ns = seconds / iterations * 1e9
+    print(f"{label:<38} {per_frame_ns:8.0f} ns/frame")
+    return per_frame_ns
+
+
+def main() -> int:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    request = DiscountRequest(
+        cmd_term_id=303,
+        cmd_card_id="0123456789012345",
+        cmd_op_value=88.69,
+        cmd_op_seq_no=6767,
+        cmd_seq_no=656,
+    )
+    assert legacy_serialize(request) == request.serialize()
+
+    response_frame = RESPONSE.pack_frame(
+        0, 0x00010010, b"04558054000173", b"ESTAPAR", 0, 656, 303, b"0123456789012345",
+        0, b"Cartao validado", b"Cartao validado", b"Cartao validado", 1, 2, 0, 0,
+    )  # fmt: skip
+    response_bytes = response_frame[2:]
+    response_view = memoryview(response_frame)[2:]
+    assert legacy_parse(response_bytes) == codec_parse(response_view)
+
+    send_buffer = bytearray(COMMAND.frame_size)
+    print(f"Iterações: {iterations}")
+    before_ser = bench("serialize (antes: pack + concat)", lambda: legacy_serialize(request), iterations)
+    after_ser = bench("serialize_into (depois: pack_into)", lambda: request.serialize_into(send_buffer), iterations)
+    before_parse = bench("parse (antes: unpack completo)", lambda: legacy_parse(response_bytes), iterations)
+    after_parse = bench("parse (depois: projeção)", lambda: codec_parse(response_view), iterations)
+    print(
+        f"Ganho serialize: {before_ser / after_ser:.2f}x | "
+        f"Ganho parse: {before_parse / after_parse:.2f}x"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""Gerador de carga para EstaparIntegrationService.create_discount.
+
+Dispara validações contra o servidor mock (ou qualquer servidor Estapar) com
+concorrência fixa ou a uma taxa alvo e mede vazão, latência (p50/p95/p99/max),
+resultados por ResponseStatus e sockets abertos. O resultado é gravado em
+JSON para comparar execuções entre versões e modos de conexão.
+
+Com --rate, cada requisição tem um horário agendado e a latência é medida a
+partir dele (inclui a espera na fila quando o servidor atrasa), evitando a
+"omissão coordenada" de medir só o tempo de serviço.
+
+Uso:
+    python scripts/bench_estapar.py --spawn-mock --mode pooled -c 16 -n 5000
+    python scripts/bench_estapar.py --port 33535 --rate 200 --duration 30 -o run.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+src_path = Path(__file__).resolve().parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from loguru import logger  # noqa: E402
+
+from totalatacadot1.enums import EstaparConnectionMode  # noqa: E402
+from totalatacadot1.schemas import DiscountRequest  # noqa: E402
+from totalatacadot1.server.main import (  # noqa: E402
+    FaultProfile,
+    LatencyDistribution,
+    MockEstaparServer,
+    parse_status_mix,
+)
+from totalatacadot1.services.estapar_integration_service import (  # noqa: E402
+    EstaparIntegrationService,
+)
+
+
+def percentile(sorted_values: list, pct: float) -> float | None:
+    """Percentil pelo método nearest-rank."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadRun:
+    def __init__(self, service: EstaparIntegrationService, args: argparse.Namespace):
+        self.service = service
+        self.args = args
+        self.latencies: list[float] = []
+        self.outcomes: Counter = Counter()
+        self._lock = threading.Lock()
+        self._next_index = 0
+        self._start = 0.0
+
+    def _take(self) -> tuple[int, float] | None:
+        """Próxima requisição: (índice, horário agendado), ou None ao fim da carga."""
+        with self._lock:
+            index = self._next_index
+            self._next_index += 1
+        if self.args.requests and index >= self.args.requests:
+            return None
+        if self.args.rate:
+            scheduled = self._start + index / self.args.rate
+        else:
+            scheduled = time.perf_counter()
+        if self.args.duration and scheduled - self._start >= self.args.duration:
+            return None
+        return index, scheduled
+
+    def _worker(self):
+        args = self.args
+        while True:
+            taken = self._take()
+            if taken is None:
+                return
+            index, scheduled = taken
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            request = DiscountRequest(
+                cmd_term_id=args.term_id,
+                cmd_card_id=f"BENCH{index:010d}",
+                cmd_op_value=10.0,
+            )
+            result = self.service.create_discount(request)
+            elapsed = time.perf_counter() - scheduled
+            if result.data is not None:
+                outcome = result.data.status.name
+            else:
+                outcome = f"TRANSPORT: {result.message}"
+            with self._lock:
+                self.latencies.append(elapsed)
+                self.outcomes[outcome] += 1
+
+    def run(self) -> float:
+        self._start = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._worker, daemon=True)
+            for _ in range(self.args.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - self._start
+
+
+def start_mock(args: argparse.Namespace) -> tuple[MockEstaparServer, asyncio.AbstractEventLoop]:
+    profile = FaultProfile(
+        latency=LatencyDistribution.parse(args.mock_latency),
+        status_mix=parse_status_mix(args.mock_status_mix),
+        fragment=args.mock_fragment,
+        disconnect=args.mock_disconnect,
+        keep_alive=args.mode == EstaparConnectionMode.POOLED,
+    )
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    server = MockEstaparServer("127.0.0.1", 0, profile, seed=args.seed)
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result(5)
+    return server, loop
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark de carga da integração Estapar")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=33535)
+    parser.add_argument(
+        "--mode",
+        type=lambda value: EstaparConnectionMode(value.upper()),
+        default=EstaparConnectionMode.ONE_SHOT,
+        help="one_shot | pooled",
+    )
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="threads clientes")
+    parser.add_argument("--rate", type=float, default=0.0, help="requisições/s (0 = sem limite)")
+    parser.add_argument("-n", "--requests", type=int, default=0, help="total de requisições")
+    parser.add_argument("--duration", type=float, default=0.0, help="segundos de carga")
+    parser.add_argument("--term-id", type=int, default=1)
+    parser.add_argument("-o", "--output", type=Path, help="arquivo JSON de resultado")
+    parser.add_argument("--spawn-mock", action="store_true", help="sobe o servidor mock no próprio processo")
+    parser.add_argument("--mock-latency", default="fixed:0")
+    parser.add_argument("--mock-status-mix", default="0=1")
+    parser.add_argument("--mock-fragment", type=float, default=0.0)
+    parser.add_argument("--mock-disconnect", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    if not args.requests and not args.duration:
+        args.requests = 1000
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    # O log por requisição do serviço mediria o logger, não a integração
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    server = loop = None
+    if args.spawn_mock:
+        server, loop = start_mock(args)
+        args.host, args.port = "127.0.0.1", server.port
+
+    service = EstaparIntegrationService(
+        args.host,
+        args.port,
+        connection_mode=args.mode,
+        pool_size=args.concurrency,
+    )
+    run = LoadRun(service, args)
+    wall = run.run()
+    service.close()
+
+    latencies = sorted(run.latencies)
+    total = len(latencies)
+    diagnostics = service.diagnostics()
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {
+            "target": f"{args.host}:{args.port}",
+            "mode": args.mode.value,
+            "concurrency": args.concurrency,
+            "rate": args.rate or None,
+            "requests": args.requests or None,
+            "duration": args.duration or None,
+            "mock": {
+                "latency": args.mock_latency,
+                "status_mix": args.mock_status_mix,
+                "fragment": args.mock_fragment,
+                "disconnect": args.mock_disconnect,
+            }
+            if args.spawn_mock
+            else None,
+        },
+        "requests": total,
+        "wall_seconds": wall,
+        "throughput_rps": total / wall if wall else 0.0,
+        "latency_ms": {
+            "p50": (percentile(latencies, 50) or 0) * 1000,
+            "p95": (percentile(latencies, 95) or 0) * 1000,
+            "p99": (percentile(latencies, 99) or 0) * 1000,
+            "max": (latencies[-1] if latencies else 0) * 1000,
+            "mean": (sum(latencies) / total if total else 0) * 1000,
+        },
+        "outcomes": dict(run.outcomes.most_common()),
+        "sockets": {
+            "client": [endpoint["pool"] for endpoint in diagnostics["endpoints"]],
+            "server_connections": server.stats.connections if server else None,
+        },
+    }
+
+    if server is not None:
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+        loop.call_soon_threadsafe(loop.stop)
+
+    latency = report["latency_ms"]
+    print(
+        f"{total} requisições em {wall:.2f}s -> {report['throughput_rps']:.0f} req/s | "
+        f"p50 {latency['p50']:.2f}ms p95 {latency['p95']:.2f}ms "
+        f"p99 {latency['p99']:.2f}ms max {latency['max']:.2f}ms"
+    )
+    for outcome, count in report["outcomes"].items():
+        print(f"  {outcome}: {count}")
+    print(f"  sockets: {report['sockets']}")
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+        print(f"Resultado gravado em {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""Benchmark das consultas quentes de PCPEDCECF no Oracle: ORM vs Core.
+
+"Antes" reproduz a consulta anterior: Query ORM montada a cada chamada,
+TRUNC(DATA) = hoje, entidade PCPEDCECF completa + expunge. "Depois" usa
+repository.get_last_pdv_pedido: select() Core montado uma vez, só as colunas
+usadas, linhas leves e prefetch/arraysize ajustados.
+
+Mede, por chamada, tempo de parede, CPU do processo e memória Python
+alocada (pico transitório via tracemalloc). Requer o Oracle configurado no
+.env, como o app.
+
+Uso:
+    python scripts/bench_pdv_queries.py [chamadas]
+"""
+
+import datetime
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+src_path = Path(__file__).resolve().parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from loguru import logger  # noqa: E402
+from sqlalchemy import func  # noqa: E402
+
+from totalatacadot1.config import settings  # noqa: E402
+from totalatacadot1.database import db_oracle_context  # noqa: E402
+from totalatacadot1.enums import StoreType  # noqa: E402
+from totalatacadot1.models import PCPEDCECF  # noqa: E402
+from totalatacadot1.repository import get_last_pdv_pedido  # noqa: E402
+
+
+def legacy_get_last_pdv_pedido() -> PCPEDCECF | None:
+    vl_limit = 99999999
+    today = datetime.date.today()
+    order_column = (
+        PCPEDCECF.num_cupom
+        if settings.store_type == StoreType.VAREJO
+        else PCPEDCECF.num_ped_ecf
+    )
+    with db_oracle_context() as db:
+        result = (
+            db.query(PCPEDCECF)
+            .filter(PCPEDCECF.vl_total < vl_limit)
+            .filter(func.trunc(PCPEDCECF.data) == today)
+            .order_by(order_column.desc())
+            .first()
+        )
+        if result is not None:
+            db.expunge(result)
+        return result
+
+
+def bench(label: str, func, calls: int) -> dict:
+    for _ in range(min(50, calls)):  # aquece pool, caches e statement cache
+        func()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for _ in range(calls):
+        func()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    # Pico de memória Python alocada durante cada chamada, acima do que já
+    # estava alocado antes dela (objetos temporários da consulta e do resultado)
+    tracemalloc.start()
+    sample = min(200, calls)
+    transient = 0
+    for _ in range(sample):
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        func()
+        transient += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    result = {
+        "wall_us": wall / calls * 1e6,
+        "cpu_us": cpu / calls * 1e6,
+        "transient_kb": transient / sample / 1024,
+    }
+    print(
+        f"{label:<28} parede {result['wall_us']:8.0f} us | CPU {result['cpu_us']:8.0f} us | "
+        f"alocação transitória {result['transient_kb']:7.1f} KiB/chamada"
+    )
+    return result
+
+
+def main() -> int:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    logger.remove()
+    legacy = legacy_get_last_pdv_pedido()
+    current = get_last_pdv_pedido()
+    assert (legacy is None) == (current is None)
+    if legacy is not None:
+        assert legacy.num_ped_ecf == current.num_ped_ecf
+
+    print(f"Chamadas: {calls}")
+    before = bench("antes (ORM + TRUNC)", legacy_get_last_pdv_pedido, calls)
+    after = bench("depois (Core + projeção)", get_last_pdv_pedido, calls)
+    print(
+        f"Ganho CPU: {before['cpu_us'] / after['cpu_us']:.2f}x | "
+        f"Ganho parede: {before['wall_us'] / after['wall_us']:.2f}x | "
+        f"Alocação: {before['transient_kb'] / after['transient_kb']:.2f}x menor"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Benchmark do escopo por terminal (NUMCAIXA) nas consultas de PCPEDCECF.
+
+Gera uma PCPEDCECF sintética grande (vários caixas, vários dias) num SQLite
+em memória, com os índices (DATA) — o que a consulta da loja inteira pode
+usar — e (NUMCAIXA, DATA, NUMPEDECF), o do modelo. Executa as mesmas
+consultas do repository (último pedido e consulta incremental) nos dois
+escopos e compara linhas lidas da tabela, passos da VM do SQLite, tempo e o
+plano de execução.
+
+"Linhas lidas" é o tamanho do intervalo de índice percorrido: pedidos do dia
+na loja inteira contra pedidos do dia do próprio caixa. No Oracle a relação é
+a mesma (buffer gets proporcionais), mas este script não precisa dele.
+
+Uso:
+    python scripts/bench_pdv_terminal_scope.py [linhas] [caixas] [dias]
+"""
+
+import datetime
+import random
+import sys
+import time
+from pathlib import Path
+
+src_path = Path(__file__).resolve().parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from loguru import logger  # noqa: E402
+from sqlalchemy import Index, create_engine, func, insert, select, text  # noqa: E402
+
+from totalatacadot1.config import settings  # noqa: E402
+from totalatacadot1.models import PCPEDCECF  # noqa: E402
+from totalatacadot1.repository import _day_range, _pdv_statements  # noqa: E402
+
+TODAY = datetime.date.today()
+OWN_CAIXA = 1
+
+
+def day_params(by_terminal: bool) -> dict:
+    params = _day_range(TODAY)
+    if by_terminal:
+        params["num_caixa"] = OWN_CAIXA
+    return params
+
+
+def build_table(engine, rows: int, caixas: int, days: int):
+    PCPEDCECF.__table__.create(engine)
+    Index("IX_PCPEDCECF_DATA", PCPEDCECF.data).create(engine)
+    rng = random.Random(42)
+    # Chaves do insert Core são os nomes das colunas (NUMPEDECF...), não os atributos
+    key = {
+        attr: getattr(PCPEDCECF, attr).expression.key
+        for attr in ("num_ped_ecf", "num_caixa", "data", "num_cupom", "vl_total")
+    }
+    batch = []
+    with engine.begin() as conn:
+        for num_ped_ecf in range(1, rows + 1):
+            # Pedidos crescem com o tempo: os mais recentes são de hoje
+            age = days - 1 - (num_ped_ecf - 1) * days // rows
+            day = TODAY - datetime.timedelta(days=age)
+            batch.append(
+                {
+                    key["num_ped_ecf"]: num_ped_ecf,
+                    key["num_caixa"]: rng.randint(1, caixas),
+                    key["data"]: day,
+                    key["num_cupom"]: num_ped_ecf,
+                    key["vl_total"]: round(rng.uniform(1, 500), 2),
+                }
+            )
+            if len(batch) == 10000:
+                conn.execute(insert(PCPEDCECF.__table__), batch)
+                batch.clear()
+        if batch:
+            conn.execute(insert(PCPEDCECF.__table__), batch)
+        conn.execute(text("ANALYZE"))
+
+
+def count_rows(conn, by_terminal: bool) -> int:
+    params = day_params(by_terminal)
+    query = select(func.count()).where(
+        PCPEDCECF.data >= params["start"], PCPEDCECF.data < params["end"]
+    )
+    if by_terminal:
+        query = query.where(PCPEDCECF.num_caixa == OWN_CAIXA)
+    return conn.execute(query).scalar_one()
+
+
+def measure(conn, statement, params: dict, calls: int) -> dict:
+    dbapi = conn.connection.dbapi_connection
+    steps = 0
+
+    def count_step():
+        nonlocal steps
+        steps += 1
+
+    dbapi.set_progress_handler(count_step, 1)
+    returned = len(conn.execute(statement, params).all())
+    dbapi.set_progress_handler(None, 1)
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        conn.execute(statement, params).all()
+    elapsed = time.perf_counter() - start
+
+    compiled = statement.compile(conn.engine)
+    plan = conn.exec_driver_sql(
+        f"EXPLAIN QUERY PLAN {compiled}",
+        tuple(params.get(name) for name in compiled.positiontup),
+    ).all()
+    return {
+        "returned": returned,
+        "vm_steps": steps,
+        "us": elapsed / calls * 1e6,
+        "plan": " / ".join(row[-1] for row in plan),
+    }
+
+
+def main() -> int:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    caixas = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    days = int(sys.argv[3]) if len(sys.argv) > 3 else 30
+    calls = 200
+    logger.remove()
+
+    engine = create_engine("sqlite://")
+    build_table(engine, rows, caixas, days)
+    print(
+        f"PCPEDCECF sintética: {rows} linhas, {caixas} caixas, {days} dias "
+        f"({settings.store_type.value})"
+    )
+
+    with engine.connect() as conn:
+        watermark = conn.execute(
+            select(func.max(PCPEDCECF.num_ped_ecf)).where(
+                PCPEDCECF.num_caixa == OWN_CAIXA
+            )
+        ).scalar_one() - 5 * caixas
+        for by_terminal in (False, True):
+            label = f"caixa {OWN_CAIXA}" if by_terminal else "loja inteira"
+            statements = _pdv_statements(
+                settings.store_type, OWN_CAIXA if by_terminal else None
+            )
+            params = day_params(by_terminal)
+            touched = count_rows(conn, by_terminal)
+            print(f"\n[{label}] linhas lidas (intervalo do índice): {touched}")
+            for name, statement, extra in (
+                ("último pedido", statements.last, {}),
+                ("incremental", statements.after, {"watermark": watermark}),
+            ):
+                result = measure(conn, statement, {**params, **extra}, calls)
+                print(
+                    f"  {name:<14} devolvidas {result['returned']:5d} | "
+                    f"passos VM {result['vm_steps']:9d} | {result['us']:9.0f} us"
+                )
+                print(f"  {'':<14} plano: {result['plan']}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Benchmark do perfil SQLite local: padrão do driver vs. perfil configurado.
+
+Reproduz o uso do app: threads escritoras gravando Notification e ControlPDV
+(como o clique e o poller) e threads leitoras consultando a notificação
+pendente e o controle do dia (como o outbox e o poller), ao mesmo tempo, num
+arquivo SQLite novo para cada perfil. Mede latência por operação
+(p50/p95/p99/max), vazão e erros de lock.
+
+"antes": sem PRAGMAs (journal DELETE, synchronous FULL).
+"depois": database.sqlite_profile_pragmas() (WAL, NORMAL, busy_timeout...).
+
+Uso:
+    python scripts/bench_sqlite_profile.py [--writers 2] [--readers 4] [--duration 5]
+"""
+
+import argparse
+import datetime
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+src_path = Path(__file__).resolve().parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from loguru import logger  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from totalatacadot1.database import (  # noqa: E402
+    BaseSQLite,
+    create_sqlite_engine,
+    sqlite_profile_pragmas,
+)
+from totalatacadot1.models import ControlPDV, NotificationModel  # noqa: E402
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Workload:
+    def __init__(self, path: Path, pragmas: list[str] | None, args: argparse.Namespace):
+        self.engine = create_sqlite_engine(f"sqlite:///{path}", pragmas)
+        BaseSQLite.metadata.create_all(self.engine)
+        self.Session = sessionmaker(bind=self.engine, autoflush=False)
+        self.args = args
+        self.latencies = {"insert": [], "lookup": []}
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._next_key = 0
+
+    def _record(self, kind: str, elapsed: float):
+        with self._lock:
+            self.latencies[kind].append(elapsed)
+
+    def _writer(self):
+        today = datetime.date.today()
+        while not self._stop.is_set():
+            with self._lock:
+                self._next_key += 1
+                key = self._next_key
+            start = time.perf_counter()
+            try:
+                with self.Session() as db:
+                    db.add(ControlPDV(num_ped_ecf=key, num_cupom=key, data=today))
+                    db.add(
+                        NotificationModel(
+                            ticket_code=f"T{key:010d}",
+                            data={"ticket_code": f"T{key:010d}", "vl_total": 10.0},
+                        )
+                    )
+                    db.commit()
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                continue
+            self._record("insert", time.perf_counter() - start)
+
+    def _reader(self):
+        today = datetime.date.today()
+        while not self._stop.is_set():
+            key = max(1, self._next_key)
+            start = time.perf_counter()
+            try:
+                with self.Session() as db:
+                    db.query(NotificationModel).filter(
+                        NotificationModel.sent == False  # noqa: E712
+                    ).order_by(NotificationModel.id.desc()).first()
+                    db.query(ControlPDV).filter(
+                        ControlPDV.num_ped_ecf == key, ControlPDV.data == today
+                    ).first()
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                continue
+            self._record("lookup", time.perf_counter() - start)
+
+    def run(self) -> dict:
+        threads = [threading.Thread(target=self._writer) for _ in range(self.args.writers)]
+        threads += [threading.Thread(target=self._reader) for _ in range(self.args.readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(self.args.duration)
+        self._stop.set()
+        for thread in threads:
+            thread.join()
+        self.engine.dispose()
+
+        result = {"errors": self.errors}
+        for kind, values in self.latencies.items():
+            values.sort()
+            result[kind] = {
+                "ops_s": len(values) / self.args.duration,
+                "p50": percentile(values, 50) * 1000,
+                "p95": percentile(values, 95) * 1000,
+                "p99": percentile(values, 99) * 1000,
+                "max": (values[-1] if values else 0) * 1000,
+            }
+        return result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do perfil SQLite local")
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args(argv)
+    logger.remove()
+
+    print(f"{args.writers} escritoras, {args.readers} leitoras, {args.duration:.0f}s por perfil")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, pragmas in (("antes", None), ("depois", sqlite_profile_pragmas())):
+            result = Workload(Path(tmp) / f"{label}.db", pragmas, args).run()
+            print(f"\n[{label}] erros: {result['errors']}")
+            for kind in ("insert", "lookup"):
+                stats = result[kind]
+                print(
+                    f"  {kind:<7} {stats['ops_s']:8.0f} ops/s | p50 {stats['p50']:7.2f}ms "
+                    f"p95 {stats['p95']:7.2f}ms p99 {stats['p99']:7.2f}ms max {stats['max']:8.2f}ms"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
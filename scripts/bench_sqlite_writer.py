@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Benchmark da thread de escrita SQLite: commit por escrita vs. commit em grupo.
+
+Reproduz o uso do app num arquivo SQLite novo por modo, com o perfil de
+database.sqlite_profile_pragmas(): threads de background gravando ControlPDV
+a cada 0,5 ms (como o poller num pico de pedidos) e uma thread "GUI" gravando uma
+Notification a cada --gui-interval ms (como os cliques de validação).
+
+"antes": cada escrita abre sessão, faz commit e refresh() na thread que chama
+(o create_*_item antigo).
+"depois": um SqliteWriter com a configuração de repository.sqlite_writer; quem
+chama só enfileira.
+
+Mede escritas gravadas por segundo (o tempo do "depois" inclui esperar a fila
+esvaziar) e o tempo que a thread GUI fica parada em cada chamada.
+
+Uso:
+    python scripts/bench_sqlite_writer.py [--writers 4] [--duration 5] [--gui-interval 20]
+"""
+
+import argparse
+import datetime
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from pathlib import Path
+
+src_path = Path(__file__).resolve().parent.parent / "src"
+if str(src_path) not in sys.path:
+    sys.path.insert(0, str(src_path))
+
+from loguru import logger  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from totalatacadot1.config import settings  # noqa: E402
+from totalatacadot1.database import create_sqlite_engine, sqlite_profile_pragmas  # noqa: E402
+from totalatacadot1.models import ControlPDV, NotificationModel  # noqa: E402
+from totalatacadot1.services.sqlite_writer import SqliteWriter  # noqa: E402
+from totalatacadot1.sqlite_migrations import migrate  # noqa: E402
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _add_item(item, db):
+    db.add(item)
+    db.flush()
+    return item
+
+
+class Workload:
+    def __init__(self, path: Path, grouped: bool, args: argparse.Namespace):
+        self.engine = create_sqlite_engine(f"sqlite:///{path}", sqlite_profile_pragmas())
+        migrate(self.engine)
+        self.Session = sessionmaker(bind=self.engine, autoflush=False)
+        self.writer = (
+            SqliteWriter(
+                partial(self.Session, expire_on_commit=False),
+                batch_window=settings.sqlite_writer_batch_window,
+                max_batch=settings.sqlite_writer_max_batch,
+            )
+            if grouped
+            else None
+        )
+        self.args = args
+        self.gui_stalls: list[float] = []
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._next_key = 0
+
+    def _write(self, item):
+        if self.writer is not None:
+            self.writer.submit(partial(_add_item, item))
+            return
+        with self.Session() as db:
+            db.add(item)
+            db.commit()
+            db.refresh(item)
+
+    def _background(self):
+        today = datetime.date.today()
+        while not self._stop.is_set():
+            with self._lock:
+                self._next_key += 1
+                key = self._next_key
+            try:
+                self._write(ControlPDV(num_ped_ecf=key, num_cupom=key, data=today))
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+            # Mesmo ritmo nos dois modos; sem pausa a fila do "depois" cresce
+            # sem limite (o poller real grava poucos itens por ciclo)
+            time.sleep(0.0005)
+
+    def _gui(self):
+        n = 0
+        while not self._stop.is_set():
+            n += 1
+            data = {"ticket_code": f"T{n:010d}", "vl_total": 10.0, "success": True}
+            start = time.perf_counter()
+            try:
+                self._write(NotificationModel(ticket_code=data["ticket_code"], data=data))
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+                continue
+            self.gui_stalls.append(time.perf_counter() - start)
+            self._stop.wait(self.args.gui_interval / 1000)
+
+    def run(self) -> dict:
+        threads = [threading.Thread(target=self._background) for _ in range(self.args.writers)]
+        threads.append(threading.Thread(target=self._gui))
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(self.args.duration)
+        self._stop.set()
+        for thread in threads:
+            thread.join()
+        if self.writer is not None:
+            self.writer.close()
+        elapsed = time.perf_counter() - start
+
+        with self.engine.connect() as conn:
+            written = sum(
+                conn.execute(select(func.count()).select_from(model)).scalar()
+                for model in (ControlPDV, NotificationModel)
+            )
+        self.engine.dispose()
+        stalls = sorted(self.gui_stalls)
+        return {
+            "errors": self.errors,
+            "writes_s": written / elapsed,
+            "commits": self.writer.commits if self.writer else written,
+            "gui": {
+                "calls": len(stalls),
+                "p50": percentile(stalls, 50) * 1000,
+                "p95": percentile(stalls, 95) * 1000,
+                "p99": percentile(stalls, 99) * 1000,
+                "max": (stalls[-1] if stalls else 0) * 1000,
+                "total": sum(stalls) * 1000,
+            },
+        }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark da thread de escrita SQLite")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--gui-interval", type=float, default=20.0)
+    args = parser.parse_args(argv)
+    logger.remove()
+
+    print(
+        f"{args.writers} escritoras de background + GUI a cada {args.gui_interval:.0f}ms, "
+        f"{args.duration:.0f}s por modo"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, grouped in (("antes", False), ("depois", True)):
+            result = Workload(Path(tmp) / f"{label}.db", grouped, args).run()
+            gui = result["gui"]
+            print(
+                f"\n[{label}] {result['writes_s']:8.0f} escritas/s em {result['commits']} "
+                f"commits | erros: {result['errors']}"
+            )
+            print(
+                f"  GUI parada por chamada: p50 {gui['p50']:7.3f}ms p95 {gui['p95']:7.3f}ms "
+                f"p99 {gui['p99']:7.3f}ms max {gui['max']:8.3f}ms "
+                f"(total {gui['total']:.0f}ms em {gui['calls']} chamadas)"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -3,23 +3,50 @@ import platform
 import sys
 from pathlib import Path
 from threading import Thread
-from time import sleep
+from time import monotonic
+from typing import TYPE_CHECKING, Optional
 
 from loguru import logger
+from sqlalchemy import Row
 
 from totalatacadot1.config import settings
-from totalatacadot1.controllers.app_controller import AppController
-from totalatacadot1.database import init_db
-from totalatacadot1.enums import StoreType
-from totalatacadot1.models import PCPEDCECF
+from totalatacadot1.database import SQLITE_DB_PATH, connect_oracle_events
+from totalatacadot1.enums import (
+    DatabaseStatus,
+    OrderChangeSourceType,
+    PdvOrderSourceType,
+    StoreType,
+)
 from totalatacadot1.notification import Notification
 from totalatacadot1.repository import (
     create_pdv_control_item,
+    delete_applied_discounts,
+    delete_control_items,
+    delete_notifications,
     get_last_control_item_of_the_dat_by_numcupom,
     get_last_notification_not_sent,
-    get_last_pdv_pedido,
+    get_last_mirrored_pdv_pedido,
     get_pdv_control_item_by_num_ped_ecf_and_today,
+    get_expired_applied_discounts,
+    get_expired_control_items,
+    get_expired_notifications,
+    get_mirrored_pdv_pedidos_after,
+    incremental_vacuum,
+    pdv_order_key,
+)
+from totalatacadot1.services.order_change_source import (
+    OracleCqnOrderChangeSource,
+    OrderChangeSource,
+    PollingOrderChangeSource,
 )
+from totalatacadot1.services.pdv_order_poller import PdvOrderPoller
+from totalatacadot1.services.retention import RetainedTable, RetentionManager
+from totalatacadot1.services.scheduler import AdaptiveInterval, Scheduler
+from totalatacadot1.sqlite_migrations import init_sqlite_db
+
+if TYPE_CHECKING:
+    # Importado em main(): as rotinas de background não dependem do Qt
+    from totalatacadot1.controllers.app_controller import AppController
 
 if platform.system() == "Linux":
     os.environ["QT_QPA_PLATFORM"] = "xcb"
@@ -36,80 +63,126 @@ def logger_init_setup():
     logger.info("Iniciando o aplicativo...")
 
 
+# Intervalo entre tentativas de conexão com a origem dos pedidos (Oracle)
+# enquanto indisponível; cresce a cada falha até ORACLE_RETRY_MAX_INTERVAL
+ORACLE_RETRY_INTERVAL = 30.0
+ORACLE_RETRY_MAX_INTERVAL = 300.0
+
+# Enquanto houver lotes a arquivar ou páginas a liberar, a manutenção do
+# SQLite volta a rodar após este intervalo (senão, sqlite_retention_interval)
+SQLITE_MAINTENANCE_MIN_INTERVAL = 60.0
+
+
 def db_init_setup():
-    db_on = False
     try:
-        init_db()
-        db_on = True
+        init_sqlite_db()
     except Exception as e:
-        logger.error(f"Erro ao inicializar o banco de dados: {e}")
-    return db_on
+        logger.error(f"Erro ao inicializar o banco de dados SQLite: {e}")
 
 
-def listen_new_pdv_item(
-    controller: AppController, is_active_db: bool, last_cupom: list
-):
-    if not is_active_db:
-        logger.warning(
-            "Banco de dados desativado. Não será possível verificar novos itens do PDV."
+def pdv_source_init_setup(controller: "AppController") -> bool:
+    """Conecta à origem dos pedidos do PDV (em background), refletindo o estado na GUI."""
+    controller.emit_database_status(DatabaseStatus.CONNECTING)
+    try:
+        controller.pdv_source.connect()
+    except Exception as e:
+        logger.error(
+            f"Erro ao inicializar a origem de pedidos do PDV ({controller.pdv_source.name}): {e}"
         )
-        return
-
-    last_pdv_pedido: PCPEDCECF | None = get_last_pdv_pedido()
-    if last_pdv_pedido is None:
-        logger.info("Nenhum pedido encontrado - SKIPPING.")
-        return
+        controller.emit_database_status(DatabaseStatus.UNAVAILABLE)
+        return False
+    controller.emit_database_status(DatabaseStatus.CONNECTED)
+    return True
 
-    is_varejo = settings.store_type == StoreType.VAREJO
 
-    # Identificador do pedido conforme o tipo de loja:
-    # VAREJO rastreia por num_cupom, ATACADO por num_ped_ecf.
-    current_key = (
-        last_pdv_pedido.num_cupom if is_varejo else last_pdv_pedido.num_ped_ecf
+def create_pdv_order_poller() -> PdvOrderPoller[Row]:
+    # Lê do espelho local, que cada ciclo sincroniza antes com o Oracle
+    return PdvOrderPoller(
+        get_mirrored_pdv_pedidos_after,
+        get_last_mirrored_pdv_pedido,
+        pdv_order_key(settings.store_type),
     )
+
+
+def create_order_change_source() -> OrderChangeSource:
+    if (
+        settings.order_change_source == OrderChangeSourceType.ORACLE_CQN
+        and settings.pdv_order_source != PdvOrderSourceType.ORACLE
+    ):
+        logger.warning("CQN requer a origem de pedidos ORACLE; usando polling.")
+    elif settings.order_change_source == OrderChangeSourceType.ORACLE_CQN:
+        return OracleCqnOrderChangeSource(
+            connect_oracle_events,
+            resync_interval=settings.pdv_cqn_resync_interval,
+            fallback_interval=settings.pdv_poll_interval,
+        )
+    # O intervalo do polling é adaptativo e fica com o scheduler
+    return PollingOrderChangeSource()
+
+
+def listen_new_pdv_item(controller: "AppController", poller: PdvOrderPoller) -> bool:
+    """Processa os pedidos novos do PDV. True se havia algum (acelera o polling)."""
+    synced = controller.pdv_mirror.try_sync()
+    new_orders: list[Row] = poller.poll()
+    if not new_orders:
+        if synced:
+            controller.pdv_snapshot.confirm(poller.day)
+        logger.info("Nenhum pedido novo - SKIPPING.")
+        return False
+
+    is_varejo = settings.store_type == StoreType.VAREJO
     key_label = "num_cupom" if is_varejo else "num_ped_ecf"
 
+    last_pdv_pedido = new_orders[-1]
+    controller.pdv_snapshot.publish(last_pdv_pedido, poller.day)
     logger.info(
-        f"Último pedido PDV: num_ped_ecf={last_pdv_pedido.num_ped_ecf}, "
+        f"{len(new_orders)} pedido(s) novo(s). Último pedido PDV: "
+        f"num_ped_ecf={last_pdv_pedido.num_ped_ecf}, "
         f"num_cupom={last_pdv_pedido.num_cupom}, vl_total={last_pdv_pedido.vl_total}"
     )
     controller.emit_actual_valor_update(last_pdv_pedido.vl_total)
 
     if not settings.use_internal_control:
-        if current_key != last_cupom[0]:
-            last_cupom[0] = current_key
-            logger.info(
-                f"Novo pedido detectado (sem controle interno): {key_label}={current_key}"
-            )
-            controller.show_gui()
-        return
-
-    if is_varejo:
-        pdv_control_item = get_last_control_item_of_the_dat_by_numcupom(
-            last_pdv_pedido.num_cupom
-        )
-    else:
-        pdv_control_item = get_pdv_control_item_by_num_ped_ecf_and_today(
-            last_pdv_pedido.num_ped_ecf
-        )
-    if pdv_control_item is None:
-        pdv_control_item = create_pdv_control_item(
-            last_pdv_pedido.num_ped_ecf,
-            last_pdv_pedido.num_cupom,
-            last_pdv_pedido.data,
-        )
         logger.info(
-            f"Criando novo item de controle PDV: num_ped_ecf={pdv_control_item.num_ped_ecf}, num_cupom={pdv_control_item.num_cupom}"
-            " - Lançamento do desconto liberado."
+            f"Novo pedido detectado (sem controle interno): {key_label}={poller.watermark}"
         )
         controller.show_gui()
-    else:
-        logger.info(
-            f"Item de controle PDV encontrado: num_ped_ecf={pdv_control_item.num_ped_ecf}, num_cupom={pdv_control_item.num_cupom} - SKIPPING."
-        )
+        return True
+
+    show_gui = False
+    for pdv_pedido in new_orders:
+        if is_varejo:
+            pdv_control_item = get_last_control_item_of_the_dat_by_numcupom(
+                pdv_pedido.num_cupom
+            )
+        else:
+            pdv_control_item = get_pdv_control_item_by_num_ped_ecf_and_today(
+                pdv_pedido.num_ped_ecf
+            )
+        if pdv_control_item is None:
+            # Gravado pela thread de escrita; o próximo ciclo do poller só
+            # roda depois de o lote (alguns ms) ter sido commitado
+            create_pdv_control_item(
+                pdv_pedido.num_ped_ecf,
+                pdv_pedido.num_cupom,
+                pdv_pedido.data,
+            )
+            logger.info(
+                f"Criando novo item de controle PDV: num_ped_ecf={pdv_pedido.num_ped_ecf}, num_cupom={pdv_pedido.num_cupom}"
+                " - Lançamento do desconto liberado."
+            )
+            show_gui = True
+        else:
+            logger.info(
+                f"Item de controle PDV encontrado: num_ped_ecf={pdv_control_item.num_ped_ecf}, num_cupom={pdv_control_item.num_cupom} - SKIPPING."
+            )
+    if show_gui:
+        controller.show_gui()
+    return True
 
 
-def listen_notification_not_sent():
+def listen_notification_not_sent() -> bool:
+    """Reenvia a notificação pendente mais recente. True se foi entregue."""
     try:
         last_notification_not_sent = get_last_notification_not_sent()
         if last_notification_not_sent is not None:
@@ -117,27 +190,164 @@ def listen_notification_not_sent():
                 f"Encontrada notificação não enviada: {last_notification_not_sent.id}"
             )
             notification_item = Notification(**last_notification_not_sent.data)
-            notification_item.notify_discount()
+            return notification_item.notify_discount()
         else:
             logger.info("Nenhuma notificação não enviada encontrada - SKIPPING.")
     except Exception as e:
         logger.error(f"Erro ao processar notificação: {e}")
+    return False
 
 
-def background_task(controller: AppController, is_active_db: bool):
+def create_adaptive_interval(
+    base: float, minimum: float, maximum: float
+) -> AdaptiveInterval:
+    return AdaptiveInterval(
+        base,
+        minimum=minimum,
+        maximum=maximum,
+        backoff=settings.scheduler_backoff,
+        jitter=settings.scheduler_jitter,
+    )
+
+
+def create_retention_manager() -> RetentionManager:
+    return RetentionManager(
+        SQLITE_DB_PATH.parent / settings.sqlite_archive_dir,
+        [
+            RetainedTable(
+                "Notification",
+                get_expired_notifications,
+                delete_notifications,
+                lambda row: str(row["created_at"])[:7],
+            ),
+            RetainedTable(
+                "ControlPDV",
+                get_expired_control_items,
+                delete_control_items,
+                lambda row: str(row["data"])[:7],
+            ),
+            RetainedTable(
+                "AppliedDiscount",
+                get_expired_applied_discounts,
+                delete_applied_discounts,
+                lambda row: str(row["data"])[:7],
+            ),
+        ],
+        retention_days=settings.sqlite_retention_days,
+        batch_size=settings.sqlite_archive_batch_size,
+    )
+
+
+def background_task(controller: "AppController", cycles: Optional[int] = None):
+    """Laço da thread de background; `cycles` limita as voltas (diagnóstico/testes)."""
     logger.info("Iniciando thread de background...")
     controller.show_gui()
-    last_cupom = [None]
-    while True:
-        sleep(5)
-        listen_notification_not_sent()
-        listen_new_pdv_item(controller, is_active_db, last_cupom)
+    poller = create_pdv_order_poller()
+    change_source = create_order_change_source()
+    logger.info(f"Origem de pedidos novos: {change_source.name}")
+
+    # Cada rotina periódica tem o próprio intervalo: o outbox de notificações
+    # não depende do ritmo das consultas ao Oracle, e vice-versa.
+    scheduler = Scheduler()
+    scheduler.add(
+        "notificações",
+        listen_notification_not_sent,
+        create_adaptive_interval(
+            settings.notification_outbox_interval,
+            settings.notification_outbox_min_interval,
+            settings.notification_outbox_max_interval,
+        ),
+    )
+    pdv_job = None
+    last_activity = monotonic()
+    retention = create_retention_manager()
+
+    def poll_pdv() -> bool:
+        nonlocal last_activity
+        active = listen_new_pdv_item(controller, poller)
+        if active:
+            last_activity = monotonic()
+        return active
+
+    def sqlite_maintenance() -> bool:
+        # Arquiva o que venceu; com o caixa parado, compacta o arquivo aos poucos
+        pending = retention.run()
+        if pending or monotonic() - last_activity < settings.sqlite_vacuum_idle_seconds:
+            return pending
+        free_pages = incremental_vacuum(settings.sqlite_vacuum_pages)
+        return free_pages > 0
+
+    scheduler.add(
+        "manutenção SQLite",
+        sqlite_maintenance,
+        create_adaptive_interval(
+            settings.sqlite_retention_interval,
+            SQLITE_MAINTENANCE_MIN_INTERVAL,
+            settings.sqlite_retention_interval,
+        ),
+        run_now=False,
+    )
+
+    def start_pdv_polling():
+        nonlocal pdv_job
+        change_source.start()
+        # Com CQN, o Oracle avisa das mudanças (e a própria origem faz a
+        # reconsulta de segurança); no polling, o scheduler dita o ritmo.
+        if settings.order_change_source == OrderChangeSourceType.ORACLE_CQN:
+            interval = None
+        else:
+            interval = create_adaptive_interval(
+                settings.pdv_poll_interval,
+                settings.pdv_poll_min_interval,
+                settings.pdv_poll_max_interval,
+            )
+        pdv_job = scheduler.add("pedidos PDV", poll_pdv, interval)
+
+    def retry_pdv_source() -> bool:
+        if pdv_source_init_setup(controller):
+            source_job.cancel()
+            start_pdv_polling()
+        return False
+
+    if pdv_source_init_setup(controller):
+        start_pdv_polling()
+    else:
+        logger.warning(
+            "Banco de dados desativado. Não será possível verificar novos itens do PDV."
+        )
+        source_job = scheduler.add(
+            "conexão origem PDV",
+            retry_pdv_source,
+            create_adaptive_interval(
+                ORACLE_RETRY_INTERVAL, ORACLE_RETRY_INTERVAL, ORACLE_RETRY_MAX_INTERVAL
+            ),
+            run_now=False,
+        )
+
+    while cycles is None or cycles > 0:
+        if cycles is not None:
+            cycles -= 1
+        # Dorme até o próximo job vencer ou até um aviso de mudança no PDV
+        timeout = scheduler.time_until_next(settings.pdv_poll_interval)
+        if change_source.wait_for_change(timeout) and pdv_job is not None:
+            scheduler.trigger(pdv_job)
+        scheduler.run_pending()
 
 
 def print_inital_configuration():
     logger.info("Configurações iniciais:")
     logger.info(f"IP da API Estapar: {settings.estapar_ip}")
     logger.info(f"Porta da API Estapar: {settings.estapar_port}")
+    if settings.estapar_backup_endpoints:
+        logger.info(f"Endpoints reservas da API Estapar: {settings.estapar_backup_endpoints}")
+    logger.info(
+        f"Modo de conexão da API Estapar: {settings.estapar_connection_mode.value}"
+    )
+    num_caixa = settings.pdv_terminal_num_caixa
+    logger.info(
+        f"Pedidos PDV consultados: {'caixa ' + str(num_caixa) if num_caixa is not None else 'loja inteira'}"
+    )
+    logger.info(f"Origem dos pedidos PDV: {settings.pdv_order_source.value}")
     logger.info(f"Usuário do banco de dados Oracle: {settings.oracle_user}")
     logger.info(f"Senha do banco de dados Oracle: {settings.oracle_password}")
     logger.info(f"Host do banco de dados Oracle: {settings.oracle_host}")
@@ -156,13 +366,14 @@ def print_inital_configuration():
 def main():
     logger_init_setup()
     print_inital_configuration()
-    is_db_active = db_init_setup()
+    db_init_setup()
+    from totalatacadot1.controllers.app_controller import AppController
+
     controller = AppController()
 
-    # Criar e iniciar a thread que executa a lógica em segundo plano
-    thread = Thread(
-        target=background_task, args=(controller, is_db_active), daemon=True
-    )
+    # Criar e iniciar a thread que executa a lógica em segundo plano; a conexão
+    # com o Oracle acontece nela, com a janela e o ícone já visíveis.
+    thread = Thread(target=background_task, args=(controller,), daemon=True)
     thread.start()
 
     # Iniciar o loop de eventos do Qt
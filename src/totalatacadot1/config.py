@@ -1,10 +1,18 @@
 import os
+import socket
 import sys
+from functools import cached_property
 from pathlib import Path
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
-from .enums import StoreType
+from .enums import (
+    EstaparConnectionMode,
+    OraclePoolMode,
+    OrderChangeSourceType,
+    PdvOrderSourceType,
+    StoreType,
+)
 
 
 def _get_project_root() -> Path:
@@ -29,6 +37,26 @@ class Settings(BaseSettings):
     # API Estapar
     estapar_ip: str = "10.7.39.10"
     estapar_port: int = 3000
+    # ONE_SHOT abre um socket por validação; POOLED reaproveita conexões
+    # keep-alive (até estapar_pool_size ociosas, descartadas após o timeout).
+    estapar_connection_mode: EstaparConnectionMode = EstaparConnectionMode.ONE_SHOT
+    estapar_pool_size: int = 2
+    estapar_pool_idle_timeout: float = 60.0  # segundos
+    # Prazo de conexão adaptativo (segundos): derivado do RTT medido, limitado
+    # a [piso, teto]. O prazo de resposta é fixo (não encurta com o RTT).
+    estapar_connect_timeout_floor: float = 0.3
+    estapar_connect_timeout_ceiling: float = 3.0
+    estapar_read_timeout: float = 10.0
+    # Circuit breaker: abre após N falhas (ou M timeouts) seguidas e testa o
+    # servidor com um CONSULT a cada estapar_breaker_reset_timeout segundos
+    estapar_breaker_failure_threshold: int = 3
+    estapar_breaker_timeout_threshold: int = 2
+    estapar_breaker_reset_timeout: float = 30.0
+    # Validadores reservas, "host:porta" separados por vírgula. A conexão
+    # começa pelo preferido e dispara o próximo a cada estapar_connect_stagger
+    # segundos sem resposta; vence o primeiro que conectar.
+    estapar_backup_endpoints: str = ""
+    estapar_connect_stagger: float = 0.25
 
     # Banco de Dados Oracle
     oracle_user: str = "CAIXA"
@@ -38,6 +66,90 @@ class Settings(BaseSettings):
     oracle_sid: str = "XEPDB1"
     oracle_sid_alternative_1: str = "XE"
     oracle_sid_alternative_2: str = "FREEPDB1"
+    # Os três destinos são testados em paralelo; vence o primeiro que conectar
+    oracle_connect_timeout: float = 5.0  # segundos, por tentativa TCP
+    # Pool: conexões fixas + extras sob pico. Sem ping a cada checkout; conexões
+    # são recicladas após oracle_pool_recycle segundos (SQLALCHEMY).
+    oracle_pool_mode: OraclePoolMode = OraclePoolMode.SQLALCHEMY
+    oracle_pool_size: int = 2
+    oracle_pool_max_overflow: int = 2
+    oracle_pool_recycle: int = 1800
+    oracle_pool_timeout: float = 10.0
+    oracle_drcp_class: str = "TOTALATACADOT1"  # connection class no DRCP
+    # Cria/verifica PCPEDCECF no início (só para bancos de desenvolvimento)
+    oracle_create_tables: bool = False
+
+    # Perfil do SQLite local, aplicado a cada conexão nova. WAL deixa leituras
+    # e a escrita correrem em paralelo (GUI e background); NORMAL só sincroniza
+    # no checkpoint; busy_timeout espera o lock em vez de falhar na hora.
+    # Tamanhos em bytes (mmap) e KiB (cache de páginas por conexão).
+    sqlite_journal_mode: str = "WAL"
+    sqlite_synchronous: str = "NORMAL"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_temp_store: str = "MEMORY"
+    sqlite_mmap_size: int = 64 * 1024 * 1024
+    sqlite_cache_size_kib: int = 8192
+    # Conexões mantidas abertas e compartilhadas entre as threads
+    sqlite_pool_size: int = 4
+    # Thread de escrita: inserts que chegam dentro da janela (segundos) são
+    # gravados numa única transação, até sqlite_writer_max_batch por commit
+    sqlite_writer_batch_window: float = 0.005
+    sqlite_writer_max_batch: int = 200
+
+    # Retenção do SQLite local: notificações enviadas e controles com mais de
+    # sqlite_retention_days dias vão, em lotes, para arquivos gzip mensais em
+    # sqlite_archive_dir (relativo à pasta do banco), verificado a cada
+    # sqlite_retention_interval segundos. Com o caixa sem pedidos novos há
+    # sqlite_vacuum_idle_seconds, devolve até sqlite_vacuum_pages páginas
+    # livres ao disco por rodada (incremental_vacuum).
+    sqlite_retention_days: int = 30
+    sqlite_archive_dir: str = "archive"
+    sqlite_archive_batch_size: int = 500
+    sqlite_retention_interval: float = 3600.0
+    sqlite_vacuum_idle_seconds: float = 300.0
+    sqlite_vacuum_pages: int = 1000
+
+    # Origem dos pedidos do PDV. SQLITE lê PCPEDCECF de pdv_sqlite_source_path;
+    # SYNTHETIC gera pdv_synthetic_orders_per_minute pedidos (Poisson) entre
+    # pdv_synthetic_caixas caixas. Ambas dispensam o Oracle.
+    pdv_order_source: PdvOrderSourceType = PdvOrderSourceType.ORACLE
+    pdv_sqlite_source_path: str = "pcpedcecf.db"
+    pdv_synthetic_orders_per_minute: float = 6.0
+    pdv_synthetic_caixas: int = 10
+
+    # Detecção de pedidos novos: POLLING consulta a cada pdv_poll_interval
+    # segundos; ORACLE_CQN espera o aviso do Oracle e só reconsulta por
+    # segurança a cada pdv_cqn_resync_interval (volta ao polling se falhar).
+    order_change_source: OrderChangeSourceType = OrderChangeSourceType.POLLING
+    pdv_poll_interval: float = 5.0
+    pdv_cqn_resync_interval: float = 60.0
+
+    # Escopo por terminal: com o NUMCAIXA conhecido, cada PDV consulta só os
+    # próprios pedidos. pdv_num_caixa tem prioridade; senão o hostname da
+    # máquina é procurado em pdv_num_caixa_by_hostname ("CAIXA01=1,CAIXA02=2").
+    # Sem nenhum dos dois, a consulta abrange a loja inteira.
+    pdv_num_caixa: int | None = None
+    pdv_num_caixa_by_hostname: str = ""
+
+    # Agendamento adaptativo (segundos): após encontrar trabalho o intervalo
+    # cai ao mínimo; a cada rodada ociosa é multiplicado por scheduler_backoff
+    # até o máximo. scheduler_jitter (fração, ±) evita que os caixas
+    # consultem o Oracle todos no mesmo instante. O máximo dos pedidos PDV fica
+    # no pdv_poll_interval: o primeiro pedido após um período ocioso não pode
+    # demorar mais para aparecer do que com o intervalo fixo.
+    pdv_poll_min_interval: float = 2.0
+    pdv_poll_max_interval: float = 5.0
+    notification_outbox_interval: float = 5.0
+    notification_outbox_min_interval: float = 1.0
+    notification_outbox_max_interval: float = 60.0
+    scheduler_backoff: float = 2.0
+    scheduler_jitter: float = 0.2
+    # Idade máxima (s) do snapshot do último pedido PDV usado pelo clique de
+    # validação; acima disso o clique consulta o Oracle na hora.
+    pdv_snapshot_max_age: float = 10.0
+    # Chaves abaixo da marca d'água relidas a cada sync do espelho PDV, para
+    # pegar pedidos alterados ou commitados fora de ordem no Oracle
+    pdv_mirror_refetch_keys: int = 50
 
     # URL Notificação
     url_notification: str = "http://192.168.211.249:8000"
@@ -56,6 +168,40 @@ class Settings(BaseSettings):
         extra="ignore",
     )
 
+    @property
+    def estapar_backup_endpoint_list(self) -> list[tuple[str, int]]:
+        endpoints = []
+        for item in self.estapar_backup_endpoints.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            host, _, port = item.rpartition(":")
+            if not host or not port.isdigit():
+                raise ValueError(f"Endpoint Estapar inválido: {item!r} (use host:porta)")
+            endpoints.append((host, int(port)))
+        return endpoints
+
+    @cached_property
+    def pdv_terminal_num_caixa(self) -> int | None:
+        """NUMCAIXA deste terminal, ou None para consultar a loja inteira.
+
+        Resolvido uma vez (hostname e mapeamento não mudam com o app aberto):
+        é lido a cada consulta de pedidos do polling.
+        """
+        if self.pdv_num_caixa is not None:
+            return self.pdv_num_caixa
+        hostname = socket.gethostname().upper()
+        for item in self.pdv_num_caixa_by_hostname.split(","):
+            item = item.strip()
+            if not item:
+                continue
+            host, _, num_caixa = item.rpartition("=")
+            if not host or not num_caixa.strip().isdigit():
+                raise ValueError(f"Mapeamento de caixa inválido: {item!r} (use hostname=numcaixa)")
+            if host.strip().upper() == hostname:
+                return int(num_caixa)
+        return None
+
     # --- Propriedades de Caminhos ---
     @property
     def project_root(self) -> Path:
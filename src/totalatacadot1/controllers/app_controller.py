@@ -1,4 +1,3 @@
-import datetime
 import socket
 import sys
 import traceback
@@ -11,17 +10,39 @@ from PySide6.QtWidgets import QApplication, QMenu, QSystemTrayIcon
 
 from ..components.custom_message_box import CustomMessageBox
 from ..config import settings
-from ..enums import CommandType
+from ..database import SQLITE_DB_PATH
+from ..enums import CommandType, DatabaseStatus, PdvOrderSourceType
 from ..gui.main_window import MainWindow
 from ..notification import Notification
 from ..repository import (
+    create_applied_discount,
     create_notification_item,
-    get_last_applied_discount,
-    get_last_pdv_pedido,
-    upsert_last_applied_discount,
+    get_applied_discount_keys,
+    get_last_mirrored_pdv_pedido,
+    get_mirrored_pdv_pedido_by_num_cupom,
+    get_mirrored_pdv_watermark,
+    pdv_order_key,
+    prune_mirrored_pdv_orders,
+    reserve_estapar_sequence_block,
+    save_mirrored_pdv_orders,
+    sqlite_writer,
 )
 from ..schemas import DiscountRequest
+from ..services.applied_discount_index import (
+    AppliedDiscountIndex,
+    request_discount_key,
+)
+from ..services.circuit_breaker import CircuitBreaker
+from ..services.endpoint import TimeoutLimits
 from ..services.estapar_integration_service import EstaparIntegrationService
+from ..services.pdv_order_mirror import PdvOrderMirror
+from ..services.pdv_order_source import (
+    OraclePdvOrderSource,
+    PdvOrderSource,
+    SqlitePdvOrderSource,
+    SyntheticPdvOrderSource,
+)
+from ..services.pdv_snapshot_cache import PdvOrderSnapshotCache
 
 SINGLE_INSTANCE_KEY = "totalatacadot1"
 
@@ -31,6 +52,8 @@ class AppController(QObject):
     request_hide_gui = Signal()
     request_shutdown = Signal()
     actual_valor_updated = Signal(float)
+    estapar_circuit_changed = Signal(str)
+    database_status_changed = Signal(str)
 
     def __init__(self):
         super().__init__()
@@ -46,6 +69,47 @@ class AppController(QObject):
         self.request_hide_gui.connect(self._hide_gui)
         self.request_shutdown.connect(self._shutdown)
         self.actual_valor_updated.connect(self.window.update_actual_valor)
+        self.estapar_circuit_changed.connect(self.window.update_estapar_status)
+        self.database_status_changed.connect(self.window.update_database_status)
+
+        # Um único serviço Estapar por processo: conexões, estimativas de RTT,
+        # circuito e sequência são compartilhados por todas as validações.
+        # O listener do circuito roda na thread que detectou a mudança, por
+        # isso publica via sinal (entregue na thread da GUI).
+        self.estapar_breaker = CircuitBreaker(
+            failure_threshold=settings.estapar_breaker_failure_threshold,
+            timeout_threshold=settings.estapar_breaker_timeout_threshold,
+            reset_timeout=settings.estapar_breaker_reset_timeout,
+        )
+        self.estapar_breaker.add_listener(
+            lambda state: self.estapar_circuit_changed.emit(state.value)
+        )
+        self.estapar_service = self._create_estapar_service()
+        self.estapar_breaker.probe = self.estapar_service.probe
+
+        # Origem dos pedidos (Oracle em produção) e espelho local do dia,
+        # sincronizado por marca d'água
+        self.pdv_source = self._create_pdv_order_source()
+        self.pdv_mirror = PdvOrderMirror(
+            self.pdv_source.after,
+            save_mirrored_pdv_orders,
+            get_mirrored_pdv_watermark,
+            prune_mirrored_pdv_orders,
+            pdv_order_key(settings.store_type),
+            refetch_window=settings.pdv_mirror_refetch_keys,
+        )
+        # Último pedido PDV: o poller (thread de background) publica, o clique
+        # de validação lê da memória e só vai ao Oracle se o snapshot envelheceu
+        self.pdv_snapshot = PdvOrderSnapshotCache(
+            self._load_last_pdv_pedido, max_age=settings.pdv_snapshot_max_age
+        )
+
+        # Descontos aplicados hoje (bloqueio de relançamento); carregados do
+        # SQLite agora para o primeiro clique não pagar a consulta
+        self.applied_discounts = AppliedDiscountIndex(
+            get_applied_discount_keys, create_applied_discount
+        )
+        self.applied_discounts.load()
 
         # Conecta o sinal de processamento do widget ao handler do controlador
         self.window.main_widget.process_request.connect(self.handle_process_request)
@@ -118,45 +182,34 @@ class AppController(QObject):
             # Validação do Objeto de Requisição
             discount_request.validate()
 
-            # Bloquear relançamento do mesmo desconto no mesmo dia
-            last_discount = get_last_applied_discount()
-            if last_discount:
-                today = datetime.date.today()
-                if (
-                    str(last_discount.ticket_code).strip()
-                    == str(discount_request.cmd_card_id).strip()
-                    and int(last_discount.num_ped_ecf)
-                    == int(discount_request.cmd_seq_no)
-                    and int(last_discount.num_cupom)
-                    == int(discount_request.cmd_op_seq_no)
-                    and round(float(last_discount.valor_total), 2)
-                    == round(float(discount_request.cmd_op_value), 2)
-                    and str(last_discount.data)[:10] == str(today)
-                ):
-                    logger.warning(
-                        f"Desconto já lançado hoje para ticket={discount_request.cmd_card_id} "
-                        f"num_ped_ecf={discount_request.cmd_seq_no} — bloqueado."
-                    )
-                    CustomMessageBox(
-                        "Desconto já lançado",
-                        "Este desconto já foi aplicado hoje!\nOperação bloqueada.",
-                        error_icon_path,
-                        parent_widget,
-                    ).exec()
-                    return
+            # Bloquear relançamento do mesmo desconto no mesmo dia (a validação
+            # manual ainda não tem num_ped_ecf aqui: não há o que checar)
+            applied_key = request_discount_key(discount_request)
+            if applied_key is not None and self.applied_discounts.contains(
+                applied_key
+            ):
+                logger.warning(
+                    f"Desconto já lançado hoje para ticket={discount_request.cmd_card_id} "
+                    f"num_ped_ecf={discount_request.cmd_seq_no} — bloqueado."
+                )
+                CustomMessageBox(
+                    "Desconto já lançado",
+                    "Este desconto já foi aplicado hoje!\nOperação bloqueada.",
+                    error_icon_path,
+                    parent_widget,
+                ).exec()
+                return
 
             # Executar Serviço
             logger.debug("Enviando requisição para API Estapar")
-            service = EstaparIntegrationService(
-                settings.estapar_ip, settings.estapar_port
-            )
-            result = service.create_discount(discount_request)
+            result = self.estapar_service.create_discount(discount_request)
             logger.debug(f"Resposta da API: {result}")
 
             # Atualizar e enviar notificação
             if notification_data:
                 notification_data.success = result.success
                 notification_data.message = result.message
+                # Só enfileira: a thread de escrita faz o commit (Future ignorado)
                 create_notification_item(notification_data.to_dict())
 
             # Feedback para o usuário
@@ -168,13 +221,8 @@ class AppController(QObject):
                 )
                 msg = f"API Estapar: {result.message}"
                 logger.success(msg)
-                upsert_last_applied_discount(
-                    ticket_code=discount_request.cmd_card_id,
-                    num_ped_ecf=discount_request.cmd_seq_no,
-                    num_cupom=discount_request.cmd_op_seq_no,
-                    valor_total=discount_request.cmd_op_value,
-                    data=datetime.date.today(),
-                )
+                # Depois do envio: o cmdSeqNo da validação manual já foi atribuído
+                self.applied_discounts.add(request_discount_key(discount_request))
                 CustomMessageBox(
                     success_title, msg, success_icon_path, parent_widget
                 ).exec()
@@ -223,6 +271,44 @@ class AppController(QObject):
             except Exception as e:
                 logger.error(f"Erro ao criar notificação: {str(e)}")
 
+    def _load_last_pdv_pedido(self):
+        """Sincroniza o espelho (se o Oracle responder) e lê o último pedido local."""
+        self.pdv_mirror.try_sync()
+        return get_last_mirrored_pdv_pedido()
+
+    def _create_pdv_order_source(self) -> PdvOrderSource:
+        if settings.pdv_order_source == PdvOrderSourceType.SQLITE:
+            # Caminho relativo: junto do banco local do app
+            return SqlitePdvOrderSource(
+                SQLITE_DB_PATH.parent / settings.pdv_sqlite_source_path
+            )
+        if settings.pdv_order_source == PdvOrderSourceType.SYNTHETIC:
+            return SyntheticPdvOrderSource(
+                pdv_order_key(settings.store_type),
+                orders_per_minute=settings.pdv_synthetic_orders_per_minute,
+                caixas=settings.pdv_synthetic_caixas,
+                num_caixa=settings.pdv_terminal_num_caixa,
+            )
+        return OraclePdvOrderSource()
+
+    def _create_estapar_service(self) -> EstaparIntegrationService:
+        return EstaparIntegrationService(
+            settings.estapar_ip,
+            settings.estapar_port,
+            connection_mode=settings.estapar_connection_mode,
+            pool_size=settings.estapar_pool_size,
+            pool_idle_timeout=settings.estapar_pool_idle_timeout,
+            timeout_limits=TimeoutLimits(
+                connect_floor=settings.estapar_connect_timeout_floor,
+                connect_ceiling=settings.estapar_connect_timeout_ceiling,
+                read_timeout=settings.estapar_read_timeout,
+            ),
+            circuit_breaker=self.estapar_breaker,
+            backup_endpoints=settings.estapar_backup_endpoint_list,
+            connect_stagger=settings.estapar_connect_stagger,
+            sequence_provider=reserve_estapar_sequence_block,
+        )
+
     def _prepare_manual_validation(
         self, form_data, ticket_code, hostname, parent_widget, icon_path
     ):
@@ -249,6 +335,25 @@ class AppController(QObject):
 
         logger.debug(f"Validação Manual - Cupom: {num_cupom}, Valor: {valor_total}")
 
+        # Confere o valor digitado com o cupom do dia no espelho local. Cupom
+        # ausente (ainda não espelhado ou de outro caixa) segue como digitado.
+        mirrored = get_mirrored_pdv_pedido_by_num_cupom(int(num_cupom))
+        if mirrored is None:
+            logger.debug(f"Cupom {num_cupom} não encontrado no espelho local.")
+        elif round(float(mirrored.vl_total), 2) != round(float(valor_total), 2):
+            logger.warning(
+                f"Valor digitado ({valor_total}) difere do cupom {num_cupom} "
+                f"no PDV ({mirrored.vl_total})."
+            )
+            CustomMessageBox(
+                "Erro",
+                f"O valor informado não confere com o cupom {num_cupom}.\n"
+                f"Valor no PDV: R$ {float(mirrored.vl_total):.2f}",
+                icon_path,
+                parent_widget,
+            ).exec()
+            return None, None
+
         req = DiscountRequest(
             cmd_card_id=ticket_code,
             cmd_term_id=0,
@@ -272,8 +377,18 @@ class AppController(QObject):
     def _prepare_automatic_validation(
         self, operation_type, ticket_code, hostname, parent_widget, icon_path
     ):
-        logger.debug("Consultando último pedido PDV")
-        pdv_pedido = get_last_pdv_pedido()
+        if not self.pdv_source.is_ready():
+            # A conexão é feita em background; não bloqueia a GUI esperando o banco
+            CustomMessageBox(
+                "Aguarde",
+                "Conectando ao banco de dados do PDV.\nTente novamente em instantes.",
+                icon_path,
+                parent_widget,
+            ).exec()
+            return None, None
+
+        pdv_pedido = self.pdv_snapshot.get()
+        logger.debug(f"Último pedido PDV (cache): {self.pdv_snapshot.snapshot()}")
 
         if not pdv_pedido:
             logger.error("Nenhum pedido PDV encontrado")
@@ -321,6 +436,9 @@ class AppController(QObject):
     def emit_actual_valor_update(self, valor: float):
         self.actual_valor_updated.emit(valor)
 
+    def emit_database_status(self, status: DatabaseStatus):
+        self.database_status_changed.emit(status.value)
+
     @Slot()
     def show_gui(self):
         self.request_show_gui.emit()
@@ -344,6 +462,10 @@ class AppController(QObject):
 
     @Slot()
     def _shutdown(self):
+        self.estapar_breaker.shutdown()
+        self.estapar_service.close()
+        # Grava as escritas ainda na fila antes de sair
+        sqlite_writer.close()
         self.app.quit()
 
     def _ensure_single_instance(self) -> bool:
@@ -1,14 +1,18 @@
 import platform
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
 from pathlib import Path
 
 import oracledb
 from loguru import logger
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 
 from totalatacadot1.config import settings
+from totalatacadot1.enums import OraclePoolMode
 
 
 def setup_oracle_client():
@@ -27,12 +31,19 @@ def setup_oracle_client():
             oracledb.init_oracle_client(lib_dir=str(oracle_client_path))
 
 
-setup_oracle_client()
-
-DATABASE_URLS = [
-    f"oracle+oracledb://{settings.oracle_user}:{settings.oracle_password}@{settings.oracle_host}:{settings.oracle_port}/?service_name={settings.oracle_sid}",
-    f"oracle+oracledb://{settings.oracle_user}:{settings.oracle_password}@{settings.oracle_host}:{settings.oracle_port}/{settings.oracle_sid_alternative_1}",
-    f"oracle+oracledb://{settings.oracle_user}:{settings.oracle_password}@{settings.oracle_host}:{settings.oracle_port}/?service_name={settings.oracle_sid_alternative_2}",
+# Destinos candidatos (DSN do oracledb), na ordem de preferência da configuração
+ORACLE_DSNS = [
+    oracledb.makedsn(
+        settings.oracle_host, settings.oracle_port, service_name=settings.oracle_sid
+    ),
+    oracledb.makedsn(
+        settings.oracle_host, settings.oracle_port, sid=settings.oracle_sid_alternative_1
+    ),
+    oracledb.makedsn(
+        settings.oracle_host,
+        settings.oracle_port,
+        service_name=settings.oracle_sid_alternative_2,
+    ),
 ]
 
 # Configurações do banco de dados SQLite
@@ -43,6 +54,11 @@ SQLITE_DB_PATH.parent.mkdir(
 SQLITE_URL = f"sqlite:///{SQLITE_DB_PATH}"
 
 
+# Cache de statements preparados por conexão oracledb (parse evitado nas
+# consultas repetidas do polling).
+ORACLE_STMT_CACHE_SIZE = 40
+
+
 class BaseOracle(DeclarativeBase):
     pass
 
@@ -51,40 +67,197 @@ class BaseSQLite(DeclarativeBase):
     pass
 
 
-oracle_engine = None
-sqlite_engine = None
-for database_url in DATABASE_URLS:
+def _probe_oracle_dsn(dsn: str) -> str:
+    connection = oracledb.connect(
+        user=settings.oracle_user,
+        password=settings.oracle_password,
+        dsn=dsn,
+        tcp_connect_timeout=settings.oracle_connect_timeout,
+    )
+    connection.close()
+    return dsn
+
+
+def select_oracle_dsn(candidates: list[str]) -> str | None:
+    """Testa os DSNs em paralelo e retorna o primeiro que conectar.
+
+    Um SID errado ou host inacessível não atrasa mais os outros candidatos:
+    o tempo total é o do destino mais rápido, não a soma das falhas.
+    """
+    executor = ThreadPoolExecutor(
+        max_workers=len(candidates), thread_name_prefix="oracle-probe"
+    )
+    futures = {executor.submit(_probe_oracle_dsn, dsn): dsn for dsn in candidates}
     try:
-        oracle_engine = create_engine(
-            database_url, echo=False, pool_pre_ping=True
-        )  # echo=True para logs de SQL no console
-        connection = oracle_engine.connect()
-        connection.close()
-        logger.info(f"Conexão Oracle bem-sucedida: {database_url}")
-        break
-    except Exception as e:
-        logger.warning(f"Erro ao conectar ao Oracle: {database_url}. Erro: {e}")
-
-if oracle_engine is None:
-    raise RuntimeError("Nenhuma conexão com o Oracle foi estabelecida.")
+        for future in as_completed(futures):
+            dsn = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.warning(f"Erro ao conectar ao Oracle: {dsn}. Erro: {e}")
+                continue
+            logger.info(f"Conexão Oracle bem-sucedida: {dsn}")
+            return dsn
+        return None
+    finally:
+        # As tentativas perdedoras terminam sozinhas (limitadas pelo timeout)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def create_oracle_engine(dsn: str) -> Engine:
+    """Engine para o DSN escolhido, com o pool definido em settings.oracle_pool_mode."""
+    mode = settings.oracle_pool_mode
+    if mode == OraclePoolMode.SQLALCHEMY:
+        # Sem pool_pre_ping (um round-trip a cada checkout): a vida da conexão
+        # é garantida pela reciclagem por idade e pelo keepalive do driver.
+        return create_engine(
+            "oracle+oracledb://@",
+            echo=False,  # echo=True para logs de SQL no console
+            pool_size=settings.oracle_pool_size,
+            max_overflow=settings.oracle_pool_max_overflow,
+            pool_recycle=settings.oracle_pool_recycle,
+            pool_timeout=settings.oracle_pool_timeout,
+            connect_args={
+                "user": settings.oracle_user,
+                "password": settings.oracle_password,
+                "dsn": dsn,
+                "stmtcachesize": ORACLE_STMT_CACHE_SIZE,
+            },
+        )
+
+    pool_params = {}
+    if mode == OraclePoolMode.DRCP:
+        pool_params = {
+            "server_type": "pooled",
+            "cclass": settings.oracle_drcp_class,
+            "purity": oracledb.PURITY_SELF,
+        }
+    session_pool = oracledb.create_pool(
+        user=settings.oracle_user,
+        password=settings.oracle_password,
+        dsn=dsn,
+        min=1,
+        max=settings.oracle_pool_size + settings.oracle_pool_max_overflow,
+        increment=1,
+        wait_timeout=int(settings.oracle_pool_timeout * 1000),
+        getmode=oracledb.POOL_GETMODE_TIMEDWAIT,
+        stmtcachesize=ORACLE_STMT_CACHE_SIZE,
+        **pool_params,
+    )
+    # O pool do driver faz o papel do pool; o SQLAlchemy só pega e devolve sessões
+    return create_engine(
+        "oracle+oracledb://@",
+        echo=False,
+        creator=session_pool.acquire,
+        poolclass=NullPool,
+    )
+
+
+# Engine Oracle criado sob demanda (get_oracle_engine), fora do import: a GUI
+# sobe sem esperar o banco e o app não cai se o Oracle estiver inacessível.
+_oracle_engine: Engine | None = None
+_oracle_dsn: str | None = None
+_oracle_lock = threading.Lock()
+_oracle_client_ready = False
+
+
+def get_oracle_engine() -> Engine:
+    """Retorna o engine Oracle, conectando na primeira chamada.
+
+    Thread-safe: chamadas concorrentes esperam a mesma inicialização. Se
+    nenhum destino responder, levanta RuntimeError e a próxima chamada tenta
+    de novo.
+    """
+    global _oracle_engine, _oracle_dsn, _oracle_client_ready
+    engine = _oracle_engine
+    if engine is not None:
+        return engine
+    with _oracle_lock:
+        if _oracle_engine is None:
+            if not _oracle_client_ready:
+                setup_oracle_client()
+                _oracle_client_ready = True
+            dsn = select_oracle_dsn(ORACLE_DSNS)
+            if dsn is None:
+                raise RuntimeError("Nenhuma conexão com o Oracle foi estabelecida.")
+            engine = create_oracle_engine(dsn)
+            event.listen(engine, "before_cursor_execute", _apply_fetch_tuning)
+            logger.info(f"Pool Oracle: {settings.oracle_pool_mode.value}")
+            _oracle_dsn, _oracle_engine = dsn, engine
+        return _oracle_engine
+
+
+def is_oracle_ready() -> bool:
+    return _oracle_engine is not None
+
+
+def _apply_fetch_tuning(conn, cursor, statement, parameters, context, executemany):
+    """Aplica prefetchrows/arraysize pedidos via execution_options da consulta.
+
+    Com prefetchrows cobrindo o resultado esperado, as linhas chegam no mesmo
+    round-trip do execute, sem um fetch separado.
+    """
+    if context is None:
+        return
+    options = context.execution_options
+    if "oracle_prefetchrows" in options:
+        cursor.prefetchrows = options["oracle_prefetchrows"]
+    if "oracle_arraysize" in options:
+        cursor.arraysize = options["oracle_arraysize"]
+
+
+def sqlite_profile_pragmas() -> list[str]:
+    """PRAGMAs do perfil configurado em settings (ordem importa: journal primeiro)."""
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}",
+        f"PRAGMA temp_store={settings.sqlite_temp_store}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+        f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kib)}",
+    ]
+
+
+def create_sqlite_engine(url: str, pragmas: list[str] | None = None) -> Engine:
+    """Engine SQLite com os PRAGMAs aplicados a cada conexão nova do pool.
+
+    As conexões ficam abertas no pool e são compartilhadas pelas threads
+    (check_same_thread=False), então o perfil é aplicado uma vez por conexão.
+    """
+    engine = create_engine(
+        url,
+        echo=False,
+        # Necessário para SQLite em aplicações multi-thread
+        connect_args={"check_same_thread": False},
+        pool_size=settings.sqlite_pool_size,
+        max_overflow=settings.sqlite_pool_size,
+    )
+    if pragmas:
+
+        @event.listens_for(engine, "connect")
+        def _apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in pragmas:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+
+    return engine
+
 
 # Configuração do engine do SQLite
-sqlite_engine = create_engine(
-    SQLITE_URL,
-    echo=False,
-    connect_args={
-        "check_same_thread": False
-    },  # Necessário para SQLite em aplicações multi-thread
-)
+sqlite_engine = create_sqlite_engine(SQLITE_URL, sqlite_profile_pragmas())
 
 # Criar as sessões para cada banco de dados
-OracleSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=oracle_engine)
+# Sem bind fixo: a sessão recebe o engine Oracle na criação (get_oracle_db)
+OracleSessionLocal = sessionmaker(autocommit=False, autoflush=False)
 SQLiteSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sqlite_engine)
 
 
 # Função para obter uma sessão do Oracle
 def get_oracle_db():
-    db = OracleSessionLocal()
+    db = OracleSessionLocal(bind=get_oracle_engine())
     try:
         yield db
     finally:
@@ -106,20 +279,29 @@ db_oracle_context = contextmanager(get_oracle_db)
 db_sqlite_context = contextmanager(get_sqlite_db)
 
 
-# Funções para criar as tabelas no Oracle
+def connect_oracle_events() -> oracledb.Connection:
+    """Conexão oracledb dedicada (events=True) para subscriptions CQN.
+
+    Usa o mesmo destino escolhido para o engine entre os ORACLE_DSNS.
+    """
+    get_oracle_engine()
+    return oracledb.connect(
+        user=settings.oracle_user,
+        password=settings.oracle_password,
+        dsn=_oracle_dsn,
+        events=True,
+    )
+
+
+# Funções para criar as tabelas no Oracle (apenas ambiente de desenvolvimento:
+# em produção PCPEDCECF pertence ao ERP e a verificação só custa round-trips)
 def create_oracle_tables():
-    if oracle_engine:
-        BaseOracle.metadata.create_all(bind=oracle_engine, checkfirst=True)
-
-
-# Função para inicializar o banco de dados
-def init_db():
-    logger.info("Iniciando a inicialização do banco de dados...")
-    if SQLITE_DB_PATH.exists():
-        SQLITE_DB_PATH.unlink()
-        logger.info("Banco de dados SQLite removido.")
-    if sqlite_engine:
-        BaseSQLite.metadata.create_all(bind=sqlite_engine)
-    logger.info("Tabelas SQLite criadas com sucesso.")
-    create_oracle_tables()
-    logger.info("Tabelas Oracle criadas com sucesso.")
+    BaseOracle.metadata.create_all(bind=get_oracle_engine(), checkfirst=True)
+
+
+def init_oracle_db():
+    """Conecta ao Oracle (chamado em background, pode demorar ou falhar)."""
+    get_oracle_engine()
+    if settings.oracle_create_tables:
+        create_oracle_tables()
+        logger.info("Tabelas Oracle verificadas/criadas com sucesso.")
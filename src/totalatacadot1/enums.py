@@ -12,6 +12,81 @@ class StoreType(str, Enum):
     ATACADO = "ATACADO"
 
 
+class EstaparConnectionMode(str, Enum):
+    """Define como as conexões TCP com o servidor Estapar são gerenciadas.
+
+    ONE_SHOT: abre uma conexão por validação e fecha ao final.
+    POOLED: mantém conexões keep-alive reaproveitadas entre validações.
+    """
+
+    ONE_SHOT = "ONE_SHOT"
+    POOLED = "POOLED"
+
+
+class CircuitState(str, Enum):
+    """Estado do circuit breaker do servidor Estapar.
+
+    CLOSED: requisições passam normalmente.
+    OPEN: servidor considerado fora; requisições falham imediatamente.
+    HALF_OPEN: testando se o servidor voltou.
+    """
+
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+
+class OrderChangeSourceType(str, Enum):
+    """Define como o app descobre pedidos novos no PDV.
+
+    POLLING: consulta o Oracle a cada intervalo fixo.
+    ORACLE_CQN: o Oracle notifica inserções em PCPEDCECF (Continuous Query
+    Notification); a consulta só roda quando há mudança.
+    """
+
+    POLLING = "POLLING"
+    ORACLE_CQN = "ORACLE_CQN"
+
+
+class DatabaseStatus(str, Enum):
+    """Estado da conexão com o Oracle, exibido na barra de status da GUI.
+
+    CONNECTING: inicialização em andamento (em background).
+    CONNECTED: engine pronto para consultas.
+    UNAVAILABLE: nenhum destino respondeu; nova tentativa em breve.
+    """
+
+    CONNECTING = "CONNECTING"
+    CONNECTED = "CONNECTED"
+    UNAVAILABLE = "UNAVAILABLE"
+
+
+class PdvOrderSourceType(str, Enum):
+    """De onde vêm os pedidos do PDV (PCPEDCECF).
+
+    ORACLE: banco do PDV (produção).
+    SQLITE: arquivo SQLite com uma tabela PCPEDCECF (simulação, testes offline).
+    SYNTHETIC: gerador em memória a uma taxa configurável (testes de carga).
+    """
+
+    ORACLE = "ORACLE"
+    SQLITE = "SQLITE"
+    SYNTHETIC = "SYNTHETIC"
+
+
+class OraclePoolMode(str, Enum):
+    """Define quem mantém o pool de conexões com o Oracle.
+
+    SQLALCHEMY: pool do SQLAlchemy (QueuePool) com reciclagem por idade.
+    ORACLEDB: pool de sessões do python-oracledb (verificação de vida própria).
+    DRCP: pool do driver usando o Database Resident Connection Pooling do servidor.
+    """
+
+    SQLALCHEMY = "SQLALCHEMY"
+    ORACLEDB = "ORACLEDB"
+    DRCP = "DRCP"
+
+
 class CommandType(IntEnum):
     """Tipos de comando suportados pela API da Estapar"""
 
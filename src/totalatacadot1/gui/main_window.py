@@ -1,9 +1,10 @@
 # src/totalatacadot1/gui/main_window.py
 from PySide6.QtCore import Qt, Slot
-from PySide6.QtWidgets import QMainWindow
+from PySide6.QtWidgets import QLabel, QMainWindow
 from PySide6.QtGui import QIcon
 
 from ..config import settings
+from ..enums import CircuitState, DatabaseStatus
 from .main_widget import MainWidget
 
 class MainWindow(QMainWindow):
@@ -25,12 +26,37 @@ class MainWindow(QMainWindow):
         self.main_widget = MainWidget()
         self.setCentralWidget(self.main_widget)
 
+        # Estado do banco fica fixo à direita; mensagens da Estapar à esquerda
+        self.database_status_label = QLabel()
+        self.statusBar().addPermanentWidget(self.database_status_label)
+        self.update_database_status(DatabaseStatus.CONNECTING.value)
+
     @Slot(int)
     def update_actual_valor(self, valor: int):
         """Atualiza especificamente o actual_valor na interface."""
         self.main_widget.actual_valor.setValue(valor)
         print(f"Actual valor atualizado: {valor}")
 
+    @Slot(str)
+    def update_estapar_status(self, state: str):
+        """Mostra na barra de status o estado do circuito do servidor Estapar."""
+        messages = {
+            CircuitState.CLOSED.value: "Servidor Estapar: online",
+            CircuitState.HALF_OPEN.value: "Servidor Estapar: verificando conexão...",
+            CircuitState.OPEN.value: "Servidor Estapar: indisponível",
+        }
+        self.statusBar().showMessage(messages.get(state, f"Servidor Estapar: {state}"))
+
+    @Slot(str)
+    def update_database_status(self, status: str):
+        """Mostra na barra de status o estado da conexão com o banco do PDV."""
+        messages = {
+            DatabaseStatus.CONNECTING.value: "Banco do PDV: conectando…",
+            DatabaseStatus.CONNECTED.value: "Banco do PDV: conectado",
+            DatabaseStatus.UNAVAILABLE.value: "Banco do PDV: indisponível (tentando novamente)",
+        }
+        self.database_status_label.setText(messages.get(status, f"Banco do PDV: {status}"))
+
     def closeEvent(self, event):
         event.ignore()
         self.hide()
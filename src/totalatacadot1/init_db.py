@@ -4,7 +4,7 @@ from pathlib import Path
 
 from loguru import logger
 
-from totalatacadot1.database import OracleSessionLocal
+from totalatacadot1.database import OracleSessionLocal, get_oracle_engine
 from totalatacadot1.models import PCPEDCECF
 
 # Pega o caminho absoluto da pasta 'src' e adiciona no PATH do Python
@@ -15,7 +15,7 @@ if str(src_path) not in sys.path:
 
 # Inserir dados iniciais na tabela PCPEDCECF
 def populate_pdv():
-    session_oracle = OracleSessionLocal()
+    session_oracle = OracleSessionLocal(bind=get_oracle_engine())
     try:
         # Verificar se já existem registros para evitar duplicação
         # existing_records = session_oracle.query(PCPEDCECF).first()
@@ -1,6 +1,16 @@
 from datetime import date, datetime
 
-from sqlalchemy import JSON, Boolean, Date, DateTime, Integer, Numeric, String, func
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Date,
+    DateTime,
+    Index,
+    Integer,
+    Numeric,
+    String,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from totalatacadot1.database import BaseOracle, BaseSQLite
@@ -9,6 +19,12 @@ from totalatacadot1.database import BaseOracle, BaseSQLite
 # Definição da tabela PDV
 class PCPEDCECF(BaseOracle):
     __tablename__ = "PCPEDCECF"
+    # Atende a consulta por terminal: NUMCAIXA = :caixa, DATA no intervalo do
+    # dia, ordenado/filtrado por NUMPEDECF. Em produção, criar no Oracle com:
+    # CREATE INDEX IX_PCPEDCECF_CAIXA_DATA ON PCPEDCECF (NUMCAIXA, DATA, NUMPEDECF)
+    __table_args__ = (
+        Index("IX_PCPEDCECF_CAIXA_DATA", "NUMCAIXA", "DATA", "NUMPEDECF"),
+    )
 
     num_ped_ecf: Mapped[int] = mapped_column(
         Integer, name="NUMPEDECF", primary_key=True
@@ -34,6 +50,11 @@ class PCPEDCECF(BaseOracle):
 
 class ControlPDV(BaseSQLite):
     __tablename__ = "ControlPDV"
+    # Buscas do repository: por num_ped_ecf (com ou sem data) e num_cupom + data
+    __table_args__ = (
+        Index("IX_CONTROLPDV_NUMPEDECF_DATA", "num_ped_ecf", "data"),
+        Index("IX_CONTROLPDV_NUMCUPOM_DATA", "num_cupom", "data"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     num_ped_ecf: Mapped[int] = mapped_column(Integer, nullable=False)
@@ -53,6 +74,8 @@ class ControlPDV(BaseSQLite):
 
 
 class LastAppliedDiscount(BaseSQLite):
+    # Legado: substituída por AppliedDiscount (migração v4); mantida só para
+    # que bancos antigos continuem migráveis
     __tablename__ = "LastAppliedDiscount"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, default=1)
@@ -75,8 +98,80 @@ class LastAppliedDiscount(BaseSQLite):
         )
 
 
+class AppliedDiscount(BaseSQLite):
+    """Desconto aplicado com sucesso; só recebe inserts (um por validação)."""
+
+    __tablename__ = "AppliedDiscount"
+    # Carga dos descontos do dia na inicialização e limpeza por data
+    __table_args__ = (Index("IX_APPLIEDDISCOUNT_DATA", "data"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    ticket_code: Mapped[str] = mapped_column(String(120), nullable=False)
+    num_ped_ecf: Mapped[int] = mapped_column(Integer, nullable=False)
+    num_cupom: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Em centavos: a comparação de duplicidade não depende de float
+    valor_centavos: Mapped[int] = mapped_column(Integer, nullable=False)
+    data: Mapped[date] = mapped_column(Date, nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+
+    def __repr__(self) -> str:
+        return (
+            f"AppliedDiscount(ticket_code={self.ticket_code}, "
+            f"num_ped_ecf={self.num_ped_ecf}, "
+            f"num_cupom={self.num_cupom}, "
+            f"valor_centavos={self.valor_centavos}, "
+            f"data={self.data})"
+        )
+
+
+class MirroredPdvOrder(BaseSQLite):
+    """Cópia local de um pedido do dia em PCPEDCECF (espelho incremental)."""
+
+    __tablename__ = "MirroredPdvOrder"
+    # Pedidos do dia em ordem de chave (num_ped_ecf no ATACADO, num_cupom no
+    # VAREJO), busca de cupom do dia e limpeza por data
+    __table_args__ = (
+        Index("IX_MIRROREDPDVORDER_DATA_NUMPEDECF", "data", "num_ped_ecf"),
+        Index("IX_MIRROREDPDVORDER_DATA_NUMCUPOM", "data", "num_cupom"),
+    )
+
+    num_ped_ecf: Mapped[int] = mapped_column(
+        Integer, primary_key=True, autoincrement=False
+    )
+    num_caixa: Mapped[int] = mapped_column(Integer, nullable=True)
+    num_cupom: Mapped[int] = mapped_column(Integer, nullable=True)
+    vl_total: Mapped[float] = mapped_column(Numeric(10, 2), nullable=True)
+    data: Mapped[date] = mapped_column(Date, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"MirroredPdvOrder(num_ped_ecf={self.num_ped_ecf}, "
+            f"num_caixa={self.num_caixa}, "
+            f"num_cupom={self.num_cupom}, "
+            f"vl_total={self.vl_total}, "
+            f"data={self.data})"
+        )
+
+
+class EstaparSequence(BaseSQLite):
+    """Próximo cmdSeqNo livre para a Estapar; persiste entre reinícios."""
+
+    __tablename__ = "EstaparSequence"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, default=1)
+    next_value: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+
+    def __repr__(self) -> str:
+        return f"EstaparSequence(next_value={self.next_value})"
+
+
 class NotificationModel(BaseSQLite):
     __tablename__ = "Notification"
+    # Outbox: pendente mais recente (sent, id DESC) e baixa por ticket_code
+    __table_args__ = (
+        Index("IX_NOTIFICATION_SENT_ID", "sent", "id"),
+        Index("IX_NOTIFICATION_TICKETCODE_SENT", "ticket_code", "sent"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     ticket_code: Mapped[str] = mapped_column(String(120), nullable=False)
@@ -33,8 +33,8 @@ class Notification:
             "message": self.message,
         }
 
-    def notify_discount(self):
-        """Envia uma notificação para o endpoint configurado."""
+    def notify_discount(self) -> bool:
+        """Envia uma notificação para o endpoint configurado. True se foi entregue."""
         # Converte para JSON
         try:
             notification_data = self.to_dict()
@@ -50,6 +50,7 @@ class Notification:
                 f"Notificação enviada com sucesso para {url}. Resposta: {response.status_code}"
             )
             update_notification_item_sent(self.ticket_code)
+            return True
         except requests.exceptions.Timeout:
             logger.warning("Timeout ao enviar notificação.")
         except requests.exceptions.ConnectionError:
@@ -58,3 +59,4 @@ class Notification:
             logger.error(f"Erro ao enviar notificação: {e}")
         except Exception as e:
             logger.error(f"Erro inesperado ao enviar notificação: {e}")
+        return False
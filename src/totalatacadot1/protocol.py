@@ -0,0 +1,197 @@
+"""Layout binário do protocolo Estapar (documentação Estapar, págs. 5-8).
+
+Cada bloco (cmdHeader, cmdData, rspHeader, rspData) é descrito por uma lista
+de campos e compilado uma única vez em `struct.Struct`. Cliente síncrono,
+cliente assíncrono, servidor mock e testes usam estes layouts, em vez de
+repetir strings de formato.
+
+Todo frame trafega como msgBlockSize (2 bytes, little-endian) + payload.
+"""
+
+import struct
+from dataclasses import dataclass
+from typing import Sequence, Union
+
+from loguru import logger
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+MSG_BLOCK_SIZE = struct.Struct("<H")
+
+
+def safe_decode(byte_string: Buffer, encoding="latin-1") -> str:
+    """Decodes bytes, removes null termination, and handles errors."""
+    if not isinstance(byte_string, bytes):
+        byte_string = bytes(byte_string)
+    try:
+        # Remove data after the first null byte and decode
+        return byte_string.split(b"\x00", 1)[0].decode(encoding)
+    except Exception as e:
+        logger.warning(
+            f"Failed to decode bytes with {encoding}: {e}. Bytes: {byte_string.hex()}"
+        )
+        # Fallback or return placeholder
+        return f"[Decode Error: {encoding}]"
+
+
+@dataclass(frozen=True)
+class Field:
+    """Campo do protocolo: nome da documentação e código `struct`."""
+
+    name: str
+    fmt: str
+
+
+CMD_HEADER = (
+    Field("cmdFiller", "H"),
+    Field("cmdType", "I"),
+    Field("cmdSignature", "15s"),  # CNPJ do documento fiscal
+    Field("cmdCompanySign", "16s"),
+    Field("cmdTmt", "I"),
+    Field("cmdSeqNo", "I"),
+)  # 45 bytes
+
+CMD_DATA = (
+    Field("cmdTermId", "I"),
+    Field("cmdCardId", "64s"),
+    Field("cmdOpValue", "I"),  # em centavos
+    Field("cmdOpSeqNo", "I"),
+    Field("cmdRUF_0", "I"),
+    Field("cmdRUF_1", "I"),
+    Field("cmdSaleType", "I"),
+    Field("cmdOpDisplayLen", "I"),
+    Field("cmdCustDisplayLen", "I"),
+    Field("cmdPrinterLineLen", "I"),
+)  # 100 bytes
+
+RSP_HEADER = (
+    Field("rspFiller", "H"),
+    Field("rspType", "I"),
+    Field("rspSignature", "15s"),
+    Field("rspCompanySign", "16s"),
+    Field("rspTmt", "I"),
+    Field("rspSeqNo", "I"),  # igual ao cmdSeqNo da requisição
+)  # 45 bytes
+
+RSP_DATA = (
+    Field("rspTermId", "I"),
+    Field("rspCardId", "64s"),
+    Field("rspStatus", "I"),
+    Field("rspOpDisplayTxt", "128s"),
+    Field("rspCustDisplayTxt", "128s"),
+    Field("rspPrinterLineTxt", "128s"),
+    Field("rspEntryTimeStamp", "I"),
+    Field("rspVehicleType", "H"),
+    Field("rspRUF_1", "H"),
+    Field("rspRUF_2", "I"),
+)  # 468 bytes
+
+
+class Layout:
+    """Sequência de campos compilada em `struct.Struct` (sem padding)."""
+
+    def __init__(self, name: str, fields: Sequence[Field]):
+        self.name = name
+        self.fields = tuple(fields)
+        fmt = "".join(field.fmt for field in self.fields)
+        self.struct = struct.Struct("<" + fmt)
+        # Payload precedido do msgBlockSize, empacotado numa única chamada
+        self.frame_struct = struct.Struct("<H" + fmt)
+        self.size = self.struct.size
+        self.frame_size = self.frame_struct.size
+        self._fields: dict[str, tuple[int, struct.Struct]] = {}
+        offset = 0
+        for field in self.fields:
+            field_struct = struct.Struct("<" + field.fmt)
+            self._fields[field.name] = (offset, field_struct)
+            offset += field_struct.size
+
+    def offset(self, name: str) -> int:
+        return self._fields[name][0]
+
+    def pack_frame(self, *values) -> bytes:
+        """Frame completo (msgBlockSize + payload) com os valores na ordem dos campos."""
+        return self.frame_struct.pack(self.size, *values)
+
+    def pack_frame_into(self, buffer: bytearray, offset: int, *values) -> int:
+        """Empacota o frame direto em `buffer`; retorna o número de bytes escritos."""
+        self.frame_struct.pack_into(buffer, offset, self.size, *values)
+        return self.frame_size
+
+    def unpack(self, payload: Buffer) -> tuple:
+        return self.struct.unpack_from(payload)
+
+    def view(self, payload: Buffer) -> "FrameView":
+        return FrameView(self, payload)
+
+    def read_field(self, payload: Buffer, name: str):
+        offset, field_struct = self._fields[name]
+        return field_struct.unpack_from(payload, offset)[0]
+
+    def projection(self, *names: str) -> "Projection":
+        return Projection(self, names)
+
+
+class Projection:
+    """Subconjunto de campos lido com um único `unpack_from`.
+
+    Os campos não pedidos viram bytes de padding ("x") no formato compilado,
+    então não geram nenhum objeto Python; os valores saem na ordem do layout.
+    """
+
+    def __init__(self, layout: Layout, names: Sequence[str]):
+        wanted = set(names)
+        unknown = wanted - set(layout._fields)
+        if unknown:
+            raise KeyError(f"{layout.name}: campos desconhecidos {sorted(unknown)}")
+        fmt = "<"
+        skipped = 0
+        self.names = []
+        for field in layout.fields:
+            field_size = struct.calcsize("<" + field.fmt)
+            if field.name in wanted:
+                if skipped:
+                    fmt += f"{skipped}x"
+                    skipped = 0
+                fmt += field.fmt
+                self.names.append(field.name)
+            else:
+                skipped += field_size
+        self.layout = layout
+        self.struct = struct.Struct(fmt)
+
+    def unpack(self, payload: Buffer) -> tuple:
+        if len(payload) < self.layout.size:
+            raise struct.error(
+                f"{self.layout.name}: payload de {len(payload)} bytes, esperado {self.layout.size}"
+            )
+        return self.struct.unpack_from(payload)
+
+
+class FrameView:
+    """Leitura preguiçosa dos campos de um payload, sem cópia.
+
+    Só desempacota o campo pedido; campos texto são decodificados apenas
+    quando acessados via `text()`. Para caminhos quentes que leem sempre os
+    mesmos campos, prefira `Layout.projection`.
+    """
+
+    __slots__ = ("layout", "payload")
+
+    def __init__(self, layout: Layout, payload: Buffer):
+        if len(payload) < layout.size:
+            raise struct.error(
+                f"{layout.name}: payload de {len(payload)} bytes, esperado {layout.size}"
+            )
+        self.layout = layout
+        self.payload = payload
+
+    def __getitem__(self, name: str):
+        return self.layout.read_field(self.payload, name)
+
+    def text(self, name: str, encoding="latin-1") -> str:
+        return safe_decode(self[name], encoding)
+
+
+COMMAND = Layout("command", CMD_HEADER + CMD_DATA)
+RESPONSE = Layout("response", RSP_HEADER + RSP_DATA)
@@ -1,32 +1,254 @@
 import datetime
+from concurrent.futures import Future
+from functools import cache, partial
+from operator import attrgetter
+from typing import Callable, NamedTuple
 
-from sqlalchemy import func
+from sqlalchemy import Engine, Row, Select, bindparam, delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
 
 from .config import settings
-from .database import db_oracle_context, db_sqlite_context
+from .database import SQLiteSessionLocal, db_sqlite_context, get_oracle_engine
 from .enums import StoreType
-from .models import PCPEDCECF, ControlPDV, LastAppliedDiscount, NotificationModel
+from .models import (
+    PCPEDCECF,
+    AppliedDiscount,
+    ControlPDV,
+    EstaparSequence,
+    MirroredPdvOrder,
+    NotificationModel,
+)
+from .services.sqlite_writer import SqliteWriter
 
+# Inserts do app (notificações, controles do PDV, descontos aplicados) passam
+# pela thread de escrita: quem chama recebe um Future e não espera o commit,
+# e escritas próximas no tempo dividem uma transação (um fsync)
+sqlite_writer = SqliteWriter(
+    partial(SQLiteSessionLocal, expire_on_commit=False),
+    batch_window=settings.sqlite_writer_batch_window,
+    max_batch=settings.sqlite_writer_max_batch,
+)
 
-def get_last_pdv_pedido() -> PCPEDCECF | None:
-    vl_limit = 99999999
-    today = datetime.date.today()
+
+def _add_item(item, db: Session):
+    db.add(item)
+    db.flush()  # atribui o id ainda dentro do lote
+    return item
+
+
+# cmdSeqNo é um uint32 no protocolo Estapar
+MAX_ESTAPAR_SEQUENCE = 0xFFFFFFFF
+
+
+# Pedidos com valor acima disso são ignorados (valores inválidos no PDV)
+PDV_VL_LIMIT = 99999999
+
+# Linhas por round-trip nas consultas incrementais (poucos pedidos por ciclo)
+PDV_POLL_FETCH_ROWS = 50
+
+# Colunas usadas pelos consumidores dos pedidos do PDV. As consultas devolvem
+# Rows leves (acesso por atributo: row.num_ped_ecf), sem hidratar entidades ORM.
+# Os labels são necessários: executado via Connection (Core), o select nomeia
+# as colunas pelo nome no banco (NUMPEDECF), não pelo atributo do modelo.
+_PDV_COLUMNS = tuple(
+    column.label(column.key)
+    for column in (
+        PCPEDCECF.num_ped_ecf,
+        PCPEDCECF.num_caixa,
+        PCPEDCECF.num_cupom,
+        PCPEDCECF.vl_total,
+        PCPEDCECF.data,
+    )
+)
+
+
+class _PdvStatements(NamedTuple):
+    last: Select
+    day: Select
+    after: Select
+
+
+@cache
+def _pdv_statements(
+    store_type: StoreType, num_caixa: int | None = None
+) -> _PdvStatements:
+    """Consultas de pedidos do PDV, montadas uma vez por tipo de loja e escopo.
+
+    Chave de ordem: num_cupom no VAREJO, num_ped_ecf no ATACADO. DATA é
+    filtrada pelo intervalo semiaberto [start, end), sem TRUNC, para usar índice.
+    Com `num_caixa`, NUMCAIXA = :num_caixa (já com o valor do terminal) vem
+    antes, casando com o índice (NUMCAIXA, DATA, NUMPEDECF): só as linhas do
+    próprio caixa são lidas.
+    """
     order_column = (
         PCPEDCECF.num_cupom
-        if settings.store_type == StoreType.VAREJO
+        if store_type == StoreType.VAREJO
         else PCPEDCECF.num_ped_ecf
     )
-    with db_oracle_context() as db:
-        result = (
-            db.query(PCPEDCECF)
-            .filter(PCPEDCECF.vl_total < vl_limit)
-            .filter(func.trunc(PCPEDCECF.data) == today)
-            .order_by(order_column.desc())
-            .first()
+    criteria = [
+        PCPEDCECF.data >= bindparam("start"),
+        PCPEDCECF.data < bindparam("end"),
+        PCPEDCECF.vl_total < PDV_VL_LIMIT,
+    ]
+    if num_caixa is not None:
+        criteria.insert(
+            0, PCPEDCECF.num_caixa == bindparam("num_caixa", value=num_caixa)
+        )
+    base = select(*_PDV_COLUMNS).where(*criteria)
+    poll_options = {
+        "oracle_prefetchrows": PDV_POLL_FETCH_ROWS,
+        "oracle_arraysize": PDV_POLL_FETCH_ROWS,
+    }
+    return _PdvStatements(
+        last=base.order_by(order_column.desc())
+        .limit(1)
+        .execution_options(oracle_prefetchrows=2, oracle_arraysize=2),
+        day=base.order_by(order_column.asc()).execution_options(**poll_options),
+        after=base.where(order_column > bindparam("watermark"))
+        .order_by(order_column.asc())
+        .execution_options(**poll_options),
+    )
+
+
+def pdv_order_key(store_type: StoreType) -> Callable[[Row], int]:
+    """Chave de ordem dos pedidos: num_cupom no VAREJO, num_ped_ecf no ATACADO."""
+    if store_type == StoreType.VAREJO:
+        return attrgetter("num_cupom")
+    return attrgetter("num_ped_ecf")
+
+
+def _day_range(day: datetime.date) -> dict:
+    """Intervalo semiaberto [dia, dia + 1) como parâmetros start/end.
+
+    Vão como date: no Oracle equivalem à meia-noite; no SQLite comparam
+    corretamente com DATA gravada como texto ('AAAA-MM-DD[ HH:MM:SS]').
+    """
+    return {"start": day, "end": day + datetime.timedelta(days=1)}
+
+
+def _pdv_query(day: datetime.date) -> tuple[_PdvStatements, dict]:
+    """Consultas e parâmetros para o dia, no escopo do terminal se configurado."""
+    statements = _pdv_statements(settings.store_type, settings.pdv_terminal_num_caixa)
+    return statements, _day_range(day)
+
+
+def get_last_pdv_pedido(engine: Engine | None = None) -> Row | None:
+    """Último pedido do dia. Sem `engine`, consulta o Oracle do PDV."""
+    statements, params = _pdv_query(datetime.date.today())
+    with (engine or get_oracle_engine()).connect() as conn:
+        return conn.execute(statements.last, params).first()
+
+
+def get_pdv_pedidos_after(
+    watermark: int | None, day: datetime.date, engine: Engine | None = None
+) -> list[Row]:
+    """Pedidos do dia com chave maior que `watermark`, em ordem crescente."""
+    statements, params = _pdv_query(day)
+    if watermark is None:
+        statement = statements.day
+    else:
+        statement = statements.after
+        params["watermark"] = watermark
+    with (engine or get_oracle_engine()).connect() as conn:
+        return conn.execute(statement, params).all()
+
+
+# Espelho local dos pedidos do dia: mesmas colunas e Rows que as consultas
+# do Oracle, respondidas pelo SQLite.
+_MIRROR_COLUMNS = (
+    MirroredPdvOrder.num_ped_ecf,
+    MirroredPdvOrder.num_caixa,
+    MirroredPdvOrder.num_cupom,
+    MirroredPdvOrder.vl_total,
+    MirroredPdvOrder.data,
+)
+
+
+def _mirror_order_column():
+    if settings.store_type == StoreType.VAREJO:
+        return MirroredPdvOrder.num_cupom
+    return MirroredPdvOrder.num_ped_ecf
+
+
+def save_mirrored_pdv_orders(orders: list[Row]):
+    """Grava (ou atualiza) pedidos vindos do Oracle no espelho local."""
+    if not orders:
+        return
+    values = [
+        {
+            "num_ped_ecf": order.num_ped_ecf,
+            "num_caixa": order.num_caixa,
+            "num_cupom": order.num_cupom,
+            "vl_total": order.vl_total,
+            "data": order.data.date()
+            if isinstance(order.data, datetime.datetime)
+            else order.data,
+        }
+        for order in orders
+    ]
+    statement = sqlite_insert(MirroredPdvOrder)
+    statement = statement.on_conflict_do_update(
+        index_elements=[MirroredPdvOrder.num_ped_ecf],
+        set_={
+            column: statement.excluded[column]
+            for column in ("num_caixa", "num_cupom", "vl_total", "data")
+        },
+    )
+    with db_sqlite_context() as db:
+        db.execute(statement, values)
+        db.commit()
+
+
+def get_mirrored_pdv_watermark(day: datetime.date) -> int | None:
+    with db_sqlite_context() as db:
+        return db.execute(
+            select(func.max(_mirror_order_column())).where(
+                MirroredPdvOrder.data == day
+            )
+        ).scalar()
+
+
+def get_mirrored_pdv_pedidos_after(
+    watermark: int | None, day: datetime.date
+) -> list[Row]:
+    """Como get_pdv_pedidos_after, mas lido do espelho local."""
+    order_column = _mirror_order_column()
+    query = select(*_MIRROR_COLUMNS).where(MirroredPdvOrder.data == day)
+    if watermark is not None:
+        query = query.where(order_column > watermark)
+    with db_sqlite_context() as db:
+        return db.execute(query.order_by(order_column.asc())).all()
+
+
+def get_last_mirrored_pdv_pedido() -> Row | None:
+    query = (
+        select(*_MIRROR_COLUMNS)
+        .where(MirroredPdvOrder.data == datetime.date.today())
+        .order_by(_mirror_order_column().desc())
+        .limit(1)
+    )
+    with db_sqlite_context() as db:
+        return db.execute(query).first()
+
+
+def get_mirrored_pdv_pedido_by_num_cupom(num_cupom: int) -> Row | None:
+    query = select(*_MIRROR_COLUMNS).where(
+        MirroredPdvOrder.num_cupom == num_cupom,
+        MirroredPdvOrder.data == datetime.date.today(),
+    )
+    with db_sqlite_context() as db:
+        return db.execute(query).first()
+
+
+def prune_mirrored_pdv_orders(before: datetime.date) -> int:
+    """Remove do espelho os pedidos de dias anteriores a `before`."""
+    with db_sqlite_context() as db:
+        result = db.execute(
+            delete(MirroredPdvOrder).where(MirroredPdvOrder.data < before)
         )
-        if result is not None:
-            db.expunge(result)
-        return result
+        db.commit()
+        return result.rowcount
 
 
 def get_pdv_control_item_by_num_ped_ecf(num_ped_ecf: int) -> ControlPDV | None:
@@ -68,59 +290,61 @@ def create_pdv_control_item(
     num_ped_ecf: int,
     num_cupom: int,
     data: datetime.date,
-) -> ControlPDV:
+) -> "Future[ControlPDV]":
     pdv_item = ControlPDV(num_ped_ecf=num_ped_ecf, num_cupom=num_cupom, data=data)
-    with db_sqlite_context() as db:
-        db.add(pdv_item)
-        db.commit()
-        db.refresh(pdv_item)
-        return pdv_item
+    return sqlite_writer.submit(partial(_add_item, pdv_item))
 
 
-def get_last_applied_discount() -> LastAppliedDiscount | None:
+def get_applied_discount_keys(day: datetime.date) -> list[Row]:
+    """Chaves (ticket, num_ped_ecf, num_cupom, centavos) dos descontos de `day`."""
     with db_sqlite_context() as db:
-        return db.query(LastAppliedDiscount).filter(LastAppliedDiscount.id == 1).first()
+        return db.execute(
+            select(
+                AppliedDiscount.ticket_code,
+                AppliedDiscount.num_ped_ecf,
+                AppliedDiscount.num_cupom,
+                AppliedDiscount.valor_centavos,
+            ).where(AppliedDiscount.data == day)
+        ).all()
 
 
-def upsert_last_applied_discount(
+def create_applied_discount(
     ticket_code: str,
     num_ped_ecf: int,
     num_cupom: int,
-    valor_total: float,
+    valor_centavos: int,
     data: datetime.date,
-) -> LastAppliedDiscount:
-    with db_sqlite_context() as db:
-        item = db.query(LastAppliedDiscount).filter(LastAppliedDiscount.id == 1).first()
-        if item:
-            item.ticket_code = ticket_code
-            item.num_ped_ecf = num_ped_ecf
-            item.num_cupom = num_cupom
-            item.valor_total = valor_total
-            item.data = data
-        else:
-            item = LastAppliedDiscount(
-                id=1,
-                ticket_code=ticket_code,
-                num_ped_ecf=num_ped_ecf,
-                num_cupom=num_cupom,
-                valor_total=valor_total,
-                data=data,
-            )
+) -> "Future[AppliedDiscount]":
+    item = AppliedDiscount(
+        ticket_code=ticket_code,
+        num_ped_ecf=num_ped_ecf,
+        num_cupom=num_cupom,
+        valor_centavos=valor_centavos,
+        data=data,
+    )
+    return sqlite_writer.submit(partial(_add_item, item))
+
+
+def reserve_estapar_sequence_block(size: int) -> int:
+    """Reserva `size` números de sequência consecutivos; retorna o primeiro."""
+    with db_sqlite_context() as db:
+        item = db.get(EstaparSequence, 1)
+        if item is None:
+            item = EstaparSequence(id=1, next_value=1)
             db.add(item)
+        first = item.next_value
+        if first + size - 1 > MAX_ESTAPAR_SEQUENCE:
+            first = 1
+        item.next_value = first + size
         db.commit()
-        db.refresh(item)
-        return item
+        return first
 
 
-def create_notification_item(notification_data: dict) -> NotificationModel:
+def create_notification_item(notification_data: dict) -> "Future[NotificationModel]":
     notification_item = NotificationModel(
         ticket_code=notification_data.get("ticket_code"), data=notification_data
     )
-    with db_sqlite_context() as db:
-        db.add(notification_item)
-        db.commit()
-        db.refresh(notification_item)
-        return notification_item
+    return sqlite_writer.submit(partial(_add_item, notification_item))
 
 
 def get_last_notification_not_sent() -> NotificationModel | None:
@@ -147,3 +371,89 @@ def update_notification_item_sent(ticket_code: str) -> NotificationModel | None:
             db.commit()
             db.refresh(notification_item)
     return notification_item
+
+
+# Retenção: linhas antigas saem do banco quente em lotes, como dicts de
+# colunas (prontos para o arquivo), em ordem de id.
+def _as_dict(item) -> dict:
+    return {column.key: getattr(item, column.key) for column in item.__table__.columns}
+
+
+def get_expired_notifications(cutoff: datetime.date, limit: int) -> list[dict]:
+    """Notificações já enviadas, criadas antes de `cutoff`.
+
+    created_at vem do CURRENT_TIMESTAMP do SQLite (UTC) e `cutoff` é uma data
+    local: a comparação usa a data local de criação.
+    """
+    with db_sqlite_context() as db:
+        items = (
+            db.query(NotificationModel)
+            .filter(
+                NotificationModel.sent == True,  # noqa: E712
+                func.date(NotificationModel.created_at, "localtime")
+                < cutoff.isoformat(),
+            )
+            .order_by(NotificationModel.id)
+            .limit(limit)
+            .all()
+        )
+        return [_as_dict(item) for item in items]
+
+
+def get_expired_control_items(cutoff: datetime.date, limit: int) -> list[dict]:
+    """Controles de pedidos de dias anteriores a `cutoff`."""
+    with db_sqlite_context() as db:
+        items = (
+            db.query(ControlPDV)
+            .filter(ControlPDV.data < cutoff)
+            .order_by(ControlPDV.id)
+            .limit(limit)
+            .all()
+        )
+        return [_as_dict(item) for item in items]
+
+
+def get_expired_applied_discounts(cutoff: datetime.date, limit: int) -> list[dict]:
+    """Descontos aplicados em dias anteriores a `cutoff`."""
+    with db_sqlite_context() as db:
+        items = (
+            db.query(AppliedDiscount)
+            .filter(AppliedDiscount.data < cutoff)
+            .order_by(AppliedDiscount.id)
+            .limit(limit)
+            .all()
+        )
+        return [_as_dict(item) for item in items]
+
+
+def delete_notifications(ids: list[int]) -> int:
+    with db_sqlite_context() as db:
+        result = db.execute(delete(NotificationModel).where(NotificationModel.id.in_(ids)))
+        db.commit()
+        return result.rowcount
+
+
+def delete_control_items(ids: list[int]) -> int:
+    with db_sqlite_context() as db:
+        result = db.execute(delete(ControlPDV).where(ControlPDV.id.in_(ids)))
+        db.commit()
+        return result.rowcount
+
+
+def delete_applied_discounts(ids: list[int]) -> int:
+    with db_sqlite_context() as db:
+        result = db.execute(delete(AppliedDiscount).where(AppliedDiscount.id.in_(ids)))
+        db.commit()
+        return result.rowcount
+
+
+def incremental_vacuum(pages: int) -> int:
+    """Devolve até `pages` páginas livres ao disco; retorna as que sobraram."""
+    with db_sqlite_context() as db:
+        connection = db.connection()
+        # executescript roda o PRAGMA até o fim; via execute, o sqlite3 dá um
+        # único passo e libera só uma página
+        connection.connection.driver_connection.executescript(
+            f"PRAGMA incremental_vacuum({int(pages)});"
+        )
+        return connection.exec_driver_sql("PRAGMA freelist_count").scalar()
@@ -1,9 +1,11 @@
 from dataclasses import dataclass
-import struct
 from typing import Optional
 import time
 
 from totalatacadot1.enums import CommandType, ResponseStatus
+from totalatacadot1.protocol import COMMAND
+
+_COMMAND_FRAME = COMMAND.frame_struct
 
 
 @dataclass
@@ -54,41 +56,37 @@ class DiscountRequest:
             raise ValueError("Documento fiscal inválido")
 
     def serialize(self) -> bytes:
-        """Serialização final corrigida para corresponder exatamente ao protocolo Estapar"""
-        # cmdData - Formato corrigido conforme documentação Estapar
-        cmd_data = struct.pack(
-            "<I64sIIIIIIII",
-            self.cmd_term_id,  # 4 bytes
-            self.cmd_card_id.encode("ascii").ljust(64, b"\x00"),  # 64 bytes
-            int(round(self.cmd_op_value * 100)),  # 4 bytes
-            self.cmd_op_seq_no,  # 4 bytes
-            self.cmd_ruf_0,  # 4 bytes
-            self.cmd_ruf_1,  # 4 bytes
-            self.cmd_sale_type,  # 4 bytes
-            self.cmd_op_display_len,  # 4 bytes
-            self.cmd_cust_display_len,  # 4 bytes
-            self.cmd_printer_line_len,  # 4 bytes
-        )  # 100 bytes
-
-        # cmdHeader - Formato exato conforme documentação
-        cmd_header = struct.pack(
-            "<HI15s16sII",
-            0,  # cmdFiller (2 bytes)
-            self.cmd_type.value,  # cmdType (4 bytes)
-            self.cmd_signature.encode("ascii").ljust(15, b"\x00"),  # 15 bytes
+        """Frame completo (msgBlockSize + cmdHeader + cmdData) conforme o protocolo Estapar"""
+        buffer = bytearray(COMMAND.frame_size)
+        self.serialize_into(buffer)
+        return bytes(buffer)
+
+    def serialize_into(self, buffer: bytearray, offset: int = 0) -> int:
+        """Escreve o frame direto em um buffer pré-alocado; retorna o tamanho."""
+        _COMMAND_FRAME.pack_into(
+            buffer,
+            offset,
+            COMMAND.size,  # msgBlockSize
+            # cmdHeader
+            0,  # cmdFiller
+            self.cmd_type,
+            self.cmd_signature.encode("ascii"),  # 15 bytes, completado com \x00
             self.cmd_company_sign,  # 16 bytes
-            self.cmd_tmt,  # cmdTmt (4 bytes)
-            self.cmd_seq_no,  # cmdSeqNo (4 bytes)
+            self.cmd_tmt,
+            self.cmd_seq_no,
+            # cmdData
+            self.cmd_term_id,
+            self.cmd_card_id.encode("ascii"),  # 64 bytes, completado com \x00
+            int(round(self.cmd_op_value * 100)),  # em centavos
+            self.cmd_op_seq_no,
+            self.cmd_ruf_0,
+            self.cmd_ruf_1,
+            self.cmd_sale_type,
+            self.cmd_op_display_len,
+            self.cmd_cust_display_len,
+            self.cmd_printer_line_len,
         )
-
-        # Combina header + data
-        message = cmd_header + cmd_data
-
-        # Adiciona o tamanho total no início (msgBlockSize)
-        msg_block_size = len(message)
-        full_message = struct.pack("<H", msg_block_size) + message
-
-        return full_message
+        return COMMAND.frame_size
 
 
 @dataclass
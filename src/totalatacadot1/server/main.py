@@ -1,114 +1,337 @@
+"""Servidor mock Estapar para testes locais, de carga e de resiliência.
+
+Servidor asyncio: milhares de conexões simultâneas e conexões persistentes
+(várias requisições por socket, como o modo POOLED do cliente). Falhas são
+injetadas por requisição conforme o `FaultProfile`:
+
+    python -m totalatacadot1.server.main --latency exp:0.02 \\
+        --status-mix 0=90,1=4,2=3,invalid_card_type=3 \\
+        --fragment 0.1 --drip 0.02 --disconnect 0.01
+"""
+
+import argparse
+import asyncio
+import random
 import socket
-import struct
+import sys
 import time
+from dataclasses import dataclass, field
+from typing import Optional
 
 from loguru import logger
 from dotenv import load_dotenv
 
+from totalatacadot1.protocol import COMMAND, MSG_BLOCK_SIZE, RESPONSE
+
 load_dotenv()
 IP = "127.0.0.1"
 PORT = 33535
 
+# Chave da mistura de status para o caso especial do cliente: status 7 com
+# "Tipo de cartao invalido" na linha de impressão.
+INVALID_CARD_TYPE = "invalid_card_type"
+
+# Textos devolvidos por status (documentação Estapar, pág. 8)
+STATUS_TEXTS = {
+    0x00000000: "Cartao validado ate {now}",
+    0x00000001: "Cartao nao validado",
+    0x00000002: "Cartao ja validado",
+    0x00000003: "Valor da compra insuficiente",
+    0x00000004: "Cartao invalido",
+    0x00000005: "Comando invalido",
+    0x00000006: "Operacao invalida",
+    0x00000007: "Terminal nao cadastrado",
+    0x00000008: "Tempo de desconto excedido",
+}
+
+
+@dataclass
+class LatencyDistribution:
+    """Atraso (segundos) antes de cada resposta.
+
+    kind: "fixed" (a), "uniform" (a..b), "exp" (média a) ou
+    "lognormal" (mediana a, sigma b).
+    """
+
+    kind: str = "fixed"
+    a: float = 0.0
+    b: float = 0.0
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """Formato "tipo:a[,b]", ex.: "uniform:0.005,0.05"."""
+        kind, _, params = spec.partition(":")
+        values = [float(v) for v in params.split(",") if v] if params else []
+        if kind not in ("fixed", "uniform", "exp", "lognormal") or not values:
+            raise ValueError(f"Distribuição de latência inválida: {spec!r}")
+        return cls(kind, values[0], values[1] if len(values) > 1 else 0.0)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "uniform":
+            return rng.uniform(self.a, self.b)
+        if self.kind == "exp":
+            return rng.expovariate(1 / self.a) if self.a > 0 else 0.0
+        if self.kind == "lognormal":
+            return self.a * rng.lognormvariate(0, self.b)
+        return self.a
 
-def msg_process(mensagem):
-    """Processa a mensagem recebida e retorna uma resposta simulada."""
-    try:
-        # Extraindo cmdType (4 bytes little-endian, começando no byte 4)
-        cmdType = struct.unpack("<I", mensagem[4:8])[0]
 
-        # Lendo o código do cartão (64 bytes, a partir do byte 25)
-        # Remove padding e decodifica como ASCII
-        card_id = mensagem[25:89].split(b"\x00")[0].decode("ascii")
+def parse_status_mix(spec: str) -> dict:
+    """Formato "status=peso,...", ex.: "0=90,1=5,invalid_card_type=5"."""
+    mix = {}
+    for item in spec.split(","):
+        key, _, weight = item.strip().partition("=")
+        if key != INVALID_CARD_TYPE:
+            key = int(key, 0)
+            if key not in STATUS_TEXTS:
+                raise ValueError(f"Status desconhecido na mistura: {item!r}")
+        mix[key] = float(weight or 1)
+    return mix
 
-        logger.info(f"Recebido comando: {hex(cmdType)} para cartão {card_id}")
+
+@dataclass
+class FaultProfile:
+    """Falhas injetadas por requisição (probabilidades entre 0 e 1)."""
+
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    status_mix: dict = field(default_factory=lambda: {0x00000000: 1.0})
+    fragment: float = 0.0  # resposta em pedaços aleatórios
+    drip: float = 0.0  # resposta byte a byte
+    drip_delay: float = 0.001  # pausa entre bytes no drip
+    disconnect: float = 0.0  # fecha a conexão sem responder ou no meio da resposta
+    keep_alive: bool = True  # False fecha a conexão após cada resposta
+
+    def choose_status(self, rng: random.Random):
+        keys = list(self.status_mix)
+        return rng.choices(keys, weights=[self.status_mix[k] for k in keys])[0]
+
+
+@dataclass
+class ServerStats:
+    connections: int = 0
+    active_connections: int = 0
+    peak_connections: int = 0
+    requests: int = 0
+    responses: int = 0
+    disconnects: int = 0
+    fragmented: int = 0
+    dripped: int = 0
+    by_status: dict = field(default_factory=dict)
+
+
+def msg_process(mensagem, status: int = 0x00000000, status_msg: Optional[str] = None):
+    """Processa o payload recebido (sem o msgBlockSize) e retorna o frame de resposta."""
+    try:
+        comando = COMMAND.view(mensagem)
+        cmdType = comando["cmdType"]
+        card_id = comando.text("cmdCardId", "ascii")
+
+        logger.debug(f"Recebido comando: {hex(cmdType)} para cartão {card_id}")
 
         # Definição do tipo de resposta
         if cmdType == 0x0000000F:  # cmdConsult
             rspType = 0x0001000F
-            status = 0x00000000  # Cartão validado
-            status_msg = f"Cartao validado ate {time.strftime('%d/%m/%Y - %H:%M')}"
         elif cmdType == 0x00000010:  # cmdValidation
             rspType = 0x00010010
-            status = 0x00000000  # Cartão validado
-            status_msg = f"Cartao validado ate {time.strftime('%d/%m/%Y - %H:%M')}"
         else:
             return None  # Comando desconhecido
 
-        # Criando a resposta no formato esperado
-        rspTmt = int(time.time())  # Timestamp
-        rspSeqNo = struct.unpack("<I", mensagem[28:32])[
-            0
-        ]  # Pega o cmdSeqNo da mensagem original
-
-        resposta = struct.pack(
-            "<HHI15s16sIII64sI128s128s128sIHHI",
-            513,  # Tamanho do payload da resposta (513 bytes)
+        if status_msg is None:
+            status_msg = STATUS_TEXTS[status].format(
+                now=time.strftime("%d/%m/%Y - %H:%M")
+            )
+        status_msg_b = status_msg.encode("ascii")
+        return RESPONSE.pack_frame(
             0,  # rspFiller
             rspType,  # Tipo de resposta
-            b"04558054000173".ljust(15, b"\x00"),  # Assinatura da empresa
+            b"04558054000173",  # Assinatura da empresa
             b"ESTAPAR".ljust(15, b" ") + b"\x00",  # Nome da empresa (16 bytes total)
-            rspTmt,  # Timestamp da resposta
-            rspSeqNo,  # Número sequencial (mesmo da requisição)
-            0,  # rspTermId (Novo campo adicionado para alinhar)
-            card_id.encode("ascii").ljust(64, b"\x00"),  # Código do cartão
+            int(time.time()),  # Timestamp da resposta
+            comando["cmdSeqNo"],  # Número sequencial (mesmo da requisição)
+            comando["cmdTermId"],  # rspTermId
+            card_id.encode("ascii"),  # Código do cartão
             status,  # Status da operação
-            status_msg.encode("ascii").ljust(128, b"\x00"),  # Mensagem para operador
-            status_msg.encode("ascii").ljust(128, b"\x00"),  # Mensagem para cliente
-            status_msg.encode("ascii").ljust(128, b"\x00"),  # Mensagem para impressão
+            status_msg_b,  # Mensagem para operador
+            status_msg_b,  # Mensagem para cliente
+            status_msg_b,  # Mensagem para impressão
             int(time.time()) - 3600,  # Data de entrada (1 hora atrás)
             0x0002,  # Tipo de veículo (Carro)
             0x0000,  # Reservado (rspRUF_1)
             0x00000000,  # Reservado (rspRUF_2)
         )
 
-        return resposta
-
     except Exception as e:
         logger.error(f"Erro ao processar mensagem: {e}")
         return None
 
 
-def start_server():
-    """Inicia o servidor e aguarda conexões."""
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
-        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        server.bind((IP, PORT))
-        server.listen(5)
-        logger.info(f"Servidor escutando em {IP}:{PORT}")
+class MockEstaparServer:
+    """Servidor asyncio que responde frames Estapar com falhas injetadas."""
+
+    def __init__(
+        self,
+        host: str = IP,
+        port: int = PORT,
+        profile: Optional[FaultProfile] = None,
+        seed: Optional[int] = None,
+        backlog: int = 4096,
+    ):
+        self.host = host
+        self.port = port
+        self.profile = profile or FaultProfile()
+        self.backlog = backlog
+        self.stats = ServerStats()
+        self._rng = random.Random(seed)
+        self._server: Optional[asyncio.Server] = None
+
+    async def start(self) -> int:
+        """Começa a escutar; retorna a porta efetiva (útil com port=0)."""
+        self._server = await asyncio.start_server(
+            self._handle, self.host, self.port, backlog=self.backlog
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Servidor escutando em {self.host}:{self.port}")
+        return self.port
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
 
-        while True:
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        stats = self.stats
+        stats.connections += 1
+        stats.active_connections += 1
+        stats.peak_connections = max(stats.peak_connections, stats.active_connections)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            while True:
+                try:
+                    size = await reader.readexactly(MSG_BLOCK_SIZE.size)
+                    message = await reader.readexactly(MSG_BLOCK_SIZE.unpack(size)[0])
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                stats.requests += 1
+                try:
+                    if not await self._respond(message, writer):
+                        return
+                except (ConnectionResetError, BrokenPipeError):
+                    return  # o cliente desistiu antes da resposta
+                if not self.profile.keep_alive:
+                    return
+        finally:
+            stats.active_connections -= 1
+            writer.close()
             try:
-                conn, addr = server.accept()
-                logger.info(f"Conexão estabelecida de {addr}")
-                with conn:
-                    # Lendo os primeiros 2 bytes para saber o tamanho da mensagem
-                    tamanho = conn.recv(2)
-                    if not tamanho:
-                        continue
-
-                    msg_size = struct.unpack("<H", tamanho)[0]
-
-                    # Lendo o restante da mensagem
-                    mensagem = b""
-                    while len(mensagem) < msg_size:
-                        chunk = conn.recv(msg_size - len(mensagem))
-                        if not chunk:
-                            break
-                        mensagem += chunk
-
-                    if len(mensagem) == msg_size:
-                        # Processa a mensagem recebida e gera uma resposta
-                        resposta = msg_process(tamanho + mensagem)
-
-                        if resposta:
-                            conn.sendall(resposta)
-                            logger.info("Resposta enviada!")
-                    else:
-                        logger.warning(f"Mensagem incompleta recebida de {addr}")
-
-            except Exception as e:
-                logger.error(f"Erro na conexão: {e}")
-                continue
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, message: bytes, writer: asyncio.StreamWriter) -> bool:
+        """Envia a resposta de uma requisição; False se a conexão foi derrubada."""
+        profile, rng = self.profile, self._rng
+        delay = profile.latency.sample(rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        status = profile.choose_status(rng)
+        if status == INVALID_CARD_TYPE:
+            frame = msg_process(message, 0x00000007, "Tipo de cartao invalido")
+        else:
+            frame = msg_process(message, status)
+        if frame is None:
+            return False
+        self.stats.by_status[str(status)] = self.stats.by_status.get(str(status), 0) + 1
+
+        if rng.random() < profile.disconnect:
+            # Metade das vezes sem responder, metade no meio da resposta
+            self.stats.disconnects += 1
+            if rng.random() < 0.5:
+                writer.write(frame[: rng.randrange(1, len(frame))])
+                await writer.drain()
+            writer.transport.abort()
+            return False
+
+        if rng.random() < profile.drip:
+            self.stats.dripped += 1
+            for i in range(len(frame)):
+                writer.write(frame[i : i + 1])
+                await writer.drain()
+                await asyncio.sleep(profile.drip_delay)
+        elif rng.random() < profile.fragment:
+            self.stats.fragmented += 1
+            offset = 0
+            while offset < len(frame):
+                chunk = rng.randint(1, 64)
+                writer.write(frame[offset : offset + chunk])
+                await writer.drain()
+                await asyncio.sleep(0)
+                offset += chunk
+        else:
+            writer.write(frame)
+            await writer.drain()
+        self.stats.responses += 1
+        return True
+
+
+async def _report_stats(server: MockEstaparServer, interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        logger.info(f"Estatísticas do mock: {server.stats}")
+
+
+async def _main(args: argparse.Namespace):
+    # Log por requisição (DEBUG) domina o custo do servidor sob carga
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+    profile = FaultProfile(
+        latency=LatencyDistribution.parse(args.latency),
+        status_mix=parse_status_mix(args.status_mix),
+        fragment=args.fragment,
+        drip=args.drip,
+        drip_delay=args.drip_delay,
+        disconnect=args.disconnect,
+        keep_alive=not args.one_shot,
+    )
+    server = MockEstaparServer(args.host, args.port, profile, args.seed, args.backlog)
+    await server.start()
+    if args.stats_interval > 0:
+        asyncio.create_task(_report_stats(server, args.stats_interval))
+    await server.serve_forever()
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Servidor mock Estapar")
+    parser.add_argument("--host", default=IP)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--latency", default="fixed:0", help="fixed:a | uniform:a,b | exp:media | lognormal:mediana,sigma")
+    parser.add_argument("--status-mix", default="0=1", help=f"status=peso,... (status em decimal/hex ou {INVALID_CARD_TYPE})")
+    parser.add_argument("--fragment", type=float, default=0.0, help="probabilidade de resposta fragmentada")
+    parser.add_argument("--drip", type=float, default=0.0, help="probabilidade de resposta byte a byte")
+    parser.add_argument("--drip-delay", type=float, default=0.001)
+    parser.add_argument("--disconnect", type=float, default=0.0, help="probabilidade de derrubar a conexão")
+    parser.add_argument("--one-shot", action="store_true", help="fecha a conexão após cada resposta")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--backlog", type=int, default=4096)
+    parser.add_argument("--stats-interval", type=float, default=10.0)
+    parser.add_argument("--log-level", default="INFO")
+    return parser.parse_args(argv)
+
+
+def start_server(argv=None):
+    """Inicia o servidor e aguarda conexões."""
+    try:
+        asyncio.run(_main(parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
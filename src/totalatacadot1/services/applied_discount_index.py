@@ -0,0 +1,121 @@
+import datetime
+import threading
+from concurrent.futures import Future
+from decimal import ROUND_HALF_UP, Decimal
+from functools import partial
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from loguru import logger
+
+
+class DiscountKey(NamedTuple):
+    """Identifica um desconto aplicado; o valor vai em centavos."""
+
+    ticket_code: str
+    num_ped_ecf: int
+    num_cupom: int
+    valor_centavos: int
+
+
+def to_cents(value) -> int:
+    """Valor monetário (float, str, Decimal) em centavos, arredondado."""
+    cents = Decimal(str(value)) * 100
+    return int(cents.quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def discount_key(ticket_code, num_ped_ecf, num_cupom, valor) -> DiscountKey:
+    return DiscountKey(
+        str(ticket_code).strip(), int(num_ped_ecf), int(num_cupom), to_cents(valor)
+    )
+
+
+def request_discount_key(request) -> Optional[DiscountKey]:
+    """Chave de uma DiscountRequest, ou None se ainda não tem cmdSeqNo.
+
+    Na validação manual o cmdSeqNo só é atribuído pelo serviço Estapar no
+    envio: antes disso não há num_ped_ecf para checar (a validação manual não é
+    bloqueada) e, depois do envio, a chave usa o número atribuído, que é único
+    por envio.
+    """
+    if not request.cmd_seq_no:
+        return None
+    return discount_key(
+        request.cmd_card_id,
+        request.cmd_seq_no,
+        request.cmd_op_seq_no,
+        request.cmd_op_value,
+    )
+
+
+class AppliedDiscountIndex:
+    """Descontos aplicados no dia, em memória, para bloquear relançamentos.
+
+    `load()` (chamado na inicialização) e a primeira consulta de cada dia
+    (re)carregam o índice com `loader(day)`, que devolve as chaves (tuplas na
+    ordem de DiscountKey) já gravadas no SQLite para aquela data; a virada do
+    dia descarta as do dia anterior. `add()` grava a chave com
+    `persist(*key, day)` (insert simples; no app, só enfileirado na thread de
+    escrita) e a inclui no conjunto: a checagem de duplicidade vira uma busca
+    num set e cobre todos os descontos do dia, não só o último. Se `persist`
+    devolver um Future e a gravação falhar, o erro é registrado e a chave sai
+    do conjunto, para a memória não divergir do banco.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[datetime.date], Iterable[tuple]],
+        persist: Callable[[str, int, int, int, datetime.date], object],
+        today: Callable[[], datetime.date] = datetime.date.today,
+    ):
+        self.loader = loader
+        self.persist = persist
+        self.today = today
+        self._lock = threading.Lock()
+        self._keys: set[DiscountKey] = set()
+        self._day: Optional[datetime.date] = None
+
+    def _load(self, day: datetime.date):
+        self._keys = {DiscountKey(*row) for row in self.loader(day)}
+        self._day = day
+
+    def _current(self) -> set[DiscountKey]:
+        day = self.today()
+        if self._day != day:
+            self._load(day)
+        return self._keys
+
+    def load(self) -> int:
+        """Carrega do banco os descontos de hoje; devolve quantos são."""
+        with self._lock:
+            self._load(self.today())
+            return len(self._keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._current())
+
+    def contains(self, key: DiscountKey) -> bool:
+        with self._lock:
+            return key in self._current()
+
+    def add(self, key: DiscountKey):
+        """Registra um desconto aplicado hoje."""
+        with self._lock:
+            keys = self._current()
+            if key in keys:
+                return
+            day = self._day
+            result = self.persist(*key, day)
+            keys.add(key)
+        if isinstance(result, Future):
+            # Fora do lock: se já terminou, o callback roda aqui mesmo
+            result.add_done_callback(partial(self._persisted, key, day))
+
+    def _persisted(self, key: DiscountKey, day: datetime.date, future: Future):
+        error = future.exception()
+        if error is None:
+            return
+        logger.error(f"Desconto aplicado não foi gravado ({key}): {error}")
+        with self._lock:
+            if self._day == day:
+                self._keys.discard(key)
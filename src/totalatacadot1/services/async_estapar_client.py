@@ -0,0 +1,211 @@
+import asyncio
+import socket
+import traceback
+from typing import Iterable, Optional
+
+from loguru import logger
+
+from totalatacadot1.protocol import MSG_BLOCK_SIZE, RESPONSE
+from totalatacadot1.schemas import DiscountRequest, ResponseReturn
+from totalatacadot1.services.estapar_integration_service import (
+    EstaparIntegrationService,
+)
+
+
+class AsyncEstaparClient:
+    """Cliente asyncio da API Estapar com requisições em pipeline.
+
+    Várias requisições podem estar em voo na mesma conexão; cada resposta é
+    entregue a quem a aguarda pelo rspSeqNo, que o servidor devolve igual ao
+    cmdSeqNo enviado. Cada requisição tem seu próprio prazo.
+    """
+
+    CONNECTION_TIMEOUT = EstaparIntegrationService.CONNECTION_TIMEOUT
+    DEFAULT_TIMEOUT = EstaparIntegrationService.DEFAULT_TIMEOUT
+    MAX_IN_FLIGHT = 32
+
+    def __init__(self, ip: str, port: int, max_in_flight: int = MAX_IN_FLIGHT):
+        if not ip or not isinstance(port, int):
+            raise ValueError("IP e porta do servidor devem ser configurados")
+        self.server_ip = ip
+        self.server_port = port
+        self.sequence_number = 0
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: dict[int, asyncio.Future] = {}
+        self._connect_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+
+    async def __aenter__(self) -> "AsyncEstaparClient":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    def _get_next_sequence_number(self) -> int:
+        """Próximo número de sequência que não esteja em voo."""
+        self.sequence_number = (self.sequence_number % 0xFFFFFFFF) + 1
+        while self.sequence_number in self._pending:
+            self.sequence_number = (self.sequence_number % 0xFFFFFFFF) + 1
+        return self.sequence_number
+
+    async def create_discount(
+        self, request_data: DiscountRequest, timeout: Optional[float] = None
+    ) -> ResponseReturn:
+        """Envia uma requisição de desconto e aguarda a resposta correspondente.
+
+        `timeout` é o prazo total da requisição (fila, conexão, envio e
+        resposta); o padrão é DEFAULT_TIMEOUT.
+        """
+        if request_data.cmd_seq_no == 0:
+            request_data.cmd_seq_no = self._get_next_sequence_number()
+        seq_no = request_data.cmd_seq_no
+        if seq_no in self._pending:
+            error_msg = f"Já existe uma requisição em andamento com a sequência {seq_no}."
+            logger.error(error_msg)
+            return ResponseReturn(False, error_msg)
+
+        logger.info(
+            f"Enviando requisição de desconto para {self.server_ip}:{self.server_port} (Seq: {seq_no})"
+        )
+        logger.debug(f"Requisição: {request_data}")
+
+        try:
+            async with asyncio.timeout(timeout or self.DEFAULT_TIMEOUT):
+                response_payload = await self._send_request(request_data)
+
+        except TimeoutError:
+            error_msg = "Timeout na comunicação com o servidor."
+            logger.error(f"{error_msg} (Seq: {seq_no})")
+            return ResponseReturn(False, error_msg)
+
+        except ConnectionRefusedError:
+            error_msg = "Conexão recusada pelo servidor."
+            logger.error(error_msg)
+            return ResponseReturn(False, error_msg)
+
+        except socket.gaierror:
+            error_msg = "Não foi possível resolver o endereço do servidor"
+            logger.error(error_msg)
+            return ResponseReturn(False, error_msg)
+
+        except ConnectionError as ex:
+            error_msg = f"Conexão com o servidor perdida: {str(ex)}"
+            logger.error(error_msg)
+            return ResponseReturn(False, error_msg)
+
+        except Exception as ex:
+            error_msg = f"Erro inesperado durante a integração: {str(ex)}"
+            logger.error(f"{error_msg}\n{traceback.format_exc()}")
+            return ResponseReturn(False, error_msg)
+
+        EstaparIntegrationService._log_message(
+            response_payload, "Payload da resposta recebida"
+        )
+        return EstaparIntegrationService._parse_response(response_payload, seq_no)
+
+    async def create_discounts(
+        self, requests: Iterable[DiscountRequest], timeout: Optional[float] = None
+    ) -> list[ResponseReturn]:
+        """Envia várias requisições em pipeline; resultados na ordem de entrada."""
+        return list(
+            await asyncio.gather(
+                *(self.create_discount(request, timeout) for request in requests)
+            )
+        )
+
+    async def close(self):
+        """Fecha a conexão e falha as requisições ainda pendentes."""
+        writer, self._writer = self._writer, None
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        self._fail_pending(ConnectionError("Cliente encerrado"))
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            logger.debug("Conexão assíncrona fechada.")
+
+    async def _send_request(self, request_data: DiscountRequest) -> bytes:
+        seq_no = request_data.cmd_seq_no
+        async with self._in_flight:
+            await self._ensure_connected()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[seq_no] = future
+            try:
+                message = request_data.serialize()
+                EstaparIntegrationService._log_message(message, "Enviando requisição")
+                async with self._write_lock:
+                    self._writer.write(message)
+                    await self._writer.drain()
+                return await future
+            finally:
+                self._pending.pop(seq_no, None)
+
+    async def _ensure_connected(self):
+        async with self._connect_lock:
+            if self.connected:
+                return
+            logger.info(f"Conectando a {self.server_ip}:{self.server_port}")
+            async with asyncio.timeout(self.CONNECTION_TIMEOUT):
+                self._reader, self._writer = await asyncio.open_connection(
+                    self.server_ip, self.server_port
+                )
+            sock = self._writer.get_extra_info("socket")
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._reader_task = asyncio.create_task(self._read_loop(self._reader))
+            logger.success("Conexão estabelecida com sucesso")
+
+    async def _read_loop(self, reader: asyncio.StreamReader):
+        """Lê frames continuamente e os entrega às requisições pendentes."""
+        try:
+            while True:
+                size_data = await reader.readexactly(MSG_BLOCK_SIZE.size)
+                msg_payload_size = MSG_BLOCK_SIZE.unpack(size_data)[0]
+                response_payload = await reader.readexactly(msg_payload_size)
+                self._dispatch(response_payload)
+        except asyncio.IncompleteReadError:
+            self._fail_pending(ConnectionError("Conexão fechada pelo servidor"))
+        except (ConnectionError, OSError) as e:
+            self._fail_pending(ConnectionError(str(e)))
+        finally:
+            if self._reader is reader and self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+    def _dispatch(self, response_payload: bytes):
+        if len(response_payload) != RESPONSE.size:
+            logger.error(
+                f"Tamanho incorreto do payload da resposta ({len(response_payload)} bytes). Descartada."
+            )
+            return
+        rsp_seq_no = RESPONSE.read_field(response_payload, "rspSeqNo")
+        future = self._pending.get(rsp_seq_no)
+        if future is None and len(self._pending) == 1:
+            # Servidor que não ecoa o cmdSeqNo: com uma única requisição em voo
+            # a resposta só pode ser dela (mesmo comportamento do cliente síncrono).
+            (expected_seq_no, future), = self._pending.items()
+            logger.warning(
+                f"Número de sequência da resposta ({rsp_seq_no}) não corresponde ao esperado ({expected_seq_no})!"
+            )
+        if future is None or future.done():
+            logger.warning(
+                f"Resposta com sequência {rsp_seq_no} sem requisição pendente (expirada?). Descartada."
+            )
+            return
+        future.set_result(response_payload)
+
+    def _fail_pending(self, exc: Exception):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(exc)
@@ -0,0 +1,144 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from loguru import logger
+
+from totalatacadot1.enums import CircuitState
+
+StateListener = Callable[[CircuitState], None]
+
+
+class CircuitBreaker:
+    """Circuit breaker para o servidor Estapar.
+
+    CLOSED: requisições passam; falhas de transporte consecutivas (ou
+    timeouts consecutivos, com limite próprio e menor) abrem o circuito.
+    OPEN: requisições falham na hora, sem tocar a rede. Após `reset_timeout`
+    uma sonda em background (`probe`) testa o servidor em HALF_OPEN; se
+    responder, o circuito fecha, senão volta a OPEN por mais um período.
+    Sem sonda configurada, a primeira requisição após o período é a tentativa.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        timeout_threshold: int = 2,
+        reset_timeout: float = 30.0,
+        probe: Optional[Callable[[], bool]] = None,
+    ):
+        self.failure_threshold = failure_threshold
+        self.timeout_threshold = timeout_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.consecutive_timeouts = 0
+        self.opened_at: Optional[float] = None
+        self._listeners: list[StateListener] = []
+        self._lock = threading.Lock()
+        self._probe_timer: Optional[threading.Timer] = None
+
+    def add_listener(self, listener: StateListener):
+        """Registra um callback chamado (fora do lock) a cada mudança de estado."""
+        self._listeners.append(listener)
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self.state == CircuitState.CLOSED:
+                return True
+            if (
+                self.state == CircuitState.OPEN
+                and self.probe is None
+                and time.monotonic() - self.opened_at >= self.reset_timeout
+            ):
+                changed = self._set_state(CircuitState.HALF_OPEN)
+            else:
+                return False
+        self._notify(changed)
+        return True
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.consecutive_timeouts = 0
+            changed = self._set_state(CircuitState.CLOSED)
+        self._notify(changed)
+
+    def record_failure(self, timeout: bool = False):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.consecutive_timeouts = self.consecutive_timeouts + 1 if timeout else 0
+            should_open = (
+                self.state == CircuitState.HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+                or self.consecutive_timeouts >= self.timeout_threshold
+            )
+            changed = self._open() if should_open else None
+        self._notify(changed)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state.value,
+                "consecutive_failures": self.consecutive_failures,
+                "consecutive_timeouts": self.consecutive_timeouts,
+                "opened_for": (
+                    time.monotonic() - self.opened_at if self.opened_at else None
+                ),
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._probe_timer is not None:
+                self._probe_timer.cancel()
+                self._probe_timer = None
+
+    def _open(self) -> Optional[CircuitState]:
+        self.opened_at = time.monotonic()
+        changed = self._set_state(CircuitState.OPEN)
+        if self.probe is not None:
+            if self._probe_timer is not None:
+                self._probe_timer.cancel()
+            self._probe_timer = threading.Timer(self.reset_timeout, self._run_probe)
+            self._probe_timer.daemon = True
+            self._probe_timer.start()
+        return changed
+
+    def _run_probe(self):
+        with self._lock:
+            self._probe_timer = None
+            if self.state != CircuitState.OPEN:
+                return
+            changed = self._set_state(CircuitState.HALF_OPEN)
+        self._notify(changed)
+        logger.info("Circuito Estapar: testando o servidor (sonda CONSULT).")
+        try:
+            healthy = self.probe()
+        except Exception as e:
+            logger.warning(f"Erro na sonda do circuito Estapar: {e}")
+            healthy = False
+        if healthy:
+            self.record_success()
+        else:
+            self.record_failure()
+
+    def _set_state(self, state: CircuitState) -> Optional[CircuitState]:
+        """Muda o estado (com o lock adquirido); retorna o novo estado se mudou."""
+        if self.state == state:
+            return None
+        previous, self.state = self.state, state
+        if state == CircuitState.CLOSED:
+            self.opened_at = None
+        log = logger.warning if state == CircuitState.OPEN else logger.info
+        log(f"Circuito Estapar: {previous.value} -> {state.value}")
+        return state
+
+    def _notify(self, changed: Optional[CircuitState]):
+        if changed is None:
+            return
+        for listener in self._listeners:
+            try:
+                listener(changed)
+            except Exception as e:
+                logger.error(f"Erro ao notificar mudança do circuito Estapar: {e}")
@@ -0,0 +1,125 @@
+import errno
+import os
+import selectors
+import socket
+import time
+from typing import Sequence, Tuple
+
+from loguru import logger
+
+from totalatacadot1.services.connection_pool import EstaparConnection
+from totalatacadot1.services.endpoint import EstaparEndpoint
+
+# connect() não bloqueante em andamento (POSIX / Windows)
+_IN_PROGRESS = {
+    errno.EINPROGRESS,
+    errno.EWOULDBLOCK,
+    errno.EAGAIN,
+    getattr(errno, "WSAEWOULDBLOCK", 10035),
+}
+_REFUSED = {errno.ECONNREFUSED, getattr(errno, "WSAECONNREFUSED", 10061)}
+
+
+def _connect_error(code: int) -> OSError:
+    if code in _REFUSED:
+        return ConnectionRefusedError(code, os.strerror(errno.ECONNREFUSED))
+    return OSError(code, os.strerror(code))
+
+
+def race_connect(
+    endpoints: Sequence[EstaparEndpoint], stagger: float
+) -> Tuple[EstaparEndpoint, EstaparConnection]:
+    """Conecta ao primeiro endpoint que aceitar ("happy eyeballs", RFC 8305).
+
+    A tentativa ao primeiro endpoint começa na hora; a seguinte começa após
+    `stagger` segundos sem resposta, ou imediatamente se a anterior falhar.
+    Cada tentativa tem o prazo adaptativo do próprio endpoint. A primeira
+    conexão estabelecida vence e as demais são abandonadas.
+
+    Se todas falharem, levanta socket.timeout quando todas expiraram, senão o
+    primeiro erro na ordem dos endpoints (ex.: ConnectionRefusedError).
+    """
+    pending = list(endpoints)
+    errors: dict[int, BaseException] = {}
+    selector = selectors.DefaultSelector()
+    # socket -> (índice, endpoint, sockaddr, início, prazo)
+    attempts: dict[socket.socket, tuple] = {}
+    next_start = time.monotonic()
+    index = 0
+    try:
+        while pending or attempts:
+            now = time.monotonic()
+            if pending and (now >= next_start or not attempts):
+                endpoint = pending.pop(0)
+                try:
+                    sock, sockaddr = endpoint.pool.open_socket()
+                except OSError as e:  # inclui socket.gaierror
+                    errors[index] = e
+                    index += 1
+                    continue
+                sock.setblocking(False)
+                logger.info(f"Conectando a {endpoint.label}")
+                code = sock.connect_ex(sockaddr)
+                if code == 0:
+                    sock.setblocking(True)
+                    endpoint.connect_rtt.observe(time.monotonic() - now)
+                    return endpoint, endpoint.pool.adopt(sock, sockaddr)
+                if code not in _IN_PROGRESS:
+                    sock.close()
+                    endpoint.pool.invalidate_address()
+                    errors[index] = _connect_error(code)
+                    index += 1
+                    continue
+                attempts[sock] = (
+                    index,
+                    endpoint,
+                    sockaddr,
+                    now,
+                    now + endpoint.connect_timeout(),
+                )
+                selector.register(sock, selectors.EVENT_WRITE)
+                next_start = now + stagger
+                index += 1
+                continue
+
+            wait = min(attempt[4] for attempt in attempts.values()) - now
+            if pending:
+                wait = min(wait, next_start - now)
+            for key, _ in selector.select(max(wait, 0)):
+                sock = key.fileobj
+                idx, endpoint, sockaddr, started, _ = attempts.pop(sock)
+                selector.unregister(sock)
+                code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if code == 0:
+                    sock.setblocking(True)
+                    endpoint.connect_rtt.observe(time.monotonic() - started)
+                    return endpoint, endpoint.pool.adopt(sock, sockaddr)
+                logger.warning(f"Falha ao conectar a {endpoint.label}: {os.strerror(code)}")
+                sock.close()
+                endpoint.pool.invalidate_address()
+                errors[idx] = _connect_error(code)
+                next_start = time.monotonic()  # não espera o stagger
+
+            now = time.monotonic()
+            for sock, (idx, endpoint, _, _, deadline) in list(attempts.items()):
+                if now < deadline:
+                    continue
+                logger.warning(f"Timeout ao conectar a {endpoint.label}")
+                del attempts[sock]
+                selector.unregister(sock)
+                sock.close()
+                endpoint.pool.invalidate_address()
+                endpoint.connect_rtt.on_timeout()
+                errors[idx] = socket.timeout("timed out")
+                next_start = now
+    finally:
+        for sock in attempts:
+            selector.unregister(sock)
+            sock.close()
+        selector.close()
+
+    failures = [errors[i] for i in sorted(errors)]
+    for error in failures:
+        if not isinstance(error, socket.timeout):
+            raise error
+    raise socket.timeout("timed out")
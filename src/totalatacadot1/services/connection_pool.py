@@ -0,0 +1,235 @@
+import select
+import socket
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Optional, Tuple
+
+from loguru import logger
+
+from totalatacadot1.protocol import COMMAND, RESPONSE
+
+# Parâmetros de keepalive TCP (segundos): começa a sondar após KEEPALIVE_IDLE
+# sem tráfego e repete a cada KEEPALIVE_INTERVAL.
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+
+
+@dataclass
+class PoolStats:
+    """Contadores do pool, expostos para diagnóstico."""
+
+    connections_opened: int = 0
+    connections_reused: int = 0
+    connections_closed: int = 0
+    address_resolutions: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class EstaparConnection:
+    """Socket TCP conectado ao servidor Estapar e seus metadados de uso."""
+
+    def __init__(self, sock: socket.socket, address: Tuple):
+        self.sock = sock
+        self.address = address
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.requests_served = 0
+        self.closed = False
+        # Reaproveitados a cada requisição feita por esta conexão
+        self.send_buffer = bytearray(COMMAND.frame_size)
+        self.recv_buffer = bytearray(RESPONSE.frame_size)
+
+    def is_healthy(self) -> bool:
+        """Verifica, sem bloquear, se o peer não fechou a conexão ociosa.
+
+        Uma conexão ociosa saudável não tem nada para ler. Se o socket está
+        legível, ou o servidor fechou (recv devolve b"") ou há bytes
+        inesperados pendentes; em ambos os casos a conexão é descartada.
+        """
+        if self.closed:
+            return False
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+            if not readable:
+                return True
+            self.sock.recv(1, socket.MSG_PEEK)
+        except (OSError, ValueError):
+            pass
+        return False
+
+    def ensure_recv_capacity(self, size: int):
+        """Aumenta o buffer de recepção se um frame não couber nele."""
+        if len(self.recv_buffer) < size:
+            self.recv_buffer = bytearray(size)
+
+    def recv_exact_into(
+        self, offset: int, size: int, deadline: Optional[float] = None
+    ) -> int:
+        """Lê exatamente `size` bytes em recv_buffer[offset:] com recv_into.
+
+        Trata leituras parciais; retorna menos que `size` apenas se o peer
+        fechar a conexão antes. Com `deadline` (time.monotonic), o prazo vale
+        para a leitura toda e não para cada recv, levantando socket.timeout.
+        """
+        view = memoryview(self.recv_buffer)[offset : offset + size]
+        received = 0
+        while received < size:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    view.release()
+                    raise socket.timeout("timed out")
+                self.sock.settimeout(remaining)
+            count = self.sock.recv_into(view[received:])
+            if count == 0:
+                break
+            received += count
+        view.release()
+        return received
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.close()
+            logger.debug("Socket fechado.")
+        except Exception as e:
+            logger.warning(f"Erro ao fechar o socket: {e}")
+
+
+class EstaparConnectionPool:
+    """Pool de conexões keep-alive para um endpoint Estapar.
+
+    Também é a fábrica de conexões do endpoint: guarda o endereço já resolvido
+    (evitando repetir o getaddrinfo a cada validação) e aplica TCP_NODELAY e
+    keepalive em todo socket criado, inclusive no modo ONE_SHOT.
+    """
+
+    def __init__(self, host: str, port: int, max_size: int, idle_timeout: float):
+        self.host = host
+        self.port = port
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.stats = PoolStats()
+        self._idle: deque[EstaparConnection] = deque()
+        self._lock = threading.Lock()
+        self._resolved: Optional[Tuple[int, Tuple]] = None
+
+    def resolve(self) -> Tuple[int, Tuple]:
+        """Retorna (família, sockaddr) do endpoint, resolvendo apenas uma vez."""
+        resolved = self._resolved
+        if resolved is None:
+            # Pode levantar socket.gaierror, tratado pelo serviço.
+            family, _, _, _, sockaddr = socket.getaddrinfo(
+                self.host, self.port, type=socket.SOCK_STREAM
+            )[0]
+            resolved = (family, sockaddr)
+            self._resolved = resolved
+            self.stats.address_resolutions += 1
+            logger.debug(f"Endereço resolvido para {self.host}:{self.port}: {sockaddr}")
+        return resolved
+
+    def invalidate_address(self):
+        """Força nova resolução na próxima conexão (ex.: após falha de conexão)."""
+        self._resolved = None
+
+    def open_socket(self) -> Tuple[socket.socket, Tuple]:
+        """Cria um socket já configurado (ainda não conectado) e o sockaddr alvo."""
+        family, sockaddr = self.resolve()
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            self._configure_socket(sock)
+        except BaseException:
+            sock.close()
+            raise
+        return sock, sockaddr
+
+    def connect(self, timeout: float) -> EstaparConnection:
+        """Abre uma nova conexão com o endpoint."""
+        sock, sockaddr = self.open_socket()
+        try:
+            sock.settimeout(timeout)
+            logger.info(f"Conectando a {self.host}:{self.port}")
+            sock.connect(sockaddr)
+        except BaseException:
+            sock.close()
+            self.invalidate_address()
+            raise
+        return self.adopt(sock, sockaddr)
+
+    def adopt(self, sock: socket.socket, sockaddr: Tuple) -> EstaparConnection:
+        """Registra um socket conectado por fora (ex.: corrida de conexões)."""
+        logger.success(f"Conexão estabelecida com {self.host}:{self.port}")
+        self.stats.connections_opened += 1
+        return EstaparConnection(sock, sockaddr)
+
+    def acquire_idle(self) -> Optional[EstaparConnection]:
+        """Retira do pool a conexão ociosa mais recente que ainda esteja saudável."""
+        now = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                conn = self._idle.pop()
+            if now - conn.last_used > self.idle_timeout:
+                logger.debug("Conexão ociosa expirada descartada.")
+                self._discard(conn)
+                continue
+            if not conn.is_healthy():
+                logger.debug("Conexão ociosa fechada pelo servidor descartada.")
+                self._discard(conn)
+                continue
+            self.stats.connections_reused += 1
+            return conn
+
+    def release(self, conn: EstaparConnection):
+        """Devolve a conexão ao pool, ou fecha se o pool estiver cheio."""
+        if conn.closed:
+            return
+        conn.last_used = time.monotonic()
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append(conn)
+                return
+        self._discard(conn)
+
+    def discard(self, conn: EstaparConnection):
+        """Fecha uma conexão que não pode voltar ao pool."""
+        self._discard(conn)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._discard(conn)
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle)
+
+    def _discard(self, conn: EstaparConnection):
+        if not conn.closed:
+            conn.close()
+        self.stats.connections_closed += 1
+
+    @staticmethod
+    def _configure_socket(sock: socket.socket):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        if hasattr(socket, "TCP_KEEPIDLE"):  # Linux
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE)
+            sock.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL
+            )
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_COUNT)
+        elif hasattr(socket, "SIO_KEEPALIVE_VALS"):  # Windows
+            sock.ioctl(
+                socket.SIO_KEEPALIVE_VALS,
+                (1, KEEPALIVE_IDLE * 1000, KEEPALIVE_INTERVAL * 1000),
+            )
@@ -0,0 +1,69 @@
+from dataclasses import dataclass, field
+
+from totalatacadot1.services.connection_pool import EstaparConnectionPool
+from totalatacadot1.services.rtt_estimator import RttEstimator
+
+
+@dataclass
+class TimeoutLimits:
+    """Prazos (segundos) de conexão e de resposta do servidor Estapar.
+
+    Só a conexão é adaptativa (RTT medido, limitado a [piso, teto]). A resposta
+    usa prazo fixo: um timeout após o envio de um VALIDATE deixa em dúvida se o
+    desconto foi aplicado, então um servidor que costuma ser rápido não pode
+    encurtar esse prazo.
+    """
+
+    connect_floor: float = 0.3
+    connect_ceiling: float = 3.0
+    read_timeout: float = 10.0
+
+
+@dataclass
+class EstaparEndpoint:
+    """Estado mantido por servidor Estapar: pool de conexões e estimativas de RTT."""
+
+    host: str
+    port: int
+    pool: EstaparConnectionPool
+    connect_rtt: RttEstimator
+    response_rtt: RttEstimator
+    response_timeout: float
+    label: str = field(init=False)
+
+    def __post_init__(self):
+        self.label = f"{self.host}:{self.port}"
+
+    @classmethod
+    def create(
+        cls,
+        host: str,
+        port: int,
+        pool_size: int,
+        pool_idle_timeout: float,
+        limits: TimeoutLimits,
+    ) -> "EstaparEndpoint":
+        return cls(
+            host=host,
+            port=port,
+            pool=EstaparConnectionPool(host, port, pool_size, pool_idle_timeout),
+            connect_rtt=RttEstimator(limits.connect_floor, limits.connect_ceiling),
+            # Tempo de resposta só medido (diagnóstico); o prazo é fixo
+            response_rtt=RttEstimator(limits.read_timeout, limits.read_timeout),
+            response_timeout=limits.read_timeout,
+        )
+
+    def connect_timeout(self) -> float:
+        return self.connect_rtt.timeout()
+
+    def read_timeout(self) -> float:
+        return self.response_timeout
+
+    def diagnostics(self) -> dict:
+        return {
+            "endpoint": self.label,
+            "connect": self.connect_rtt.snapshot(),
+            "response": self.response_rtt.snapshot(),
+            "pool": self.pool.stats.to_dict(),
+            "idle_connections": self.pool.idle_count(),
+        }
@@ -2,61 +2,57 @@
 
 import socket
 import struct
-from typing import Optional, Tuple
+import threading
+import time
+from typing import Callable, Optional, Sequence, Tuple
 from loguru import logger
 import traceback
 
 # from totalatacadot1.enums import ResponseStatus # Assuming VehicleType enum exists
-from totalatacadot1.enums import ResponseStatus, VehicleType
+from totalatacadot1.enums import (
+    CommandType,
+    EstaparConnectionMode,
+    ResponseStatus,
+    VehicleType,
+)
+from totalatacadot1.protocol import MSG_BLOCK_SIZE, RESPONSE, safe_decode
 from totalatacadot1.schemas import DiscountRequest, DiscountResponse, ResponseReturn
+from totalatacadot1.services.circuit_breaker import CircuitBreaker
+from totalatacadot1.services.connect_race import race_connect
+from totalatacadot1.services.connection_pool import EstaparConnection
+from totalatacadot1.services.endpoint import EstaparEndpoint, TimeoutLimits
 
 
-# Helper function to decode bytes safely
-def safe_decode(byte_string: bytes, encoding="latin-1") -> str:
-    """Decodes bytes, removes null termination, and handles errors."""
-    try:
-        # Remove data after the first null byte and decode
-        return byte_string.split(b"\x00", 1)[0].decode(encoding)
-    except Exception as e:
-        logger.warning(
-            f"Failed to decode bytes with {encoding}: {e}. Bytes: {byte_string.hex()}"
-        )
-        # Fallback or return placeholder
-        return f"[Decode Error: {encoding}]"
+# Campos da resposta lidos pelo parser, na ordem do layout
+_RESPONSE_FIELDS = RESPONSE.projection(
+    "rspSeqNo",
+    "rspStatus",
+    "rspPrinterLineTxt",
+    "rspEntryTimeStamp",
+    "rspVehicleType",
+)
+
+
+class _PeerClosedError(ConnectionError):
+    """O servidor fechou a conexão antes de enviar qualquer byte da resposta."""
+
+
+class _IncompleteResponseError(Exception):
+    """A resposta não pôde ser lida por completo (erro já logado)."""
 
 
 class EstaparIntegrationService:
     """Serviço de integração com a API da Estapar"""
 
+    # Teto do prazo de conexão adaptativo e prazo fixo de resposta (ver TimeoutLimits)
     CONNECTION_TIMEOUT = 3 # seconds
     DEFAULT_TIMEOUT = 10  # segundos
     BUFFER_SIZE = 4096
 
-    # Header: 2(Filler)+4(Type)+15(Sig)+16(CompSign)+4(Tmt)+4(SeqNo) = 45 bytes
-    # Data:   4(TermId)+64(CardId)+4(Status)+128(OpDisp)+128(CustDisp)+128(PrintLine)+4(EntryTS)+2(VehType)+2(RUF1)+4(RUF2) = 566 bytes
-    # Total Expected Payload = 45 + 566 = 611 bytes
-    EXPECTED_RESPONSE_PAYLOAD_SIZE = 611
-    RESPONSE_FORMAT = (
-        "<"  # Little-endian
-        # rspHeader (45 bytes)
-        "H"  # rspFiller (2 bytes, unsigned short) - Ignored
-        "I"  # rspType (4 bytes, unsigned int)
-        "15s"  # rspSignature (15 bytes, string)
-        "16s"  # rspCompanySign (16 bytes, string)
-        "I"  # rspTmt (4 bytes, unsigned int) - Timestamp
-        "I"  # rspSeqNo (4 bytes, unsigned int) - Sequence number matched
-        # rspData (566 bytes)
-        "I"  # rspTermld (4 bytes, unsigned int)
-        "64s"  # rspCardld (64 bytes, string)
-        "I"  # rspStatus (4 bytes, unsigned int) <-- *** IMPORTANT ***
-        "128s"  # rspOpDisplayTxt (128 bytes, string)
-        "128s"  # rspCustDisplayTxt (128 bytes, string)
-        "128s"  # rspPrinterLineTxt (128 bytes, string)
-        "I"  # rspEntryTimeStamp (4 bytes, unsigned int)
-        "H"  # rspVehicleType (2 bytes, unsigned short)
-        "H"  # rspRUF_1 (2 bytes, unsigned short) - Reserved
-        "I"  # rspRUF_2 (4 bytes, unsigned int) - Reserved
-    )
+    # rspHeader (45 bytes) + rspData (468 bytes) = 513 bytes, ver protocol.RESPONSE
+    EXPECTED_RESPONSE_PAYLOAD_SIZE = RESPONSE.size
+
+    SEQUENCE_BLOCK_SIZE = 100  # números reservados por escrita no armazenamento
 
     # Mapeamento baseado na documentação (pág 8)
     _STATUS_MAPPING = {
@@ -71,15 +67,67 @@ class EstaparIntegrationService:
         0x00000008: (ResponseStatus.DISCOUNT_TIME_EXCEEDED, "Tempo de desconto excedido", False),
     }
 
-    def __init__(self, ip: str, port: int):
+    def __init__(
+        self,
+        ip: str,
+        port: int,
+        connection_mode: EstaparConnectionMode = EstaparConnectionMode.ONE_SHOT,
+        pool_size: int = 2,
+        pool_idle_timeout: float = 60.0,
+        timeout_limits: Optional[TimeoutLimits] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        backup_endpoints: Sequence[Tuple[str, int]] = (),
+        connect_stagger: float = 0.25,
+        sequence_provider: Optional[Callable[[int], int]] = None,
+    ):
         self.server_ip = ip
         self.server_port = port
-        # Sequence number management should ideally persist across connections
-        # if the protocol requires it per terminal session, not per socket connection.
-        # For simplicity here, we reset on init. A more robust implementation
-        # might need external state management.
+        self.connection_mode = connection_mode
+        # cmdSeqNo das requisições sem número próprio. Com sequence_provider
+        # (reserva persistente de blocos), a sequência continua entre
+        # reinícios; sem ele, recomeça do zero a cada instância.
+        self.sequence_provider = sequence_provider
         self.sequence_number = 0
+        self._sequence_limit = 0
+        self._sequence_lock = threading.Lock()
         self._validate_connection_params()
+        limits = timeout_limits or TimeoutLimits(
+            connect_ceiling=self.CONNECTION_TIMEOUT,
+            read_timeout=self.DEFAULT_TIMEOUT,
+        )
+        # Primário primeiro, depois os reservas na ordem configurada. No modo
+        # ONE_SHOT o pool não guarda conexões, mas ainda é a fábrica de
+        # sockets de cada endpoint (endereço resolvido em cache e opções TCP).
+        self.endpoints = [
+            EstaparEndpoint.create(host, endpoint_port, pool_size, pool_idle_timeout, limits)
+            for host, endpoint_port in [(ip, port), *backup_endpoints]
+        ]
+        self.connect_stagger = connect_stagger
+        # Índice do último endpoint que aceitou conexão: preferido nas próximas
+        self._preferred = 0
+        self.circuit_breaker = circuit_breaker
+
+    @property
+    def endpoint(self) -> EstaparEndpoint:
+        """Endpoint preferido no momento (o último que respondeu bem)."""
+        return self.endpoints[self._preferred]
+
+    def _endpoints_by_preference(self) -> list[EstaparEndpoint]:
+        preferred = self.endpoint
+        return [preferred] + [e for e in self.endpoints if e is not preferred]
+
+    def _prefer(self, endpoint: EstaparEndpoint):
+        index = self.endpoints.index(endpoint)
+        if index != self._preferred:
+            logger.info(
+                f"Endpoint Estapar preferido: {self.endpoint.label} -> {endpoint.label}"
+            )
+            self._preferred = index
+
+    def _demote(self, endpoint: EstaparEndpoint):
+        """Após falha no endpoint preferido, passa a preferência ao próximo."""
+        if len(self.endpoints) > 1 and endpoint is self.endpoint:
+            self._prefer(self.endpoints[(self._preferred + 1) % len(self.endpoints)])
 
     def _validate_connection_params(self):
         """Valida os parâmetros de conexão"""
@@ -87,17 +135,39 @@ class EstaparIntegrationService:
             raise ValueError("IP e porta do servidor devem ser configurados")
 
     def _get_next_sequence_number(self) -> int:
-        """Gera o próximo número de sequência para uma nova requisição."""
-        # Note: Behavior might depend on whether sequence resets per connection or per session.
-        # Assuming it increments per request within this service instance.
-        self.sequence_number += 1
-        return self.sequence_number
+        """Gera o próximo número de sequência para uma nova requisição.
+
+        Os números vêm de blocos reservados no sequence_provider: só há escrita
+        no armazenamento a cada SEQUENCE_BLOCK_SIZE requisições. Números de um
+        bloco não usado até o fim são descartados no reinício, nunca repetidos.
+        """
+        with self._sequence_lock:
+            if (
+                self.sequence_provider is not None
+                and self.sequence_number >= self._sequence_limit
+            ):
+                try:
+                    first = self.sequence_provider(self.SEQUENCE_BLOCK_SIZE)
+                    self.sequence_number = first - 1
+                    self._sequence_limit = first - 1 + self.SEQUENCE_BLOCK_SIZE
+                except Exception as e:
+                    logger.error(f"Erro ao reservar números de sequência: {e}")
+            self.sequence_number += 1
+            return self.sequence_number
 
     def create_discount(self, request_data: DiscountRequest) -> ResponseReturn:
         """
         Envia uma requisição de desconto para a API da Estapar
         e processa a resposta
         """
+        # Circuito antes da sequência: uma recusa imediata não consome cmdSeqNo
+        # (nem adianta o fim do bloco reservado)
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            error_msg = "Servidor Estapar indisponível no momento. Tente novamente em instantes."
+            logger.warning(f"{error_msg} (circuito aberto)")
+            return ResponseReturn(False, error_msg)
+
         if request_data.cmd_seq_no == 0:
             # Assign the next sequence number to the request before serializing
             request_data.cmd_seq_no = self._get_next_sequence_number()
@@ -107,47 +177,28 @@ class EstaparIntegrationService:
         )
         logger.debug(f"Requisição: {request_data}")  # repr should be fine
 
-        sock = None  # Define sock outside try for finally block
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            timeout = self.CONNECTION_TIMEOUT
-            sock.settimeout(timeout)
-
-            # Conecta ao servidor
-            self._connect(sock)
-            logger.debug(f"Conectado ao servidor {self.server_ip}:{self.server_port}")
-
-            # Serializa e envia a mensagem
-            message = request_data.serialize()
-            self._log_message(message, "Enviando requisição")
-            timeout = self.DEFAULT_TIMEOUT
-            sock.settimeout(timeout) # Set timeout for sending
-            sock.sendall(message)
-
-            # Lê e processa a resposta completa (header + data)
-            response_payload = self._read_response_payload(sock)
-            if response_payload is None:
-                # Error already logged in _read_response_payload
-                return ResponseReturn(
-                    False,
-                    "Não foi possível ler a resposta completa do servidor (timeout ou erro)",
-                )
-
-            # Log the raw response payload before parsing
-            self._log_message(response_payload, "Payload da resposta recebida")
-
-            return self._parse_response(response_payload, request_data.cmd_seq_no)
+            result = self._send_request(request_data)
 
         except socket.timeout:
             error_msg = f"Timeout na comunicação com o servidor."
             logger.error(error_msg)
+            self._record_failure(timeout=True)
             return ResponseReturn(False, error_msg)
 
+        except _IncompleteResponseError:
+            self._record_failure()
+            return ResponseReturn(
+                False,
+                "Não foi possível ler a resposta completa do servidor (timeout ou erro)",
+            )
+
         except ConnectionRefusedError:
             error_msg = (
                 "Conexão recusada pelo servidor."
             )
             logger.error(error_msg)
+            self._record_failure()
             return ResponseReturn(False, error_msg)
 
         except socket.gaierror:  # getaddrinfo error (DNS lookup failure)
@@ -155,37 +206,180 @@ class EstaparIntegrationService:
                 "Não foi possível resolver o endereço do servidor"
             )
             logger.error(error_msg)
+            self._record_failure()
             return ResponseReturn(False, error_msg)
 
         except Exception as ex:
             error_msg = f"Erro inesperado durante a integração: {str(ex)}"
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
+            self._record_failure()
             return ResponseReturn(False, error_msg)
-        finally:
-            if sock:
-                try:
-                    sock.close()
-                    logger.debug("Socket fechado.")
-                except Exception as e:
-                    logger.warning(f"Erro ao fechar o socket: {e}")
 
-    def _connect(self, sock: socket.socket):
-        """Estabelece conexão com o servidor"""
-        logger.info(f"Conectando a {self.server_ip}:{self.server_port}")
-        sock.connect((self.server_ip, self.server_port))
-        logger.success("Conexão estabelecida com sucesso")
+        # O servidor respondeu: o transporte está saudável, qualquer que seja o status
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+    def probe(self) -> bool:
+        """Envia um CONSULT de verificação, sem passar pelo circuit breaker.
+
+        Retorna True se o servidor respondeu, qualquer que seja o status.
+        """
+        request = DiscountRequest(
+            cmd_term_id=0,
+            cmd_card_id="PROBE",
+            cmd_op_value=0,
+            cmd_type=CommandType.CONSULT,
+            cmd_seq_no=self._get_next_sequence_number(),
+        )
+        try:
+            self._send_request(request)
+            return True
+        except Exception as e:
+            logger.debug(f"Sonda Estapar sem resposta: {e}")
+            return False
+
+    def _record_failure(self, timeout: bool = False):
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_failure(timeout=timeout)
+
+    def close(self):
+        """Fecha as conexões ociosas mantidas pelos pools."""
+        for endpoint in self.endpoints:
+            endpoint.pool.close_all()
+
+    def diagnostics(self) -> dict:
+        """Estado das estimativas de RTT, prazos atuais e contadores do pool."""
+        return {
+            "connection_mode": self.connection_mode.value,
+            "circuit_breaker": (
+                self.circuit_breaker.snapshot() if self.circuit_breaker else None
+            ),
+            "preferred_endpoint": self.endpoint.label,
+            "endpoints": [endpoint.diagnostics() for endpoint in self.endpoints],
+        }
+
+    def _send_request(self, request_data: DiscountRequest) -> ResponseReturn:
+        """Envia o frame por uma conexão (nova ou do pool) e interpreta a resposta."""
+        # Sem reenvio: uma conexão reutilizada só é entregue depois de passar
+        # pela checagem de saúde do pool (antes de qualquer byte ser enviado).
+        # Se ela cair depois do envio, o servidor pode já ter processado o
+        # VALIDATE, e reenviar com o mesmo cmdSeqNo arriscaria um desconto
+        # duplicado: o erro sobe para quem chamou.
+        endpoint, conn = self._acquire_connection()
+        try:
+            response_payload = self._exchange(endpoint, conn, request_data)
+        except _PeerClosedError:
+            endpoint.pool.discard(conn)
+            self._demote(endpoint)
+            raise _IncompleteResponseError() from None
+        except BaseException:
+            endpoint.pool.discard(conn)
+            self._demote(endpoint)
+            raise
+
+        if response_payload is None:
+            # Error already logged in _read_response_payload
+            endpoint.pool.discard(conn)
+            self._demote(endpoint)
+            raise _IncompleteResponseError()
+
+        # Log the raw response payload before parsing
+        self._log_message(response_payload, "Payload da resposta recebida")
+
+        # O payload aponta para o buffer da conexão: interpreta antes de
+        # devolvê-la ao pool, onde outra requisição poderia sobrescrevê-lo.
+        result = self._parse_response(response_payload, request_data.cmd_seq_no)
+        response_payload.release()
+
+        conn.requests_served += 1
+        if self.connection_mode == EstaparConnectionMode.POOLED:
+            endpoint.pool.release(conn)
+        else:
+            endpoint.pool.discard(conn)
+        return result
+
+    def _acquire_connection(self) -> Tuple[EstaparEndpoint, EstaparConnection]:
+        """Retorna (endpoint, conexão) conforme o modo de conexão."""
+        if self.connection_mode == EstaparConnectionMode.POOLED:
+            for endpoint in self._endpoints_by_preference():
+                conn = endpoint.pool.acquire_idle()
+                if conn is not None:
+                    logger.debug(f"Reutilizando conexão com {endpoint.label}")
+                    return endpoint, conn
+        endpoint, conn = self._connect()
+        logger.debug(f"Conectado ao servidor {endpoint.label}")
+        return endpoint, conn
+
+    def _connect(self) -> Tuple[EstaparEndpoint, EstaparConnection]:
+        """Abre uma conexão nova com o prazo derivado do RTT de conexão.
+
+        Com endpoints reservas configurados, dispara as tentativas em corrida
+        escalonada a partir do preferido e fica com a primeira que conectar.
+        """
+        if len(self.endpoints) > 1:
+            endpoint, conn = race_connect(
+                self._endpoints_by_preference(), self.connect_stagger
+            )
+            self._prefer(endpoint)
+            return endpoint, conn
 
-    def _read_response_payload(self, sock: socket.socket) -> Optional[bytes]:
-        """Lê o payload completo (rspHeader + rspData) da resposta do servidor."""
+        endpoint = self.endpoint
+        started = time.monotonic()
         try:
-            # 1. Ler os primeiros 2 bytes (msgBlockSize)
-            size_data = sock.recv(2)
-            if not size_data or len(size_data) < 2:
+            conn = endpoint.pool.connect(endpoint.connect_timeout())
+        except socket.timeout:
+            endpoint.connect_rtt.on_timeout()
+            raise
+        endpoint.connect_rtt.observe(time.monotonic() - started)
+        return endpoint, conn
+
+    def _exchange(
+        self,
+        endpoint: EstaparEndpoint,
+        conn: EstaparConnection,
+        request_data: DiscountRequest,
+    ) -> Optional[memoryview]:
+        """Envia a requisição e lê a resposta completa (header + data)."""
+        # Serializa direto no buffer de envio da conexão, sem alocar o frame
+        size = request_data.serialize_into(conn.send_buffer)
+        message = memoryview(conn.send_buffer)[:size]
+        self._log_message(message, "Enviando requisição")
+
+        # Prazo total (envio + resposta) fixo; o RTT só é registrado
+        started = time.monotonic()
+        deadline = started + endpoint.read_timeout()
+        try:
+            conn.sock.settimeout(endpoint.read_timeout())  # Set timeout for sending
+            conn.sock.sendall(message)
+            response_payload = self._read_response_payload(conn, deadline)
+        except socket.timeout:
+            endpoint.response_rtt.on_timeout()
+            raise
+        if response_payload is not None:
+            endpoint.response_rtt.observe(time.monotonic() - started)
+        return response_payload
+
+    def _read_response_payload(
+        self, conn: EstaparConnection, deadline: Optional[float] = None
+    ) -> Optional[memoryview]:
+        """Lê o payload completo (rspHeader + rspData) da resposta do servidor.
+
+        A leitura usa recv_into no buffer de recepção da conexão; o retorno é
+        uma memoryview desse buffer, válida até a próxima leitura na conexão.
+        """
+        try:
+            # 1. Ler os primeiros 2 bytes (msgBlockSize), mesmo que cheguem separados
+            prefix_size = MSG_BLOCK_SIZE.size
+            received = conn.recv_exact_into(0, prefix_size, deadline)
+            if received == 0:
+                raise _PeerClosedError()
+            if received < prefix_size:
                 logger.error(
                     "Não foi possível ler o tamanho da mensagem (conexão fechada ou vazia)."
                 )
                 return None
-            msg_payload_size = struct.unpack("<H", size_data)[0]
+            msg_payload_size = MSG_BLOCK_SIZE.unpack_from(conn.recv_buffer)[0]
             logger.debug(
                 f"Tamanho do payload da resposta esperado (msgBlockSize): {msg_payload_size} bytes."
             )
@@ -193,7 +387,7 @@ class EstaparIntegrationService:
             # Validação básica do tamanho esperado (sanity check)
             if msg_payload_size == 0:
                 logger.warning("Servidor respondeu com tamanho de payload zero.")
-                return b""  # Return empty bytes for zero size
+                return memoryview(b"")  # Return empty payload for zero size
             if (
                 msg_payload_size > self.BUFFER_SIZE * 10
             ):  # Arbitrary limit to prevent huge allocations
@@ -208,36 +402,28 @@ class EstaparIntegrationService:
                 )
 
             # 2. Ler o restante da mensagem (o payload real: rspHeader + rspData)
-            received_payload = bytearray()
-            bytes_to_read = msg_payload_size
-            while len(received_payload) < bytes_to_read:
-                remaining = bytes_to_read - len(received_payload)
-                chunk = sock.recv(min(self.BUFFER_SIZE, remaining))
-                if not chunk:
-                    logger.error(
-                        f"Conexão fechada inesperadamente ao ler payload. Recebido {len(received_payload)} de {bytes_to_read} bytes."
-                    )
-                    return None  # Connection closed before full message received
-                received_payload.extend(chunk)
-
-            if len(received_payload) != bytes_to_read:
+            frame_size = prefix_size + msg_payload_size
+            conn.ensure_recv_capacity(frame_size)
+            received = conn.recv_exact_into(prefix_size, msg_payload_size, deadline)
+            if received < msg_payload_size:
                 logger.error(
-                    f"Inconsistência na leitura. Esperado {bytes_to_read} bytes, recebido {len(received_payload)}."
-                )
-                return (
-                    None  # Should not happen with the loop logic, but defensive check
+                    f"Conexão fechada inesperadamente ao ler payload. Recebido {received} de {msg_payload_size} bytes."
                 )
+                return None  # Connection closed before full message received
 
-            logger.debug(
-                f"Payload completo da resposta lido ({len(received_payload)} bytes)."
-            )
-            return bytes(received_payload)
+            logger.debug(f"Payload completo da resposta lido ({received} bytes).")
+            return memoryview(conn.recv_buffer)[prefix_size:frame_size]
 
+        except _PeerClosedError:
+            logger.error(
+                "Não foi possível ler o tamanho da mensagem (conexão fechada ou vazia)."
+            )
+            raise
         except socket.timeout:
             logger.error(
                 "Timeout ao ler resposta do servidor."
             )
-            return None
+            raise
         except struct.error as e:
             logger.error(f"Erro de struct ao desempacotar tamanho da mensagem: {e}")
             return None
@@ -247,53 +433,43 @@ class EstaparIntegrationService:
             )
             return None
 
+    @classmethod
     def _parse_response(
-        self, response_payload: bytes, expected_seq_no: int
+        cls, response_payload: bytes | memoryview, expected_seq_no: int
     ) -> ResponseReturn:
         """Interpreta o payload da resposta binária do servidor."""
         logger.debug(f"Iniciando parse do payload de {len(response_payload)} bytes.")
 
         # 1. Validar o tamanho do payload recebido contra o formato esperado
-        try:
-            expected_size = struct.calcsize(self.RESPONSE_FORMAT)
-            if len(response_payload) != expected_size:
-                logger.error(
-                    f"Tamanho incorreto do payload da resposta! Recebido: {len(response_payload)}, Esperado: {expected_size}. Parse abortado."
-                )
-                self._log_message(
-                    response_payload, "Payload da resposta com tamanho incorreto"
-                )
-                return ResponseReturn(
-                    False,
-                    f"Erro de protocolo: Tamanho da resposta inválido ({len(response_payload)} bytes)",
-                )
+        if len(response_payload) != RESPONSE.size:
+            logger.error(
+                f"Tamanho incorreto do payload da resposta! Recebido: {len(response_payload)}, Esperado: {RESPONSE.size}. Parse abortado."
+            )
+            cls._log_message(
+                response_payload, "Payload da resposta com tamanho incorreto"
+            )
+            return ResponseReturn(
+                False,
+                f"Erro de protocolo: Tamanho da resposta inválido ({len(response_payload)} bytes)",
+            )
 
-            # 2. Desempacotar a resposta usando o formato definido
-            unpacked_data = struct.unpack(self.RESPONSE_FORMAT, response_payload)
+        # 2. Desempacotar apenas os campos usados (demais viram padding)
+        try:
+            (
+                rsp_seq_no, rsp_status_code, rsp_printer_line_txt_b,
+                rsp_entry_timestamp, rsp_vehicle_type_code,
+            ) = _RESPONSE_FIELDS.unpack(response_payload)
 
         except struct.error as e:
             error_msg = f"Erro ao desempacotar resposta binária: {e}. Payload recebido pode estar malformado."
             logger.error(error_msg)
-            self._log_message(
+            cls._log_message(
                 response_payload, "Payload da resposta que causou erro de struct"
             )
             return ResponseReturn(False, error_msg)
 
-        # 3. Mapear os dados desempacotados para variáveis nomeadas
         try:
-            (
-                rsp_type, rsp_signature_b, rsp_company_sign_b, rsp_tmt, rsp_seq_no,
-                rsp_term_id, rsp_card_id_b, rsp_status_code,
-                rsp_op_display_txt_b, rsp_cust_display_txt_b, rsp_printer_line_txt_b,
-                rsp_entry_timestamp, rsp_vehicle_type_code, _, _
-            ) = (
-                unpacked_data[1], unpacked_data[2], unpacked_data[3], unpacked_data[4], unpacked_data[5],
-                unpacked_data[6], unpacked_data[7], unpacked_data[8],
-                unpacked_data[9], unpacked_data[10], unpacked_data[11],
-                unpacked_data[12], unpacked_data[13], unpacked_data[14], unpacked_data[15]
-            )
-
-            # 4. Decodificar campos de string (bytes -> str) com segurança
+            # 3. Decodificar o único campo texto exibido ao operador
             rsp_printer_line_txt = safe_decode(rsp_printer_line_txt_b)
 
             # 5. Logar os valores parseados para depuração
@@ -312,8 +488,8 @@ class EstaparIntegrationService:
             message = f"Status desconhecido: {rsp_status_code}"
             response_status_enum = ResponseStatus.UNKNOWN
 
-            if rsp_status_code in self._STATUS_MAPPING:
-                response_status_enum, message, success = self._STATUS_MAPPING[rsp_status_code]
+            if rsp_status_code in cls._STATUS_MAPPING:
+                response_status_enum, message, success = cls._STATUS_MAPPING[rsp_status_code]
             
             # Tratar caso especial de código 0x00000007 com mensagem específica
             if rsp_status_code == 0x00000007 and "Tipo de cartao invalido" in rsp_printer_line_txt:
@@ -347,13 +523,14 @@ class EstaparIntegrationService:
         except Exception as ex:
             error_msg = f"Erro inesperado durante o parse da resposta: {str(ex)}"
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
-            self._log_message(
+            cls._log_message(
                 response_payload,
                 "Payload da resposta que causou erro de parse inesperado",
             )
             return ResponseReturn(False, error_msg)
 
-    def _log_message(self, message: bytes, title: str):
+    @classmethod
+    def _log_message(cls, message: bytes, title: str):
         """Loga mensagens em formato hexadecimal para debug"""
         # Limitar o tamanho logado para não poluir muito se a msg for enorme
         MAX_LOG_BYTES = 256
@@ -362,10 +539,11 @@ class EstaparIntegrationService:
             log_limit_info = f" (primeiros {MAX_LOG_BYTES} bytes)"
             message = message[:MAX_LOG_BYTES]
 
-        hex_dump = self._format_hex_dump(message)
+        hex_dump = cls._format_hex_dump(message)
         logger.debug(f"{title}{log_limit_info}:\n{hex_dump}")
 
-    def _format_hex_dump(self, data: bytes) -> str:
+    @staticmethod
+    def _format_hex_dump(data: bytes) -> str:
         """Formata dados binários para exibição hexadecimal"""
         lines = []
         for i in range(0, len(data), 16):
@@ -0,0 +1,137 @@
+import threading
+import time
+from typing import Callable, Optional
+
+import oracledb
+from loguru import logger
+
+
+class OrderChangeSource:
+    """Origem dos avisos de "pode haver pedido novo no PDV".
+
+    O loop de background chama `wait_for_change(timeout)`: True indica que
+    vale consultar o Oracle; False, que nada mudou dentro do prazo. As
+    implementações chamam `notify()` (de qualquer thread) quando detectam uma
+    mudança. Com `resync_interval`, também devolve True periodicamente, para
+    cobrir avisos perdidos e a virada do dia.
+    """
+
+    name = "base"
+
+    def __init__(self, resync_interval: Optional[float] = None):
+        self.resync_interval = resync_interval
+        self.notifications = 0
+        self._event = threading.Event()
+        # A primeira espera sempre termina em consulta (carga inicial)
+        self._last_check = float("-inf")
+
+    def start(self):
+        """Começa a receber avisos (no-op por padrão)."""
+
+    def stop(self):
+        """Encerra a origem e libera seus recursos (no-op por padrão)."""
+
+    def notify(self):
+        self.notifications += 1
+        self._event.set()
+
+    def wait_for_change(self, timeout: float) -> bool:
+        notified = self._event.wait(timeout)
+        now = time.monotonic()
+        if notified:
+            self._event.clear()
+        elif (
+            self.resync_interval is None
+            or now - self._last_check < self.resync_interval
+        ):
+            return False
+        self._last_check = now
+        return True
+
+
+class PollingOrderChangeSource(OrderChangeSource):
+    """Sem avisos do banco: a consulta é periódica, haja ou não mudança.
+
+    Com `interval`, a própria origem devolve True a cada `interval` segundos.
+    Sem ele, o ritmo fica a cargo do chamador (o scheduler adaptativo do app).
+    """
+
+    name = "polling"
+
+    def __init__(self, interval: Optional[float] = None):
+        super().__init__(resync_interval=interval)
+
+
+class InMemoryOrderChangeSource(OrderChangeSource):
+    """Origem em processo, disparada manualmente com `notify()` (testes)."""
+
+    name = "in-memory"
+
+
+class OracleCqnOrderChangeSource(OrderChangeSource):
+    """Avisos push do Oracle via Continuous Query Notification.
+
+    Registra uma subscription DBCHANGE para inserções e alterações em
+    PCPEDCECF; o Oracle chama `_on_message` numa thread do driver e o loop
+    acorda na hora. Requer o modo thick do python-oracledb (Instant Client),
+    o privilégio CHANGE NOTIFICATION e que o servidor alcance esta máquina na
+    porta de callback.
+
+    Se a subscription não puder ser criada ou for removida pelo servidor, a
+    origem passa a se comportar como polling (`fallback_interval`).
+    """
+
+    name = "oracle-cqn"
+    QUERY = "SELECT NUMPEDECF FROM PCPEDCECF"
+
+    def __init__(
+        self,
+        connect: Callable[[], "oracledb.Connection"],
+        resync_interval: float = 60.0,
+        fallback_interval: float = 5.0,
+    ):
+        super().__init__(resync_interval=resync_interval)
+        self.connect = connect
+        self.fallback_interval = fallback_interval
+        self.connection = None
+        self.subscription = None
+        self.degraded = False
+
+    def start(self):
+        try:
+            self.connection = self.connect()
+            self.subscription = self.connection.subscribe(
+                namespace=oracledb.SUBSCR_NAMESPACE_DBCHANGE,
+                operations=oracledb.OPCODE_INSERT | oracledb.OPCODE_UPDATE,
+                qos=oracledb.SUBSCR_QOS_QUERY | oracledb.SUBSCR_QOS_RELIABLE,
+                callback=self._on_message,
+            )
+            self.subscription.registerquery(self.QUERY)
+            logger.success("Subscription CQN em PCPEDCECF registrada.")
+        except Exception as e:
+            logger.warning(
+                f"Não foi possível registrar a subscription CQN: {e}. "
+                f"Usando polling a cada {self.fallback_interval}s."
+            )
+            self._degrade()
+
+    def stop(self):
+        subscription, self.subscription = self.subscription, None
+        connection, self.connection = self.connection, None
+        try:
+            if subscription is not None and connection is not None:
+                connection.unsubscribe(subscription)
+            if connection is not None:
+                connection.close()
+        except Exception as e:
+            logger.warning(f"Erro ao encerrar a subscription CQN: {e}")
+
+    def _degrade(self):
+        self.degraded = True
+        self.resync_interval = self.fallback_interval
+
+    def _on_message(self, message):
+        if message.type == oracledb.EVENT_DEREG:
+            logger.warning("Subscription CQN removida pelo servidor; voltando ao polling.")
+            self._degrade()
+        self.notify()
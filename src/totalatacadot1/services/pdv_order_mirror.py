@@ -0,0 +1,92 @@
+import datetime
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+from loguru import logger
+
+Order = TypeVar("Order")
+
+
+class PdvOrderMirror(Generic[Order]):
+    """Espelho local (SQLite) dos pedidos do dia em PCPEDCECF.
+
+    `sync()` traz do Oracle só os pedidos com chave acima da marca d'água do
+    espelho e os grava localmente; na virada do dia os pedidos antigos são
+    removidos e a marca recomeça. Com `refetch_window`, cada sync também relê
+    os pedidos com chave até `refetch_window` abaixo da marca e os regrava
+    (upsert): corrige linhas alteradas depois de espelhadas (VLTOTAL, NUMCUPOM
+    ajustados pelo PDV) e pega as que ficaram visíveis fora da ordem da chave
+    (commit de um NUMPEDECF menor depois de um maior). Consultas de cupom,
+    conferência de valores digitados e releituras passam a ser respondidas pelo
+    SQLite, e o app segue funcionando com os dados já espelhados durante quedas
+    curtas do Oracle.
+
+    Seguro para chamadas concorrentes (thread de background e da GUI).
+    """
+
+    def __init__(
+        self,
+        fetch_after: Callable[[Optional[int], datetime.date], list[Order]],
+        save: Callable[[list[Order]], None],
+        load_watermark: Callable[[datetime.date], Optional[int]],
+        prune: Callable[[datetime.date], int],
+        key: Callable[[Order], int],
+        today: Callable[[], datetime.date] = datetime.date.today,
+        clock: Callable[[], float] = time.monotonic,
+        refetch_window: int = 0,
+    ):
+        self.fetch_after = fetch_after
+        self.save = save
+        self.load_watermark = load_watermark
+        self.prune = prune
+        self.key = key
+        self.today = today
+        self.clock = clock
+        self.refetch_window = refetch_window
+        self.day: Optional[datetime.date] = None
+        self.watermark: Optional[int] = None
+        self.synced_at: Optional[float] = None
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def sync(self) -> list[Order]:
+        """Espelha os pedidos novos (e a janela relida) do Oracle.
+
+        Devolve as linhas lidas. Propaga erros do Oracle.
+        """
+        with self._lock:
+            day = self.today()
+            if day != self.day:
+                pruned = self.prune(day)
+                if pruned:
+                    logger.info(f"Espelho PDV: {pruned} pedido(s) de dias anteriores removido(s).")
+                self.day = day
+                # Retoma de onde o espelho parou (pedidos já gravados hoje)
+                self.watermark = self.load_watermark(day)
+            since = self.watermark
+            if since is not None and self.refetch_window > 0:
+                since = max(since - self.refetch_window, 0)
+            orders = self.fetch_after(since, day)
+            if orders:
+                self.save(orders)
+                last = self.key(orders[-1])
+                if self.watermark is None or last > self.watermark:
+                    self.watermark = last
+            self.synced_at = self.clock()
+            return orders
+
+    def try_sync(self) -> bool:
+        """Como `sync()`, mas registra a falha e segue com os dados locais."""
+        try:
+            self.sync()
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"Falha ao sincronizar o espelho PDV; usando dados locais: {e}")
+            return False
+        return True
+
+    def age(self) -> Optional[float]:
+        """Segundos desde a última sincronização bem-sucedida."""
+        synced_at = self.synced_at
+        return None if synced_at is None else self.clock() - synced_at
@@ -0,0 +1,55 @@
+import datetime
+from typing import Callable, Generic, Optional, TypeVar
+
+from loguru import logger
+
+Order = TypeVar("Order")
+
+
+class PdvOrderPoller(Generic[Order]):
+    """Busca incremental dos pedidos do PDV por marca d'água (high-water mark).
+
+    Cada `poll()` pede ao banco só os pedidos do dia com chave (NUMPEDECF ou
+    NUMCUPOM, conforme o tipo de loja) maior que a última vista, e devolve
+    todos eles em ordem, não apenas o mais recente.
+
+    Na primeira consulta a marca é semeada com o último pedido do dia, que é
+    devolvido sozinho (mesmo comportamento de antes ao abrir o app). Na virada
+    do dia a marca é zerada e todos os pedidos do novo dia são novos.
+    """
+
+    def __init__(
+        self,
+        fetch_after: Callable[[Optional[int], datetime.date], list[Order]],
+        fetch_last: Callable[[], Optional[Order]],
+        key: Callable[[Order], int],
+        today: Callable[[], datetime.date] = datetime.date.today,
+    ):
+        self.fetch_after = fetch_after
+        self.fetch_last = fetch_last
+        self.key = key
+        self.today = today
+        self.watermark: Optional[int] = None
+        self.day: Optional[datetime.date] = None
+        self._primed = False
+
+    def poll(self) -> list[Order]:
+        day = self.today()
+        if day != self.day:
+            if self.day is not None:
+                logger.info(f"Virada do dia ({self.day} -> {day}): marca d'água zerada.")
+            self.day = day
+            self.watermark = None
+
+        if not self._primed:
+            self._primed = True
+            last = self.fetch_last()
+            if last is None:
+                return []
+            self.watermark = self.key(last)
+            return [last]
+
+        orders = self.fetch_after(self.watermark, day)
+        if orders:
+            self.watermark = self.key(orders[-1])
+        return orders
@@ -0,0 +1,171 @@
+import datetime
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+from loguru import logger
+from sqlalchemy import create_engine
+
+from ..database import init_oracle_db, is_oracle_ready
+from ..models import PCPEDCECF
+from ..repository import get_last_pdv_pedido, get_pdv_pedidos_after
+
+
+class PdvOrder(NamedTuple):
+    """Pedido gerado em memória; mesmos atributos das Rows das consultas."""
+
+    num_ped_ecf: int
+    num_caixa: int
+    num_cupom: int
+    vl_total: float
+    data: datetime.datetime
+
+
+class PdvOrderSource(ABC):
+    """Origem dos pedidos do PDV consultada pelo espelho e pelo clique.
+
+    `connect()` prepara a origem (pode demorar ou falhar; roda em background)
+    e `is_ready()` diz se já dá para consultar. `last()` devolve o último
+    pedido do dia e `after(watermark, day)` os pedidos do dia com chave maior
+    que `watermark`, em ordem crescente.
+    """
+
+    name = "base"
+
+    def connect(self):
+        """Prepara a origem (no-op por padrão)."""
+
+    def is_ready(self) -> bool:
+        return True
+
+    @abstractmethod
+    def last(self): ...
+
+    @abstractmethod
+    def after(self, watermark: Optional[int], day: datetime.date) -> list: ...
+
+
+class OraclePdvOrderSource(PdvOrderSource):
+    """PCPEDCECF no Oracle do PDV (produção)."""
+
+    name = "oracle"
+
+    def connect(self):
+        init_oracle_db()
+
+    def is_ready(self) -> bool:
+        return is_oracle_ready()
+
+    def last(self):
+        return get_last_pdv_pedido()
+
+    def after(self, watermark: Optional[int], day: datetime.date) -> list:
+        return get_pdv_pedidos_after(watermark, day)
+
+
+class SqlitePdvOrderSource(PdvOrderSource):
+    """PCPEDCECF num arquivo SQLite, com as mesmas consultas do Oracle.
+
+    Permite rodar e medir a detecção de pedidos sem Oracle: basta gravar
+    pedidos na tabela (por exemplo, uma cópia de um dia real da loja).
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False}
+        )
+
+    def connect(self):
+        PCPEDCECF.__table__.create(self.engine, checkfirst=True)
+        logger.info(f"Origem de pedidos SQLite: {self.path}")
+
+    def last(self):
+        return get_last_pdv_pedido(self.engine)
+
+    def after(self, watermark: Optional[int], day: datetime.date) -> list:
+        return get_pdv_pedidos_after(watermark, day, self.engine)
+
+
+class SyntheticPdvOrderSource(PdvOrderSource):
+    """Gerador em memória de pedidos, para testes de carga sem banco.
+
+    Os pedidos chegam como um processo de Poisson de `orders_per_minute`,
+    distribuídos entre `caixas` caixas; NUMPEDECF cresce na loja e NUMCUPOM
+    por caixa. Com `num_caixa`, só os pedidos desse caixa são visíveis (como
+    no escopo por terminal). Os pedidos são gerados sob demanda, até o
+    instante da consulta, e descartados na virada do dia.
+    """
+
+    name = "synthetic"
+
+    def __init__(
+        self,
+        key: Callable[[PdvOrder], int],
+        orders_per_minute: float = 6.0,
+        caixas: int = 10,
+        num_caixa: Optional[int] = None,
+        seed: Optional[int] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        if orders_per_minute <= 0 or caixas < 1:
+            raise ValueError("orders_per_minute deve ser > 0 e caixas >= 1")
+        self.key = key
+        self.rate = orders_per_minute / 60
+        self.caixas = caixas
+        self.num_caixa = num_caixa
+        self.rng = random.Random(seed)
+        self.clock = clock
+        self.orders: list[PdvOrder] = []
+        self.generated = 0
+        self._lock = threading.Lock()
+        self._day: Optional[datetime.date] = None
+        self._next_at = clock()
+        self._next_cupom = [0] * (caixas + 1)
+
+    def _generate(self) -> datetime.date:
+        now = self.clock()
+        while self._next_at <= now:
+            at = datetime.datetime.fromtimestamp(self._next_at)
+            if at.date() != self._day:
+                self._day = at.date()
+                self.orders.clear()
+                self._next_cupom = [0] * (self.caixas + 1)
+            num_caixa = self.rng.randint(1, self.caixas)
+            self._next_cupom[num_caixa] += 1
+            self.generated += 1
+            if self.num_caixa is None or num_caixa == self.num_caixa:
+                self.orders.append(
+                    PdvOrder(
+                        num_ped_ecf=self.generated,
+                        num_caixa=num_caixa,
+                        num_cupom=self._next_cupom[num_caixa],
+                        vl_total=round(self.rng.lognormvariate(4.0, 0.8), 2),
+                        data=at,
+                    )
+                )
+            self._next_at += self.rng.expovariate(self.rate)
+        return datetime.date.fromtimestamp(now)
+
+    def _orders_of(self, day: datetime.date) -> list[PdvOrder]:
+        return sorted(
+            (order for order in self.orders if order.data.date() == day), key=self.key
+        )
+
+    def last(self) -> Optional[PdvOrder]:
+        with self._lock:
+            orders = self._orders_of(self._generate())
+        return orders[-1] if orders else None
+
+    def after(self, watermark: Optional[int], day: datetime.date) -> list[PdvOrder]:
+        with self._lock:
+            self._generate()
+            orders = self._orders_of(day)
+        if watermark is None:
+            return orders
+        return [order for order in orders if self.key(order) > watermark]
@@ -0,0 +1,89 @@
+import datetime
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Generic, Optional, TypeVar
+
+Order = TypeVar("Order")
+
+
+@dataclass
+class SnapshotStats:
+    """Contadores do cache, para calibrar o limite de idade."""
+
+    hits: int = 0  # servido da memória
+    stale: int = 0  # snapshot velho demais: recarregado na hora
+    misses: int = 0  # sem snapshot (início ou virada do dia): recarregado
+    publishes: int = 0  # atualizações vindas do poller
+    refresh_errors: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class PdvOrderSnapshotCache(Generic[Order]):
+    """Último pedido do PDV compartilhado entre o poller e a thread da GUI.
+
+    O poller publica o pedido mais recente a cada consulta (ou confirma que
+    nada mudou). `get()` devolve o snapshot se ele tiver no máximo `max_age`
+    segundos e for do dia corrente; senão consulta o banco via `loader` na
+    própria chamada e guarda o resultado. "Nenhum pedido hoje" (None) também
+    é um snapshot válido.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Optional[Order]],
+        max_age: float,
+        clock: Callable[[], float] = time.monotonic,
+        today: Callable[[], datetime.date] = datetime.date.today,
+    ):
+        self.loader = loader
+        self.max_age = max_age
+        self.clock = clock
+        self.today = today
+        self.stats = SnapshotStats()
+        self._lock = threading.Lock()
+        self._order: Optional[Order] = None
+        self._day: Optional[datetime.date] = None
+        self._fetched_at: Optional[float] = None
+
+    def publish(self, order: Optional[Order], day: datetime.date):
+        """Registra o pedido mais recente de `day`, recém-lido do banco."""
+        with self._lock:
+            self._order, self._day, self._fetched_at = order, day, self.clock()
+            self.stats.publishes += 1
+
+    def confirm(self, day: datetime.date):
+        """O poller consultou e não há pedido novo: o snapshot continua atual."""
+        with self._lock:
+            if self._day == day:
+                self._fetched_at = self.clock()
+                self.stats.publishes += 1
+                return
+        self.publish(None, day)
+
+    def age(self) -> Optional[float]:
+        fetched_at = self._fetched_at
+        return None if fetched_at is None else self.clock() - fetched_at
+
+    def get(self) -> Optional[Order]:
+        today = self.today()
+        with self._lock:
+            if self._fetched_at is not None and self._day == today:
+                if self.clock() - self._fetched_at <= self.max_age:
+                    self.stats.hits += 1
+                    return self._order
+                self.stats.stale += 1
+            else:
+                self.stats.misses += 1
+        try:
+            order = self.loader()
+        except Exception:
+            self.stats.refresh_errors += 1
+            raise
+        self.publish(order, today)
+        return order
+
+    def snapshot(self) -> dict:
+        return {**self.stats.to_dict(), "age": self.age(), "max_age": self.max_age}
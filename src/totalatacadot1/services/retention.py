@@ -0,0 +1,97 @@
+import datetime
+import gzip
+import json
+import os
+from collections import defaultdict
+from pathlib import Path
+from typing import Callable, NamedTuple
+
+from loguru import logger
+
+
+class RetainedTable(NamedTuple):
+    """Tabela sujeita à retenção.
+
+    `fetch_expired(cutoff, limit)` devolve até `limit` linhas (dicts com `id`)
+    anteriores a `cutoff`; `delete(ids)` as remove; `month(row)` diz em qual
+    arquivo mensal ("AAAA-MM") cada linha vai parar.
+    """
+
+    name: str
+    fetch_expired: Callable[[datetime.date, int], list[dict]]
+    delete: Callable[[list[int]], int]
+    month: Callable[[dict], str]
+
+
+class RetentionManager:
+    """Move linhas antigas do SQLite local para arquivos gzip mensais.
+
+    Cada lote é acrescentado (JSON, uma linha por registro) em
+    `<archive_dir>/<tabela>-<AAAA-MM>.jsonl.gz`, sincronizado em disco, e só
+    então apagado do banco: uma queda entre os dois passos pode repetir
+    linhas no arquivo, mas nunca perdê-las. Cada `run()` processa no máximo
+    `max_batches` lotes por tabela, para não segurar o banco por muito tempo.
+    """
+
+    def __init__(
+        self,
+        archive_dir: Path,
+        tables: list[RetainedTable],
+        retention_days: int,
+        batch_size: int = 500,
+        max_batches: int = 10,
+        today: Callable[[], datetime.date] = datetime.date.today,
+    ):
+        if retention_days < 1 or batch_size < 1:
+            raise ValueError("retention_days e batch_size devem ser >= 1")
+        self.archive_dir = archive_dir
+        self.tables = tables
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.today = today
+        self.archived: dict[str, int] = defaultdict(int)
+
+    @property
+    def cutoff(self) -> datetime.date:
+        return self.today() - datetime.timedelta(days=self.retention_days)
+
+    def archive_path(self, table: str, month: str) -> Path:
+        return self.archive_dir / f"{table}-{month}.jsonl.gz"
+
+    def _append(self, table: str, month: str, rows: list[dict]):
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        # Cada append vira um membro gzip novo; gzip.open lê todos em sequência
+        with open(self.archive_path(table, month), "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as archive:
+                for row in rows:
+                    line = json.dumps(row, default=str, ensure_ascii=False)
+                    archive.write(line.encode() + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+
+    def run(self) -> bool:
+        """Arquiva o que venceu. True se parou no limite de lotes (pode haver mais)."""
+        cutoff = self.cutoff
+        pending = False
+        for table in self.tables:
+            for _ in range(self.max_batches):
+                rows = table.fetch_expired(cutoff, self.batch_size)
+                if not rows:
+                    break
+                by_month = defaultdict(list)
+                for row in rows:
+                    by_month[table.month(row)].append(row)
+                for month, month_rows in by_month.items():
+                    self._append(table.name, month, month_rows)
+                table.delete([row["id"] for row in rows])
+                self.archived[table.name] += len(rows)
+                logger.info(
+                    f"Retenção: {len(rows)} linha(s) de {table.name} arquivadas "
+                    f"(anteriores a {cutoff})."
+                )
+                if len(rows) < self.batch_size:
+                    break
+            else:
+                pending = True
+        return pending
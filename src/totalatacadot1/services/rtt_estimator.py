@@ -0,0 +1,69 @@
+import threading
+from typing import Optional
+
+
+class RttEstimator:
+    """Estimador de RTT suavizado no estilo do RTO do TCP (RFC 6298).
+
+    Cada amostra atualiza SRTT e RTTVAR; o timeout derivado é
+    SRTT + K * RTTVAR, limitado a [floor, ceiling]. Sem amostras usa o teto,
+    e cada timeout dobra o valor atual (backoff) até a próxima amostra válida.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, floor: float, ceiling: float):
+        if floor <= 0 or ceiling < floor:
+            raise ValueError("Limites de timeout inválidos: exige 0 < floor <= ceiling")
+        self.floor = floor
+        self.ceiling = ceiling
+        self.srtt: Optional[float] = None
+        self.rttvar: Optional[float] = None
+        self.rto = ceiling
+        self.samples = 0
+        self.timeouts = 0
+        self.last_sample: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe(self, sample: float):
+        """Registra o tempo (segundos) de uma operação concluída."""
+        with self._lock:
+            if self.srtt is None:
+                self.srtt = sample
+                self.rttvar = sample / 2
+            else:
+                self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(
+                    self.srtt - sample
+                )
+                self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * sample
+            self.samples += 1
+            self.last_sample = sample
+            self.rto = self._clamp(self.srtt + self.K * self.rttvar)
+
+    def on_timeout(self):
+        """Registra um timeout: dobra o prazo atual (backoff exponencial)."""
+        with self._lock:
+            self.timeouts += 1
+            self.rto = self._clamp(self.rto * 2)
+
+    def timeout(self) -> float:
+        """Prazo atual, em segundos, para a próxima operação."""
+        return self.rto
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "srtt": self.srtt,
+                "rttvar": self.rttvar,
+                "timeout": self.rto,
+                "floor": self.floor,
+                "ceiling": self.ceiling,
+                "samples": self.samples,
+                "timeouts": self.timeouts,
+                "last_sample": self.last_sample,
+            }
+
+    def _clamp(self, value: float) -> float:
+        return min(self.ceiling, max(self.floor, value))
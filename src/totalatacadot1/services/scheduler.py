@@ -0,0 +1,148 @@
+import random
+import time
+from typing import Callable, Optional
+
+from loguru import logger
+
+
+class AdaptiveInterval:
+    """Intervalo de um job periódico que se adapta à atividade.
+
+    Começa em `base`. Quando o job encontra trabalho (pedido novo, notificação
+    pendente) o intervalo cai para `minimum`; a cada execução ociosa é
+    multiplicado por `backoff`, até `maximum`. Cada espera recebe um jitter de
+    ±`jitter` (fração), para vários caixas não consultarem o Oracle juntos.
+    """
+
+    def __init__(
+        self,
+        base: float,
+        minimum: Optional[float] = None,
+        maximum: Optional[float] = None,
+        backoff: float = 2.0,
+        jitter: float = 0.0,
+        rng: Optional[random.Random] = None,
+    ):
+        self.minimum = base if minimum is None else minimum
+        self.maximum = base if maximum is None else maximum
+        if not 0 < self.minimum <= base <= self.maximum:
+            raise ValueError(
+                f"Intervalos inválidos: mínimo={self.minimum}, base={base}, máximo={self.maximum}"
+            )
+        if backoff < 1 or not 0 <= jitter < 1:
+            raise ValueError(f"backoff ({backoff}) deve ser >= 1 e jitter ({jitter}) em [0, 1)")
+        self.base = base
+        self.backoff = backoff
+        self.jitter = jitter
+        self.rng = rng or random.Random()
+        self.current = base
+
+    def record(self, active: bool):
+        if active:
+            self.current = self.minimum
+        else:
+            self.current = min(self.current * self.backoff, self.maximum)
+
+    def reset(self):
+        self.current = self.base
+
+    def next_delay(self) -> float:
+        if not self.jitter:
+            return self.current
+        return self.current * (1 + self.rng.uniform(-self.jitter, self.jitter))
+
+
+class Job:
+    """Job do `Scheduler`. `func` devolve True quando encontrou trabalho.
+
+    Sem `interval`, o job só roda quando disparado com `Scheduler.trigger()`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], bool],
+        interval: Optional[AdaptiveInterval],
+        next_run: Optional[float],
+    ):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.next_run = next_run
+        self.runs = 0
+        self.errors = 0
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    """Executa jobs periódicos, cada um com o próprio intervalo adaptativo.
+
+    Não tem thread própria: o loop chamador pergunta `time_until_next()`,
+    espera (podendo acordar antes por um aviso externo) e chama
+    `run_pending()`.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.jobs: list[Job] = []
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], bool],
+        interval: Optional[AdaptiveInterval] = None,
+        run_now: bool = True,
+    ) -> Job:
+        now = self.clock()
+        if run_now:
+            next_run = now
+        elif interval is not None:
+            next_run = now + interval.next_delay()
+        else:
+            next_run = None
+        job = Job(name, func, interval, next_run)
+        self.jobs.append(job)
+        return job
+
+    def trigger(self, job: Job):
+        """Antecipa a próxima execução do job para agora."""
+        job.next_run = self.clock()
+
+    def time_until_next(self, idle_timeout: Optional[float] = None) -> Optional[float]:
+        """Segundos até o próximo job vencer (0 se já venceu).
+
+        Sem nenhum job agendado, devolve `idle_timeout`.
+        """
+        due = [
+            job.next_run
+            for job in self.jobs
+            if job.next_run is not None and not job.cancelled
+        ]
+        if not due:
+            return idle_timeout
+        return max(0.0, min(due) - self.clock())
+
+    def run_pending(self) -> int:
+        """Executa os jobs vencidos, em ordem de cadastro. Devolve quantos rodaram."""
+        ran = 0
+        for job in list(self.jobs):
+            if job.cancelled or job.next_run is None or job.next_run > self.clock():
+                continue
+            ran += 1
+            job.runs += 1
+            try:
+                active = bool(job.func())
+            except Exception as e:
+                job.errors += 1
+                active = False
+                logger.error(f"Erro no job '{job.name}': {e}")
+            if job.interval is None:
+                job.next_run = None
+                continue
+            job.interval.record(active)
+            job.next_run = self.clock() + job.interval.next_delay()
+        self.jobs = [job for job in self.jobs if not job.cancelled]
+        return ran
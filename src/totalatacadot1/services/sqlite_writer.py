@@ -0,0 +1,143 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Optional, TypeVar
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+# Marca de parada na fila (tudo o que veio antes ainda é gravado)
+_STOP = object()
+
+
+class SqliteWriter:
+    """Thread única de escrita no SQLite local, com commit em grupo.
+
+    `submit(write)` enfileira `write(db)` e devolve um Future na hora; quem
+    chama (inclusive a thread da GUI) não espera fsync nem lock do banco. A
+    thread de escrita junta o que chegar em até `batch_window` segundos (no
+    máximo `max_batch` itens) e grava tudo numa transação só. Se o commit do
+    lote falhar, cada escrita é refeita na sua própria transação, para que um
+    item com erro não derrube os demais; o erro vai para o Future do item.
+
+    A sessão usa expire_on_commit=False: os objetos devolvidos continuam
+    legíveis depois do commit, sem o refresh() por item. `close()` (também
+    registrado no atexit) grava o que estiver na fila antes de parar.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        batch_window: float = 0.005,
+        max_batch: int = 200,
+        name: str = "sqlite-writer",
+    ):
+        if max_batch < 1:
+            raise ValueError("max_batch deve ser >= 1")
+        self.session_factory = session_factory
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.name = name
+        self.commits = 0
+        self.writes = 0
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def _ensure_started(self):
+        # Sob self._lock; a thread só nasce na primeira escrita
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True
+            )
+            self._thread.start()
+            atexit.register(self.close)
+
+    def submit(self, write: Callable[[Session], T]) -> "Future[T]":
+        """Enfileira `write(db)`; o Future recebe o retorno após o commit."""
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("SqliteWriter encerrado")
+            self._ensure_started()
+            self._queue.put((write, future))
+        return future
+
+    def flush(self, timeout: Optional[float] = None):
+        """Espera as escritas enfileiradas até agora serem gravadas."""
+        self.submit(lambda db: None).result(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Grava o que estiver pendente e encerra a thread (idempotente)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join(timeout)
+
+    def _next_batch(self) -> tuple[list, bool]:
+        batch = []
+        item = self._queue.get()
+        if item is _STOP:
+            return batch, True
+        batch.append(item)
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = (
+                    self._queue.get(timeout=remaining)
+                    if remaining > 0
+                    else self._queue.get_nowait()
+                )
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._next_batch()
+            batch = [
+                (write, future)
+                for write, future in batch
+                if future.set_running_or_notify_cancel()
+            ]
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: list):
+        db = self.session_factory()
+        try:
+            results = [write(db) for write, _ in batch]
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            if len(batch) == 1:
+                logger.error(f"Erro ao gravar no SQLite: {e}")
+                batch[0][1].set_exception(e)
+                return
+            logger.warning(
+                f"Lote de {len(batch)} escritas falhou ({e}); gravando uma a uma."
+            )
+            for item in batch:
+                self._write([item])
+            return
+        finally:
+            db.close()
+        self.commits += 1
+        self.writes += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,124 @@
+"""Migrações versionadas do SQLite local (BaseSQLite).
+
+A versão do esquema fica em PRAGMA user_version. Cada item de MIGRATIONS leva
+o banco da versão N para N + 1 e roda uma única vez; os dados (outbox de
+notificações, controle do dia, sequência Estapar...) são preservados entre
+reinícios.
+
+Para mudar o esquema, acrescente uma função ao fim de MIGRATIONS; nunca altere
+ou reordene as que já foram publicadas. Cada passo roda na sua própria
+transação, junto com a atualização de user_version; passos que não podem
+rodar em transação (VACUUM) são marcados com @_outside_transaction e rodam em
+modo AUTOCOMMIT. Mesmo assim cada passo deve ser idempotente (IF NOT
+EXISTS/checkfirst) para poder ser repetido se o app cair no meio dele.
+"""
+
+from typing import Callable
+
+from loguru import logger
+from sqlalchemy import Connection, Engine
+
+from .database import BaseSQLite, sqlite_engine
+from .models import AppliedDiscount, ControlPDV, MirroredPdvOrder, NotificationModel
+
+# Tabelas que existiam antes do versionamento
+_BASELINE_TABLES = (
+    "ControlPDV",
+    "LastAppliedDiscount",
+    "MirroredPdvOrder",
+    "EstaparSequence",
+    "Notification",
+)
+
+
+def _outside_transaction(step: Callable[[Connection], None]):
+    step.outside_transaction = True
+    return step
+
+
+def _v1_baseline(conn: Connection):
+    """cria as tabelas existentes antes do versionamento"""
+    BaseSQLite.metadata.create_all(
+        conn,
+        tables=[BaseSQLite.metadata.tables[name] for name in _BASELINE_TABLES],
+        checkfirst=True,
+    )
+
+
+def _v2_lookup_indexes(conn: Connection):
+    """índices compostos das consultas do repository"""
+    for model in (ControlPDV, NotificationModel, MirroredPdvOrder):
+        for index in model.__table__.indexes:
+            index.create(conn, checkfirst=True)
+    # Substituído por IX_MIRROREDPDVORDER_DATA_NUMCUPOM
+    conn.exec_driver_sql('DROP INDEX IF EXISTS "ix_MirroredPdvOrder_num_cupom"')
+
+
+@_outside_transaction
+def _v3_incremental_vacuum(conn: Connection):
+    """auto_vacuum INCREMENTAL (permite devolver páginas livres aos poucos)"""
+    # Só vale para um banco existente depois de um VACUUM completo (único)
+    if conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() != 2:
+        conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.exec_driver_sql("VACUUM")
+
+
+def _v4_applied_discounts(conn: Connection):
+    """tabela AppliedDiscount (descontos do dia, só inserts)"""
+    AppliedDiscount.__table__.create(conn, checkfirst=True)
+    for index in AppliedDiscount.__table__.indexes:
+        index.create(conn, checkfirst=True)
+    # Traz o último desconto da tabela antiga, para o bloqueio continuar
+    # valendo no dia da atualização
+    conn.exec_driver_sql(
+        'INSERT INTO "AppliedDiscount" '
+        "(ticket_code, num_ped_ecf, num_cupom, valor_centavos, data, applied_at) "
+        "SELECT trim(ticket_code), num_ped_ecf, num_cupom, "
+        "CAST(round(valor_total * 100) AS INTEGER), data, "
+        "coalesce(applied_at, CURRENT_TIMESTAMP) "
+        'FROM "LastAppliedDiscount" '
+        'WHERE NOT EXISTS (SELECT 1 FROM "AppliedDiscount")'
+    )
+
+
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    _v1_baseline,
+    _v2_lookup_indexes,
+    _v3_incremental_vacuum,
+    _v4_applied_discounts,
+]
+
+
+def get_schema_version(conn: Connection) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(engine: Engine) -> int:
+    """Aplica as migrações pendentes e devolve a versão final do esquema."""
+    with engine.connect() as conn:
+        version = get_schema_version(conn)
+    if version > len(MIGRATIONS):
+        logger.warning(
+            f"Esquema SQLite na versão {version}, mais nova que a do app "
+            f"({len(MIGRATIONS)}); nenhuma migração aplicada."
+        )
+        return version
+    for number, step in enumerate(MIGRATIONS[version:], start=version + 1):
+        logger.info(f"Migração SQLite {number}: {step.__doc__}")
+        if getattr(step, "outside_transaction", False):
+            autocommit = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+            with autocommit as conn:
+                step(conn)
+                conn.exec_driver_sql(f"PRAGMA user_version = {number}")
+        else:
+            with engine.begin() as conn:
+                step(conn)
+                conn.exec_driver_sql(f"PRAGMA user_version = {number}")
+    return len(MIGRATIONS)
+
+
+def init_sqlite_db():
+    """Prepara o SQLite local (rápido; roda antes de a GUI abrir)."""
+    logger.info("Iniciando a inicialização do banco de dados SQLite...")
+    version = migrate(sqlite_engine)
+    logger.info(f"Banco de dados SQLite pronto (esquema versão {version}).")
@@ -1,3 +1,113 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from totalatacadot1 import app
+from totalatacadot1.config import settings
+from totalatacadot1.database import SQLiteSessionLocal
+from totalatacadot1.enums import DatabaseStatus
+from totalatacadot1.models import ControlPDV, MirroredPdvOrder
+from totalatacadot1.repository import (
+    get_mirrored_pdv_watermark,
+    pdv_order_key,
+    prune_mirrored_pdv_orders,
+    save_mirrored_pdv_orders,
+    sqlite_writer,
+)
+from totalatacadot1.services.pdv_order_mirror import PdvOrderMirror
+from totalatacadot1.services.pdv_order_source import SyntheticPdvOrderSource
+from totalatacadot1.services.pdv_snapshot_cache import PdvOrderSnapshotCache
+from totalatacadot1.sqlite_migrations import migrate
+
+
 def test_first():
     """An initial test for the app."""
     assert 1 + 1 == 2
+
+
+@pytest.fixture
+def local_db(tmp_path, monkeypatch):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'control_pdv.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    migrate(engine)
+    monkeypatch.setitem(SQLiteSessionLocal.kw, "bind", engine)
+    yield engine
+    sqlite_writer.flush()
+    engine.dispose()
+
+
+class FakeController:
+    """Só o que as rotinas de background usam do AppController (sem Qt)."""
+
+    def __init__(self, source):
+        key = pdv_order_key(settings.store_type)
+        self.pdv_source = source
+        self.pdv_mirror = PdvOrderMirror(
+            source.after,
+            save_mirrored_pdv_orders,
+            get_mirrored_pdv_watermark,
+            prune_mirrored_pdv_orders,
+            key,
+        )
+        self.pdv_snapshot = PdvOrderSnapshotCache(lambda: None, max_age=10.0)
+        self.statuses = []
+        self.shown = 0
+        self.valores = []
+
+    def emit_database_status(self, status):
+        self.statuses.append(status)
+
+    def emit_actual_valor_update(self, valor):
+        self.valores.append(valor)
+
+    def show_gui(self):
+        self.shown += 1
+
+
+def count(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_background_cycle_builds_poller_and_records_new_order(local_db, monkeypatch):
+    monkeypatch.setattr(settings, "use_internal_control", True)
+    now = [time.time() - 600]
+    source = SyntheticPdvOrderSource(
+        pdv_order_key(settings.store_type),
+        orders_per_minute=60.0,
+        seed=7,
+        clock=lambda: now[0],
+    )
+    now[0] += 600  # dez minutos de pedidos gerados
+    controller = FakeController(source)
+
+    poller = app.create_pdv_order_poller()
+    assert poller.watermark is None
+
+    app.background_task(controller, cycles=1)
+    sqlite_writer.flush()
+
+    assert controller.statuses == [DatabaseStatus.CONNECTING, DatabaseStatus.CONNECTED]
+    assert count(local_db, MirroredPdvOrder) == len(source.orders) > 0
+    # Primeira consulta: o último pedido do dia libera o lançamento
+    assert count(local_db, ControlPDV) == 1
+    assert controller.valores == [source.orders[-1].vl_total]
+    assert controller.shown >= 1
+
+
+def test_idle_pdv_poll_never_waits_longer_than_the_fixed_interval():
+    interval = app.create_adaptive_interval(
+        settings.pdv_poll_interval,
+        settings.pdv_poll_min_interval,
+        settings.pdv_poll_max_interval,
+    )
+    for _ in range(10):
+        interval.record(False)  # caixa ocioso
+
+    assert interval.current <= settings.pdv_poll_interval
+    assert max(interval.next_delay() for _ in range(200)) <= (
+        settings.pdv_poll_interval * (1 + settings.scheduler_jitter)
+    )
@@ -0,0 +1,113 @@
+import datetime
+from concurrent.futures import Future
+
+from totalatacadot1.schemas import DiscountRequest
+
+from totalatacadot1.services.applied_discount_index import (
+    AppliedDiscountIndex,
+    discount_key,
+    request_discount_key,
+    to_cents,
+)
+
+DAY = datetime.date(2025, 3, 10)
+
+
+class FakeStore:
+    def __init__(self, rows=None):
+        self.rows = list(rows or [])
+        self.loads = 0
+
+    def load(self, day):
+        self.loads += 1
+        return [row[:4] for row in self.rows if row[4] == day]
+
+    def persist(self, ticket_code, num_ped_ecf, num_cupom, valor_centavos, day):
+        self.rows.append((ticket_code, num_ped_ecf, num_cupom, valor_centavos, day))
+
+
+def test_to_cents_rounds_without_float_noise():
+    assert to_cents(0.1 + 0.2) == 30
+    assert to_cents("19.995") == 2000
+    assert to_cents(12) == 1200
+
+
+def test_key_normalizes_inputs():
+    assert discount_key(" T1 ", "10", 5.0, 12.3) == discount_key("T1", 10, 5, "12.30")
+
+
+def test_any_discount_of_the_day_is_blocked_and_persisted_once():
+    store = FakeStore([("T1", 1, 1, 500, DAY), ("T9", 9, 9, 900, DAY - datetime.timedelta(1))])
+    index = AppliedDiscountIndex(store.load, store.persist, today=lambda: DAY)
+
+    assert index.contains(discount_key("T1", 1, 1, 5.0))
+    assert not index.contains(discount_key("T9", 9, 9, 9.0))  # outro dia
+
+    index.add(discount_key("T2", 2, 2, 7.5))
+    index.add(discount_key("T3", 3, 3, 8.0))
+    index.add(discount_key("T2", 2, 2, 7.5))
+    assert index.contains(discount_key("T2", 2, 2, 7.5))  # não só o último
+    assert len(store.rows) == 4
+    assert store.loads == 1
+
+
+def test_day_rollover_reloads_from_store():
+    day = [DAY]
+    store = FakeStore()
+    index = AppliedDiscountIndex(store.load, store.persist, today=lambda: day[0])
+    key = discount_key("T1", 1, 1, 5.0)
+    index.add(key)
+
+    day[0] = DAY + datetime.timedelta(days=1)
+    assert not index.contains(key)
+    assert len(index) == 0
+
+    day[0] = DAY  # relógio voltou: recarrega o dia do banco
+    assert index.contains(key)
+
+
+def test_load_reads_today_up_front():
+    store = FakeStore([("T1", 1, 1, 500, DAY)])
+    index = AppliedDiscountIndex(store.load, store.persist, today=lambda: DAY)
+
+    assert index.load() == 1
+    assert index.contains(discount_key("T1", 1, 1, 5.0))
+    assert store.loads == 1
+
+
+def test_failed_write_drops_the_key():
+    pending = []
+
+    def persist(*args):
+        future = Future()
+        pending.append(future)
+        return future
+
+    index = AppliedDiscountIndex(lambda day: [], persist, today=lambda: DAY)
+    ok, failed = discount_key("T1", 1, 1, 5.0), discount_key("T2", 2, 2, 6.0)
+    index.add(ok)
+    index.add(failed)
+    assert index.contains(failed)  # já bloqueia enquanto a gravação está na fila
+
+    pending[0].set_result(None)
+    pending[1].set_exception(RuntimeError("disk I/O error"))
+    assert index.contains(ok)
+    assert not index.contains(failed)
+
+
+def test_manual_repeats_are_keyed_by_the_assigned_sequence():
+    store = FakeStore()
+    index = AppliedDiscountIndex(store.load, store.persist, today=lambda: DAY)
+    keys = []
+    for seq in (41, 42):
+        # Validação manual: mesmo ticket, cupom e valor, cmdSeqNo ainda 0
+        request = DiscountRequest(
+            cmd_term_id=7, cmd_card_id="T1", cmd_op_value=5.0, cmd_op_seq_no=3
+        )
+        assert request_discount_key(request) is None  # nada a bloquear
+        request.cmd_seq_no = seq  # atribuído pelo serviço no envio
+        keys.append(request_discount_key(request))
+        index.add(keys[-1])
+
+    assert keys == [discount_key("T1", 41, 3, 5.0), discount_key("T1", 42, 3, 5.0)]
+    assert [row[1] for row in store.rows] == [41, 42]  # nunca num_ped_ecf=0
@@ -0,0 +1,63 @@
+import asyncio
+
+from totalatacadot1.protocol import COMMAND, MSG_BLOCK_SIZE
+from totalatacadot1.schemas import DiscountRequest
+from totalatacadot1.services.async_estapar_client import AsyncEstaparClient
+
+from .test_estapar_integration_service import build_response
+
+
+async def start_batching_server(batch_size: int, silent_seq_nos=()):
+    """Lê `batch_size` frames e responde em ordem inversa, para exercitar o
+    casamento por sequência. Sequências em `silent_seq_nos` nunca recebem
+    resposta."""
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                seq_nos = []
+                for _ in range(batch_size):
+                    size_data = await reader.readexactly(MSG_BLOCK_SIZE.size)
+                    size = MSG_BLOCK_SIZE.unpack(size_data)[0]
+                    message = await reader.readexactly(size)
+                    seq_nos.append(COMMAND.read_field(message, "cmdSeqNo"))
+                for seq_no in reversed(seq_nos):
+                    if seq_no not in silent_seq_nos:
+                        writer.write(build_response(seq_no))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def make_request(card_id: str) -> DiscountRequest:
+    return DiscountRequest(cmd_term_id=1, cmd_card_id=card_id, cmd_op_value=50.0)
+
+
+def test_pipelined_responses_are_matched_by_sequence():
+    async def scenario():
+        server, port = await start_batching_server(batch_size=4)
+        async with server, AsyncEstaparClient("127.0.0.1", port) as client:
+            requests = [make_request(f"T{i}") for i in range(4)]
+            results = await client.create_discounts(requests)
+        return requests, results
+
+    requests, results = asyncio.run(scenario())
+    assert all(result.success for result in results)
+    assert len({request.cmd_seq_no for request in requests}) == 4
+
+
+def test_request_deadline_does_not_affect_other_requests():
+    async def scenario():
+        server, port = await start_batching_server(batch_size=2, silent_seq_nos={2})
+        async with server, AsyncEstaparClient("127.0.0.1", port) as client:
+            return await client.create_discounts(
+                [make_request("A"), make_request("B")], timeout=0.5
+            )
+
+    first, second = asyncio.run(scenario())
+    assert first.success
+    assert not second.success
+    assert "Timeout" in second.message
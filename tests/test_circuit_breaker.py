@@ -0,0 +1,56 @@
+import threading
+
+from totalatacadot1.enums import CircuitState
+from totalatacadot1.services.circuit_breaker import CircuitBreaker
+
+
+def test_opens_after_consecutive_failures_and_fails_fast():
+    breaker = CircuitBreaker(failure_threshold=3, timeout_threshold=5, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+
+
+def test_timeouts_have_their_own_threshold():
+    breaker = CircuitBreaker(failure_threshold=10, timeout_threshold=2, reset_timeout=60)
+    breaker.record_failure(timeout=True)
+    breaker.record_failure(timeout=True)
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_success_resets_counters():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_without_probe_allows_one_trial_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_background_probe_closes_circuit_and_notifies():
+    closed = threading.Event()
+    states = []
+
+    def listener(state):
+        states.append(state)
+        if state == CircuitState.CLOSED:
+            closed.set()
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01, probe=lambda: True)
+    breaker.add_listener(listener)
+    breaker.record_failure()
+    assert closed.wait(2)
+    assert states == [CircuitState.OPEN, CircuitState.HALF_OPEN, CircuitState.CLOSED]
+    breaker.shutdown()
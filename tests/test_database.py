@@ -0,0 +1,152 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+import sqlalchemy
+from sqlalchemy.pool import NullPool
+
+from totalatacadot1 import database
+from totalatacadot1.config import settings
+from totalatacadot1.enums import OraclePoolMode
+
+
+@pytest.fixture
+def oracle(monkeypatch):
+    """get_oracle_engine sem Oracle: engines SQLite em memória no lugar."""
+    monkeypatch.setattr(database, "_oracle_engine", None)
+    monkeypatch.setattr(database, "_oracle_dsn", None)
+    monkeypatch.setattr(database, "_oracle_client_ready", True)
+    calls = SimpleNamespace(create_engine=[], create_pool=[])
+
+    def create_engine(url, **kwargs):
+        calls.create_engine.append((url, kwargs))
+        return sqlalchemy.create_engine("sqlite://")
+
+    def create_pool(**kwargs):
+        calls.create_pool.append(kwargs)
+        return SimpleNamespace(acquire=lambda: None)
+
+    monkeypatch.setattr(database, "create_engine", create_engine)
+    monkeypatch.setattr(database.oracledb, "create_pool", create_pool)
+    return calls
+
+
+def test_concurrent_first_calls_create_a_single_engine(oracle, monkeypatch):
+    probes = []
+
+    def select_oracle_dsn(candidates):
+        probes.append(candidates)
+        time.sleep(0.05)  # todas as threads chegam durante a conexão
+        return "dsn-1"
+
+    monkeypatch.setattr(database, "select_oracle_dsn", select_oracle_dsn)
+    engines = []
+    threads = [
+        threading.Thread(target=lambda: engines.append(database.get_oracle_engine()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(probes) == 1
+    assert len(oracle.create_engine) == 1
+    assert len(engines) == 8 and len({id(engine) for engine in engines}) == 1
+    assert database.is_oracle_ready()
+
+
+def test_sqlalchemy_pool_settings_are_passed_through(oracle, monkeypatch):
+    monkeypatch.setattr(database, "select_oracle_dsn", lambda candidates: "dsn-1")
+    monkeypatch.setattr(settings, "oracle_pool_mode", OraclePoolMode.SQLALCHEMY)
+    monkeypatch.setattr(settings, "oracle_pool_size", 3)
+    monkeypatch.setattr(settings, "oracle_pool_max_overflow", 1)
+    monkeypatch.setattr(settings, "oracle_pool_recycle", 900)
+    monkeypatch.setattr(settings, "oracle_pool_timeout", 7.5)
+
+    database.get_oracle_engine()
+
+    ((_, kwargs),) = oracle.create_engine
+    assert kwargs["pool_size"] == 3
+    assert kwargs["max_overflow"] == 1
+    assert kwargs["pool_recycle"] == 900
+    assert kwargs["pool_timeout"] == 7.5
+    assert kwargs["connect_args"]["dsn"] == "dsn-1"
+    assert kwargs["connect_args"]["stmtcachesize"] == database.ORACLE_STMT_CACHE_SIZE
+    assert oracle.create_pool == []
+
+
+def test_drcp_uses_driver_pool(oracle, monkeypatch):
+    monkeypatch.setattr(database, "select_oracle_dsn", lambda candidates: "dsn-1")
+    monkeypatch.setattr(settings, "oracle_pool_mode", OraclePoolMode.DRCP)
+    monkeypatch.setattr(settings, "oracle_pool_size", 2)
+    monkeypatch.setattr(settings, "oracle_pool_max_overflow", 2)
+    monkeypatch.setattr(settings, "oracle_pool_timeout", 3.0)
+
+    database.get_oracle_engine()
+
+    (pool_kwargs,) = oracle.create_pool
+    assert pool_kwargs["dsn"] == "dsn-1"
+    assert pool_kwargs["max"] == 4
+    assert pool_kwargs["wait_timeout"] == 3000
+    assert pool_kwargs["server_type"] == "pooled"
+    assert pool_kwargs["cclass"] == settings.oracle_drcp_class
+    assert pool_kwargs["purity"] == database.oracledb.PURITY_SELF
+    ((_, kwargs),) = oracle.create_engine
+    assert kwargs["poolclass"] is NullPool
+    assert "pool_size" not in kwargs
+
+
+class FakeConnect:
+    """oracledb.connect por DSN: (atraso em segundos, conecta?)."""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, dsn, **kwargs):
+        with self._lock:
+            self.calls.append(dsn)
+        delay, ok = self.behaviour[dsn]
+        time.sleep(delay)
+        if not ok:
+            raise ConnectionError(f"ORA-12514: {dsn}")
+        return SimpleNamespace(close=lambda: None)
+
+
+def test_first_dsn_to_connect_wins(monkeypatch):
+    connect = FakeConnect({"a": (0.0, False), "b": (0.3, True), "c": (0.05, True)})
+    monkeypatch.setattr(database.oracledb, "connect", connect)
+
+    start = time.monotonic()
+    assert database.select_oracle_dsn(["a", "b", "c"]) == "c"
+    assert time.monotonic() - start < 0.25  # não espera o "b", mais lento
+    assert sorted(connect.calls) == ["a", "b", "c"]
+
+
+def test_all_dsns_failing_raises(oracle, monkeypatch):
+    connect = FakeConnect({dsn: (0.0, False) for dsn in ("a", "b")})
+    monkeypatch.setattr(database.oracledb, "connect", connect)
+    monkeypatch.setattr(database, "ORACLE_DSNS", ["a", "b"])
+
+    assert database.select_oracle_dsn(["a", "b"]) is None
+    with pytest.raises(RuntimeError):
+        database.get_oracle_engine()
+    assert not database.is_oracle_ready()
+    assert oracle.create_engine == []
+
+
+def test_failure_is_not_cached_and_next_call_retries(oracle, monkeypatch):
+    connect = FakeConnect({"a": (0.0, False)})
+    monkeypatch.setattr(database.oracledb, "connect", connect)
+    monkeypatch.setattr(database, "ORACLE_DSNS", ["a"])
+
+    with pytest.raises(RuntimeError):
+        database.get_oracle_engine()
+    connect.behaviour["a"] = (0.0, True)  # o Oracle voltou
+
+    assert database.get_oracle_engine() is not None
+    assert connect.calls == ["a", "a"]
+    assert database._oracle_dsn == "a"
@@ -0,0 +1,299 @@
+import socket
+import threading
+
+import pytest
+
+from totalatacadot1.enums import CircuitState, EstaparConnectionMode, ResponseStatus
+from totalatacadot1.protocol import COMMAND, MSG_BLOCK_SIZE, RESPONSE
+from totalatacadot1.schemas import DiscountRequest
+from totalatacadot1.services.circuit_breaker import CircuitBreaker
+from totalatacadot1.services.estapar_integration_service import (
+    EstaparIntegrationService,
+)
+
+
+def build_response(
+    seq_no: int, status: int = 0, printer_line: bytes = b"Cartao validado"
+) -> bytes:
+    return RESPONSE.pack_frame(
+        0,
+        0x00010010,
+        b"04558054000173",
+        b"ESTAPAR",
+        0,
+        seq_no,
+        0,
+        b"TICKET",
+        status,
+        b"",
+        b"",
+        printer_line,
+        0,
+        0x0002,
+        0,
+        0,
+    )
+
+
+def recv_exact(conn: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            return b""
+        data += chunk
+    return data
+
+
+class FakeEstaparServer:
+    """Servidor mínimo: responde cada frame com o mesmo cmdSeqNo.
+
+    Com keep_alive=False fecha a conexão após cada resposta, como o servidor
+    real em modo ONE_SHOT; com drip=True envia a resposta byte a byte; com
+    drop_after=N lê a requisição seguinte à N-ésima e fecha sem responder.
+    """
+
+    def __init__(
+        self, keep_alive: bool = True, drip: bool = False, drop_after: int = -1
+    ):
+        self.keep_alive = keep_alive
+        self.drip = drip
+        self.drop_after = drop_after
+        self.accepted = 0
+        self.received = []
+        self.listener = socket.create_server(("127.0.0.1", 0))
+        self.listener.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.port = self.listener.getsockname()[1]
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            self.accepted += 1
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket.socket):
+        with conn:
+            while True:
+                size = recv_exact(conn, MSG_BLOCK_SIZE.size)
+                if not size:
+                    return
+                message = recv_exact(conn, MSG_BLOCK_SIZE.unpack(size)[0])
+                seq_no = COMMAND.read_field(message, "cmdSeqNo")
+                self.received.append(seq_no)
+                if len(self.received) == self.drop_after + 1:
+                    return  # processou e caiu antes de responder
+                response = build_response(seq_no)
+                if self.drip:
+                    for i in range(len(response)):
+                        conn.sendall(response[i : i + 1])
+                else:
+                    conn.sendall(response)
+                if not self.keep_alive:
+                    return
+
+    def close(self):
+        self.listener.close()
+
+
+@pytest.fixture
+def server():
+    srv = FakeEstaparServer()
+    yield srv
+    srv.close()
+
+
+def make_request() -> DiscountRequest:
+    return DiscountRequest(cmd_term_id=1, cmd_card_id="TICKET", cmd_op_value=50.0)
+
+
+def test_one_shot_opens_a_connection_per_request(server):
+    service = EstaparIntegrationService("127.0.0.1", server.port)
+    for _ in range(3):
+        result = service.create_discount(make_request())
+        assert result.success
+        assert result.data.status == ResponseStatus.VALIDATED
+    assert server.accepted == 3
+    assert service.endpoint.pool.idle_count() == 0
+
+
+def test_pooled_reuses_connection(server):
+    service = EstaparIntegrationService(
+        "127.0.0.1", server.port, connection_mode=EstaparConnectionMode.POOLED
+    )
+    for _ in range(3):
+        assert service.create_discount(make_request()).success
+    assert server.accepted == 1
+    assert service.endpoint.pool.stats.connections_reused == 2
+    assert service.endpoint.pool.stats.address_resolutions == 1
+    endpoint = service.diagnostics()["endpoints"][0]
+    assert endpoint["response"]["samples"] == 3
+    assert endpoint["connect"]["samples"] == 1
+    service.close()
+
+
+def test_fast_server_shrinks_connect_but_not_read_timeout(server):
+    service = EstaparIntegrationService("127.0.0.1", server.port)
+    for _ in range(10):
+        assert service.create_discount(make_request()).success
+
+    endpoint = service.endpoint
+    assert endpoint.response_rtt.samples == 10
+    assert endpoint.connect_timeout() < service.CONNECTION_TIMEOUT
+    assert endpoint.read_timeout() == service.DEFAULT_TIMEOUT
+
+
+def test_pooled_reconnects_when_peer_closes():
+    server = FakeEstaparServer(keep_alive=False)
+    service = EstaparIntegrationService(
+        "127.0.0.1", server.port, connection_mode=EstaparConnectionMode.POOLED
+    )
+    try:
+        for _ in range(3):
+            assert service.create_discount(make_request()).success
+        assert server.accepted == 3
+    finally:
+        service.close()
+        server.close()
+
+
+def test_reused_connection_dropped_after_send_is_not_resent():
+    server = FakeEstaparServer(drop_after=1)
+    service = EstaparIntegrationService(
+        "127.0.0.1", server.port, connection_mode=EstaparConnectionMode.POOLED
+    )
+    try:
+        assert service.create_discount(make_request()).success
+        result = service.create_discount(make_request())
+
+        assert not result.success
+        # O VALIDATE chegou uma vez só: sem reenvio com o mesmo cmdSeqNo
+        assert server.received == [1, 2]
+        assert server.accepted == 1
+    finally:
+        service.close()
+        server.close()
+
+
+def test_connection_refused_returns_failure():
+    with socket.create_server(("127.0.0.1", 0)) as probe:
+        port = probe.getsockname()[1]
+    service = EstaparIntegrationService("127.0.0.1", port)
+    result = service.create_discount(make_request())
+    assert not result.success
+    assert "recusada" in result.message
+
+
+def test_fragmented_response_is_reassembled():
+    server = FakeEstaparServer(drip=True)
+    service = EstaparIntegrationService(
+        "127.0.0.1", server.port, connection_mode=EstaparConnectionMode.POOLED
+    )
+    try:
+        for _ in range(2):
+            result = service.create_discount(make_request())
+            assert result.success
+            assert result.message == "Cartao validado"
+    finally:
+        service.close()
+        server.close()
+
+
+def test_open_circuit_fails_fast_without_connecting():
+    with socket.create_server(("127.0.0.1", 0)) as probe:
+        port = probe.getsockname()[1]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    service = EstaparIntegrationService("127.0.0.1", port, circuit_breaker=breaker)
+    for _ in range(2):
+        service.create_discount(make_request())
+    assert breaker.state == CircuitState.OPEN
+
+    result = service.create_discount(make_request())
+    assert not result.success
+    assert "indisponível" in result.message
+    assert service.diagnostics()["endpoints"][0]["connect"]["samples"] == 0
+
+
+def test_open_circuit_does_not_consume_sequence_numbers():
+    with socket.create_server(("127.0.0.1", 0)) as probe:
+        port = probe.getsockname()[1]
+    reserved = []
+
+    def sequence_provider(size):
+        reserved.append(size)
+        return 1 + (len(reserved) - 1) * size
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    service = EstaparIntegrationService(
+        "127.0.0.1", port, circuit_breaker=breaker, sequence_provider=sequence_provider
+    )
+    service.create_discount(make_request())
+    assert breaker.state == CircuitState.OPEN
+    used = service.sequence_number
+
+    for _ in range(5):
+        request = make_request()
+        assert not service.create_discount(request).success
+        assert request.cmd_seq_no == 0
+    assert service.sequence_number == used
+    assert len(reserved) == 1
+
+
+def test_backup_endpoint_takes_over_and_sticks(server):
+    with socket.create_server(("127.0.0.1", 0)) as probe:
+        dead_port = probe.getsockname()[1]
+    service = EstaparIntegrationService(
+        "127.0.0.1", dead_port, backup_endpoints=[("127.0.0.1", server.port)]
+    )
+    for _ in range(2):
+        assert service.create_discount(make_request()).success
+    assert service.endpoint.port == server.port
+    assert service.diagnostics()["preferred_endpoint"] == f"127.0.0.1:{server.port}"
+    assert server.accepted == 2
+
+
+def test_slow_primary_loses_connect_race(server):
+    # Listener que nunca aceita, com o backlog cheio: o SYN fica sem resposta
+    stalled = socket.create_server(("127.0.0.1", 0), backlog=0)
+    fillers = []
+    try:
+        for _ in range(4):
+            filler = socket.socket()
+            filler.setblocking(False)
+            filler.connect_ex(stalled.getsockname())
+            fillers.append(filler)
+        service = EstaparIntegrationService(
+            "127.0.0.1",
+            stalled.getsockname()[1],
+            backup_endpoints=[("127.0.0.1", server.port)],
+            connect_stagger=0.05,
+        )
+        result = service.create_discount(make_request())
+        assert result.success
+        assert service.endpoint.port == server.port
+    finally:
+        for filler in fillers:
+            filler.close()
+        stalled.close()
+
+
+def test_sequence_numbers_come_from_reserved_blocks(server):
+    reserved = []
+
+    def provider(size):
+        first = 1000 + len(reserved) * size
+        reserved.append(first)
+        return first
+
+    service = EstaparIntegrationService(
+        "127.0.0.1", server.port, sequence_provider=provider
+    )
+    service.SEQUENCE_BLOCK_SIZE = 2
+    requests = [make_request() for _ in range(3)]
+    for request in requests:
+        assert service.create_discount(request).success
+    assert [request.cmd_seq_no for request in requests] == [1000, 1001, 1002]
+    assert reserved == [1000, 1002]
@@ -0,0 +1,107 @@
+import asyncio
+import socket
+import struct
+import threading
+import time
+
+import pytest
+
+from totalatacadot1.enums import EstaparConnectionMode, ResponseStatus
+from totalatacadot1.schemas import DiscountRequest
+from totalatacadot1.server.main import (
+    INVALID_CARD_TYPE,
+    FaultProfile,
+    LatencyDistribution,
+    MockEstaparServer,
+    parse_status_mix,
+)
+from totalatacadot1.services.estapar_integration_service import (
+    EstaparIntegrationService,
+)
+
+
+def run_mock(profile: FaultProfile) -> tuple[MockEstaparServer, asyncio.AbstractEventLoop]:
+    """Sobe o mock num event loop em thread própria (o cliente é síncrono)."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    server = MockEstaparServer("127.0.0.1", 0, profile, seed=7)
+    asyncio.run_coroutine_threadsafe(server.start(), loop).result(5)
+    return server, loop
+
+
+def stop_mock(server: MockEstaparServer, loop: asyncio.AbstractEventLoop):
+    asyncio.run_coroutine_threadsafe(server.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def make_request() -> DiscountRequest:
+    return DiscountRequest(cmd_term_id=1, cmd_card_id="TICKET", cmd_op_value=10.0)
+
+
+def test_parse_helpers():
+    assert parse_status_mix("0=90,0x1=5,invalid_card_type=5") == {
+        0: 90.0,
+        1: 5.0,
+        INVALID_CARD_TYPE: 5.0,
+    }
+    assert LatencyDistribution.parse("uniform:0.01,0.02") == LatencyDistribution(
+        "uniform", 0.01, 0.02
+    )
+    with pytest.raises(ValueError):
+        LatencyDistribution.parse("gauss:1")
+
+
+def test_invalid_card_type_special_case_reaches_client():
+    server, loop = run_mock(FaultProfile(status_mix={INVALID_CARD_TYPE: 1}))
+    try:
+        service = EstaparIntegrationService("127.0.0.1", server.port)
+        result = service.create_discount(make_request())
+        assert not result.success
+        assert result.data.status == ResponseStatus.INVALID_CARD_TYPE
+    finally:
+        stop_mock(server, loop)
+
+
+def test_fragmented_responses_on_persistent_connection():
+    server, loop = run_mock(FaultProfile(fragment=1.0))
+    service = EstaparIntegrationService(
+        "127.0.0.1", server.port, connection_mode=EstaparConnectionMode.POOLED
+    )
+    try:
+        for _ in range(5):
+            assert service.create_discount(make_request()).success
+        assert server.stats.connections == 1
+        assert server.stats.fragmented == 5
+    finally:
+        service.close()
+        stop_mock(server, loop)
+
+
+def test_disconnect_is_reported_as_failure():
+    server, loop = run_mock(FaultProfile(disconnect=1.0))
+    try:
+        service = EstaparIntegrationService("127.0.0.1", server.port)
+        assert not service.create_discount(make_request()).success
+        assert server.stats.disconnects == 1
+    finally:
+        stop_mock(server, loop)
+
+
+def test_client_reset_before_response_is_handled():
+    server, loop = run_mock(FaultProfile(latency=LatencyDistribution("fixed", 0.1)))
+    errors = []
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+    try:
+        client = socket.create_connection(("127.0.0.1", server.port))
+        client.sendall(make_request().serialize())
+        # Fecha com RST enquanto o servidor ainda espera para responder
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+        client.close()
+        time.sleep(0.3)
+
+        assert server.stats.active_connections == 0
+        service = EstaparIntegrationService("127.0.0.1", server.port)
+        assert service.create_discount(make_request()).success
+        assert errors == []
+    finally:
+        stop_mock(server, loop)
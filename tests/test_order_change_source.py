@@ -0,0 +1,80 @@
+import threading
+from types import SimpleNamespace
+
+import oracledb
+
+from totalatacadot1.services.order_change_source import (
+    InMemoryOrderChangeSource,
+    OracleCqnOrderChangeSource,
+    PollingOrderChangeSource,
+)
+
+
+def test_in_memory_source_wakes_on_notify():
+    source = InMemoryOrderChangeSource()
+    assert not source.wait_for_change(0.01)
+    threading.Timer(0.05, source.notify).start()
+    assert source.wait_for_change(5)
+    assert not source.wait_for_change(0.01)
+
+
+def test_polling_source_always_checks_after_interval():
+    source = PollingOrderChangeSource(interval=0.01)
+    assert source.wait_for_change(0.02)
+    assert source.wait_for_change(0.02)
+
+
+class FakeSubscription:
+    def __init__(self, callback):
+        self.callback = callback
+        self.queries = []
+
+    def registerquery(self, sql):
+        self.queries.append(sql)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.subscription = None
+        self.closed = False
+
+    def subscribe(self, **kwargs):
+        self.subscription = FakeSubscription(kwargs["callback"])
+        return self.subscription
+
+    def unsubscribe(self, subscription):
+        self.subscription = None
+
+    def close(self):
+        self.closed = True
+
+
+def test_cqn_source_wakes_on_change_and_degrades_on_dereg():
+    connection = FakeConnection()
+    source = OracleCqnOrderChangeSource(
+        lambda: connection, resync_interval=60, fallback_interval=0.01
+    )
+    source.start()
+    assert connection.subscription.queries == [source.QUERY]
+    assert source.wait_for_change(0.01)  # carga inicial
+    assert not source.wait_for_change(0.01)
+
+    connection.subscription.callback(SimpleNamespace(type=oracledb.EVENT_QUERYCHANGE))
+    assert source.wait_for_change(0.01)
+
+    connection.subscription.callback(SimpleNamespace(type=oracledb.EVENT_DEREG))
+    assert source.degraded
+    assert source.wait_for_change(0.01)
+    assert source.wait_for_change(0.02)  # agora polling
+    source.stop()
+    assert connection.closed
+
+
+def test_cqn_source_falls_back_to_polling_when_subscribe_fails():
+    def connect():
+        raise oracledb.DatabaseError("ORA-29972: sem privilégio CHANGE NOTIFICATION")
+
+    source = OracleCqnOrderChangeSource(connect, fallback_interval=0.01)
+    source.start()
+    assert source.degraded
+    assert source.resync_interval == 0.01
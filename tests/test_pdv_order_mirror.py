@@ -0,0 +1,131 @@
+import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from totalatacadot1.services.pdv_order_mirror import PdvOrderMirror
+
+DAY = datetime.date(2025, 3, 10)
+
+
+class FakeStores:
+    """Oracle (remote) e SQLite (local) em memória."""
+
+    def __init__(self):
+        self.today = DAY
+        self.remote = []
+        self.local = {}
+        self.fetches = []
+        self.down = False
+
+    def add(self, *keys):
+        for key in keys:
+            self.remote.append(SimpleNamespace(day=self.today, num_ped_ecf=key))
+
+    def fetch_after(self, watermark, day):
+        if self.down:
+            raise ConnectionError("ORA-03113: end-of-file on communication channel")
+        self.fetches.append(watermark)
+        return sorted(
+            (
+                r
+                for r in self.remote
+                if r.day == day and (watermark is None or r.num_ped_ecf > watermark)
+            ),
+            key=lambda r: r.num_ped_ecf,
+        )
+
+    def save(self, orders):
+        self.local.update({order.num_ped_ecf: order for order in orders})
+
+    def load_watermark(self, day):
+        return max((k for k, r in self.local.items() if r.day == day), default=None)
+
+    def prune(self, day):
+        old = [k for k, r in self.local.items() if r.day < day]
+        for key in old:
+            del self.local[key]
+        return len(old)
+
+    def mirror(self, **kwargs):
+        return PdvOrderMirror(
+            self.fetch_after,
+            self.save,
+            self.load_watermark,
+            self.prune,
+            key=lambda order: order.num_ped_ecf,
+            today=lambda: self.today,
+            **kwargs,
+        )
+
+
+def test_sync_is_incremental():
+    stores = FakeStores()
+    stores.add(1, 2, 3)
+    mirror = stores.mirror()
+
+    assert len(mirror.sync()) == 3
+    stores.add(4)
+    assert [o.num_ped_ecf for o in mirror.sync()] == [4]
+    assert mirror.sync() == []
+    assert stores.fetches == [None, 3, 4]
+    assert sorted(stores.local) == [1, 2, 3, 4]
+
+
+def test_restart_resumes_from_local_watermark():
+    stores = FakeStores()
+    stores.add(1, 2)
+    stores.mirror().sync()
+
+    stores.add(3)
+    assert [o.num_ped_ecf for o in stores.mirror().sync()] == [3]
+    assert stores.fetches == [None, 2]
+
+
+def test_day_rollover_prunes_previous_day():
+    stores = FakeStores()
+    stores.add(1, 2)
+    mirror = stores.mirror()
+    mirror.sync()
+
+    stores.today = DAY + datetime.timedelta(days=1)
+    stores.add(3)
+    assert [o.num_ped_ecf for o in mirror.sync()] == [3]
+    assert sorted(stores.local) == [3]
+    assert stores.fetches[-1] is None
+
+
+def test_oracle_failure_keeps_local_data():
+    stores = FakeStores()
+    stores.add(1)
+    mirror = stores.mirror()
+    mirror.sync()
+
+    stores.down = True
+    with pytest.raises(ConnectionError):
+        mirror.sync()
+    assert not mirror.try_sync()
+    assert mirror.failures == 1
+    assert sorted(stores.local) == [1]
+
+    stores.down = False
+    stores.add(2)
+    assert mirror.try_sync()
+    assert sorted(stores.local) == [1, 2]
+
+
+def test_refetch_window_picks_up_updated_and_out_of_order_rows():
+    stores = FakeStores()
+    stores.add(1, 2, 4)
+    mirror = stores.mirror(refetch_window=3)
+    mirror.sync()
+
+    # O PDV corrige o valor do pedido 2 e o pedido 3 fica visível depois do 4
+    stores.remote[1] = SimpleNamespace(day=DAY, num_ped_ecf=2, vl_total=9.99)
+    stores.add(3)
+    mirror.sync()
+
+    assert stores.fetches == [None, 1]
+    assert stores.local[2].vl_total == 9.99
+    assert sorted(stores.local) == [1, 2, 3, 4]
+    assert mirror.watermark == 4  # a janela relida não recua a marca
@@ -0,0 +1,66 @@
+import datetime
+from types import SimpleNamespace
+
+from totalatacadot1.services.pdv_order_poller import PdvOrderPoller
+
+DAY = datetime.date(2025, 3, 10)
+
+
+class FakeOrders:
+    def __init__(self):
+        self.rows = []  # (dia, num_ped_ecf)
+        self.today = DAY
+        self.calls = []
+
+    def add(self, *keys, day=None):
+        for key in keys:
+            self.rows.append(SimpleNamespace(day=day or self.today, num_ped_ecf=key))
+
+    def fetch_after(self, watermark, day):
+        self.calls.append((watermark, day))
+        return sorted(
+            (r for r in self.rows if r.day == day and (watermark is None or r.num_ped_ecf > watermark)),
+            key=lambda r: r.num_ped_ecf,
+        )
+
+    def fetch_last(self):
+        today = [r for r in self.rows if r.day == self.today]
+        return max(today, key=lambda r: r.num_ped_ecf, default=None)
+
+    def poller(self):
+        return PdvOrderPoller(
+            self.fetch_after,
+            self.fetch_last,
+            key=lambda r: r.num_ped_ecf,
+            today=lambda: self.today,
+        )
+
+
+def keys(orders):
+    return [o.num_ped_ecf for o in orders]
+
+
+def test_first_poll_returns_only_latest_then_every_new_order():
+    orders = FakeOrders()
+    orders.add(10, 11, 12)
+    poller = orders.poller()
+    assert keys(poller.poll()) == [12]
+    assert poller.poll() == []
+    orders.add(13, 14)
+    assert keys(poller.poll()) == [13, 14]
+    assert orders.calls[-1] == (12, DAY)
+    assert poller.watermark == 14
+
+
+def test_day_boundary_resets_watermark():
+    orders = FakeOrders()
+    orders.add(500)
+    poller = orders.poller()
+    assert keys(poller.poll()) == [500]
+
+    # Numeração recomeça no novo dia, abaixo da marca do dia anterior
+    orders.today = DAY + datetime.timedelta(days=1)
+    orders.add(1, 2)
+    assert keys(poller.poll()) == [1, 2]
+    assert orders.calls[-1] == (None, orders.today)
+    assert poller.watermark == 2
@@ -0,0 +1,99 @@
+import datetime
+from operator import attrgetter
+
+import pytest
+from sqlalchemy import insert
+
+from totalatacadot1.models import PCPEDCECF
+from totalatacadot1.services.pdv_order_source import (
+    PdvOrderSource,
+    SqlitePdvOrderSource,
+    SyntheticPdvOrderSource,
+)
+
+NOON = datetime.datetime(2025, 3, 10, 12, 0).timestamp()
+
+
+class Clock:
+    def __init__(self, now=NOON):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def synthetic(clock, **kwargs):
+    return SyntheticPdvOrderSource(
+        attrgetter("num_ped_ecf"), orders_per_minute=60, caixas=4, seed=1, clock=clock, **kwargs
+    )
+
+
+def test_synthetic_source_generates_orders_over_time():
+    clock = Clock()
+    source = synthetic(clock)
+    day = datetime.date(2025, 3, 10)
+
+    first = source.after(None, day)
+    clock.now += 600
+    orders = source.after(None, day)
+
+    assert 450 < len(orders) < 750  # ~60/min por 10 min
+    assert [o.num_ped_ecf for o in orders] == sorted(o.num_ped_ecf for o in orders)
+    assert source.last() == orders[-1]
+    new = source.after(first[-1].num_ped_ecf, day)
+    assert new == orders[len(first):]
+
+
+def test_synthetic_source_scopes_to_terminal_and_numbers_coupons_per_caixa():
+    clock = Clock()
+    source = synthetic(clock, num_caixa=2)
+    clock.now += 600
+
+    orders = source.after(None, datetime.date(2025, 3, 10))
+    assert orders and {o.num_caixa for o in orders} == {2}
+    assert [o.num_cupom for o in orders] == list(range(1, len(orders) + 1))
+    assert source.generated > len(orders)
+
+
+def test_synthetic_source_drops_orders_at_day_rollover():
+    clock = Clock(datetime.datetime(2025, 3, 10, 23, 55).timestamp())
+    source = synthetic(clock)
+    source.last()
+    clock.now += 600
+
+    assert source.after(None, datetime.date(2025, 3, 10)) == []
+    assert all(o.data.date() == datetime.date(2025, 3, 11) for o in source.orders)
+
+
+def test_sqlite_source_runs_repository_queries(tmp_path):
+    source = SqlitePdvOrderSource(tmp_path / "pcpedcecf.db")
+    source.connect()
+    today = datetime.date.today()
+    yesterday = today - datetime.timedelta(days=1)
+    rows = [
+        (1, yesterday, 50.0),
+        (2, today, 10.0),
+        (3, today, 20.0),
+        (4, today, 100000000.0),  # acima de PDV_VL_LIMIT: ignorado
+    ]
+    with source.engine.begin() as conn:
+        conn.execute(
+            insert(PCPEDCECF.__table__),
+            [
+                {"NUMPEDECF": num, "NUMCAIXA": 1, "NUMCUPOM": num, "DATA": day, "VLTOTAL": value}
+                for num, day, value in rows
+            ],
+        )
+
+    assert [o.num_ped_ecf for o in source.after(None, today)] == [2, 3]
+    assert [o.num_ped_ecf for o in source.after(2, today)] == [3]
+    assert source.last().num_ped_ecf == 3
+
+
+def test_source_without_queries_fails_on_creation():
+    class Incomplete(PdvOrderSource):
+        def last(self):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,102 @@
+import datetime
+
+import pytest
+
+from totalatacadot1.services.pdv_snapshot_cache import PdvOrderSnapshotCache
+
+DAY = datetime.date(2025, 3, 10)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+        self.day = DAY
+
+    def __call__(self):
+        return self.now
+
+
+def make_cache(loaded="db", max_age=10.0):
+    clock = Clock()
+    calls = []
+
+    def loader():
+        calls.append(clock.now)
+        if isinstance(loaded, Exception):
+            raise loaded
+        return loaded
+
+    cache = PdvOrderSnapshotCache(loader, max_age, clock=clock, today=lambda: clock.day)
+    return cache, clock, calls
+
+
+def test_empty_cache_loads_synchronously_and_counts_miss():
+    cache, _, calls = make_cache()
+
+    assert cache.get() == "db"
+    assert cache.get() == "db"
+    assert len(calls) == 1
+    assert (cache.stats.misses, cache.stats.hits) == (1, 1)
+
+
+def test_published_snapshot_is_served_while_young():
+    cache, clock, calls = make_cache()
+    cache.publish("poller", DAY)
+
+    clock.now += 10.0
+    assert cache.get() == "poller"
+    assert calls == []
+    assert cache.stats.hits == 1
+
+
+def test_stale_snapshot_is_refreshed():
+    cache, clock, calls = make_cache()
+    cache.publish("poller", DAY)
+
+    clock.now += 10.5
+    assert cache.get() == "db"
+    assert len(calls) == 1
+    assert cache.stats.stale == 1
+    assert cache.age() == 0
+
+
+def test_confirm_keeps_order_and_renews_age():
+    cache, clock, calls = make_cache()
+    cache.publish("poller", DAY)
+
+    clock.now += 8
+    cache.confirm(DAY)
+    clock.now += 8
+    assert cache.get() == "poller"
+    assert calls == []
+
+
+def test_none_is_a_valid_snapshot():
+    cache, _, calls = make_cache()
+    cache.confirm(DAY)
+
+    assert cache.get() is None
+    assert calls == []
+
+
+def test_day_rollover_invalidates_snapshot():
+    cache, clock, calls = make_cache()
+    cache.publish("yesterday", DAY)
+
+    clock.day = DAY + datetime.timedelta(days=1)
+    assert cache.get() == "db"
+    assert cache.stats.misses == 1
+
+    # Confirmar um dia novo não herda o pedido do dia anterior
+    cache.publish("yesterday", DAY)
+    cache.confirm(clock.day)
+    assert cache.get() is None
+
+
+def test_refresh_error_propagates_and_is_counted():
+    cache, _, _ = make_cache(loaded=RuntimeError("oracle fora"))
+
+    with pytest.raises(RuntimeError):
+        cache.get()
+    assert cache.stats.refresh_errors == 1
+    assert cache.age() is None
@@ -0,0 +1,61 @@
+import datetime
+
+from sqlalchemy import create_engine, insert
+
+from totalatacadot1.config import Settings, settings
+from totalatacadot1.enums import StoreType
+from totalatacadot1.models import PCPEDCECF
+from totalatacadot1.repository import _pdv_statements, get_pdv_pedidos_after
+
+DAY = datetime.date(2025, 3, 10)
+
+
+def test_terminal_statement_filters_numcaixa_first():
+    statements = _pdv_statements(StoreType.ATACADO, 7)
+
+    compiled = statements.after.compile()
+    where = str(compiled).split("WHERE", 1)[1]
+    assert where.lstrip().startswith('"PCPEDCECF"."NUMCAIXA" = :num_caixa')
+    assert compiled.params["num_caixa"] == 7
+    assert "NUMCAIXA =" not in str(_pdv_statements(StoreType.ATACADO).after)
+
+
+def test_scoped_query_returns_only_own_terminal(monkeypatch):
+    engine = create_engine("sqlite://")
+    PCPEDCECF.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(PCPEDCECF),
+            [
+                {"NUMPEDECF": n, "NUMCAIXA": n % 3, "NUMCUPOM": n, "VLTOTAL": 10.0, "DATA": DAY}
+                for n in range(1, 10)
+            ],
+        )
+    monkeypatch.setattr(settings, "store_type", StoreType.ATACADO)
+    monkeypatch.setitem(settings.__dict__, "pdv_terminal_num_caixa", 1)
+
+    orders = get_pdv_pedidos_after(None, DAY, engine)
+    assert [order.num_ped_ecf for order in orders] == [1, 4, 7]
+    assert [order.num_ped_ecf for order in get_pdv_pedidos_after(4, DAY, engine)] == [7]
+
+
+def test_num_caixa_resolved_once_from_hostname(monkeypatch):
+    calls = []
+
+    def gethostname():
+        calls.append(1)
+        return "caixa02"
+
+    monkeypatch.setattr("socket.gethostname", gethostname)
+    config = Settings(pdv_num_caixa=None, pdv_num_caixa_by_hostname="CAIXA01=1, CAIXA02=2")
+
+    assert config.pdv_terminal_num_caixa == 2
+    assert config.pdv_terminal_num_caixa == 2
+    assert len(calls) == 1
+
+
+def test_unmapped_hostname_queries_whole_store(monkeypatch):
+    monkeypatch.setattr("socket.gethostname", lambda: "GERENCIA")
+    config = Settings(pdv_num_caixa=None, pdv_num_caixa_by_hostname="CAIXA01=1,CAIXA02=2")
+
+    assert config.pdv_terminal_num_caixa is None
@@ -0,0 +1,78 @@
+import struct
+
+import pytest
+
+from totalatacadot1.enums import CommandType
+from totalatacadot1.protocol import (
+    CMD_DATA,
+    CMD_HEADER,
+    COMMAND,
+    RESPONSE,
+    RSP_DATA,
+    RSP_HEADER,
+    Layout,
+)
+from totalatacadot1.schemas import DiscountRequest
+
+from .test_estapar_integration_service import build_response
+
+
+def test_block_sizes_match_documentation():
+    assert Layout("cmdHeader", CMD_HEADER).size == 45
+    assert Layout("cmdData", CMD_DATA).size == 100
+    assert Layout("rspHeader", RSP_HEADER).size == 45
+    assert Layout("rspData", RSP_DATA).size == 468
+    assert RESPONSE.size == 513
+    assert COMMAND.frame_size == 2 + 145
+
+
+def test_serialize_matches_legacy_layout():
+    request = DiscountRequest(
+        cmd_term_id=303,
+        cmd_card_id="123456789",
+        cmd_op_value=88.69,
+        cmd_op_seq_no=6767,
+        cmd_seq_no=656,
+        cmd_tmt=1700000000,
+    )
+    legacy_header = struct.pack(
+        "<HI15s16sII",
+        0,
+        CommandType.VALIDATION.value,
+        b"04558054000173",
+        request.cmd_company_sign,
+        1700000000,
+        656,
+    )
+    legacy_data = struct.pack(
+        "<I64sIIIIIIII",
+        303,
+        b"123456789",
+        8869,
+        6767,
+        0xFFFFFFFF,
+        0xFFFFFFFF,
+        0xFFFFFFFF,
+        0,
+        0,
+        40,
+    )
+    legacy = struct.pack("<H", 145) + legacy_header + legacy_data
+    assert request.serialize() == legacy
+
+    buffer = bytearray(COMMAND.frame_size + 10)
+    size = request.serialize_into(buffer, 10)
+    assert bytes(buffer[10 : 10 + size]) == legacy
+
+
+def test_view_reads_fields_lazily_from_memoryview():
+    frame = build_response(seq_no=42, status=7, printer_line=b"Tipo de cartao invalido")
+    view = RESPONSE.view(memoryview(frame)[2:])
+    assert view["rspSeqNo"] == 42
+    assert view["rspStatus"] == 7
+    assert view.text("rspPrinterLineTxt") == "Tipo de cartao invalido"
+
+
+def test_view_rejects_short_payload():
+    with pytest.raises(struct.error):
+        RESPONSE.view(b"\x00" * 100)
@@ -0,0 +1,120 @@
+import datetime
+import gzip
+import json
+import time
+
+import pytest
+from sqlalchemy import create_engine
+
+from totalatacadot1.database import SQLiteSessionLocal
+from totalatacadot1.models import NotificationModel
+from totalatacadot1.repository import get_expired_notifications
+from totalatacadot1.services.retention import RetainedTable, RetentionManager
+from totalatacadot1.sqlite_migrations import migrate
+
+TODAY = datetime.date(2025, 3, 10)
+
+
+class FakeTable:
+    def __init__(self, rows):
+        self.rows = {row["id"]: row for row in rows}
+        self.fetches = 0
+
+    def fetch_expired(self, cutoff, limit):
+        self.fetches += 1
+        expired = [row for row in self.rows.values() if row["data"] < cutoff]
+        return sorted(expired, key=lambda row: row["id"])[:limit]
+
+    def delete(self, ids):
+        for id_ in ids:
+            del self.rows[id_]
+        return len(ids)
+
+    def table(self, name="ControlPDV"):
+        return RetainedTable(
+            name, self.fetch_expired, self.delete, lambda row: str(row["data"])[:7]
+        )
+
+
+def rows_between(start, days):
+    return [
+        {"id": i + 1, "data": start + datetime.timedelta(days=i), "num_ped_ecf": i}
+        for i in range(days)
+    ]
+
+
+def read_archive(path):
+    with gzip.open(path, "rt") as archive:
+        return [json.loads(line) for line in archive]
+
+
+def manager(tmp_path, fake, **kwargs):
+    return RetentionManager(
+        tmp_path / "archive", [fake.table()], retention_days=30, today=lambda: TODAY, **kwargs
+    )
+
+
+def test_expired_rows_are_archived_per_month_and_deleted(tmp_path):
+    fake = FakeTable(rows_between(datetime.date(2025, 1, 20), 49))  # até 09/03
+    retention = manager(tmp_path, fake, batch_size=7)
+
+    assert retention.run() is False
+    assert min(row["data"] for row in fake.rows.values()) == datetime.date(2025, 2, 8)
+
+    january = read_archive(tmp_path / "archive" / "ControlPDV-2025-01.jsonl.gz")
+    february = read_archive(tmp_path / "archive" / "ControlPDV-2025-02.jsonl.gz")
+    assert [row["data"] for row in january] == [f"2025-01-{d}" for d in range(20, 32)]
+    assert [row["data"] for row in february] == [f"2025-02-0{d}" for d in range(1, 8)]
+    assert retention.archived["ControlPDV"] == 19
+
+
+def test_run_is_bounded_and_appends_to_existing_archive(tmp_path):
+    fake = FakeTable(rows_between(datetime.date(2025, 1, 1), 20))
+    retention = manager(tmp_path, fake, batch_size=5, max_batches=2)
+
+    assert retention.run() is True  # 10 de 20 arquivadas; faltam mais
+    retention.run()
+    assert fake.rows == {}
+    assert retention.run() is False
+    archived = read_archive(tmp_path / "archive" / "ControlPDV-2025-01.jsonl.gz")
+    assert [row["id"] for row in archived] == list(range(1, 21))
+
+
+def test_nothing_expired_touches_no_files(tmp_path):
+    fake = FakeTable(rows_between(TODAY - datetime.timedelta(days=5), 5))
+
+    assert manager(tmp_path, fake).run() is False
+    assert not (tmp_path / "archive").exists()
+    assert len(fake.rows) == 5
+
+
+@pytest.fixture
+def sao_paulo(monkeypatch):
+    """Fuso local UTC-3, como nas lojas."""
+    monkeypatch.setenv("TZ", "America/Sao_Paulo")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_notification_cutoff_uses_the_local_creation_date(tmp_path, monkeypatch, sao_paulo):
+    engine = create_engine(f"sqlite:///{tmp_path / 'control_pdv.db'}")
+    migrate(engine)
+    monkeypatch.setitem(SQLiteSessionLocal.kw, "bind", engine)
+    with SQLiteSessionLocal() as db:
+        for ticket, created_utc in (
+            ("ONTEM", datetime.datetime(2025, 3, 10, 2, 59)),  # 09/03 23:59 local
+            ("HOJE", datetime.datetime(2025, 3, 10, 3, 0)),  # 10/03 00:00 local
+        ):
+            db.add(
+                NotificationModel(
+                    ticket_code=ticket, data={}, sent=True, created_at=created_utc
+                )
+            )
+        db.commit()
+
+    expired = get_expired_notifications(TODAY, limit=10)
+
+    assert [row["ticket_code"] for row in expired] == ["ONTEM"]
+    engine.dispose()
@@ -0,0 +1,39 @@
+import pytest
+
+from totalatacadot1.services.rtt_estimator import RttEstimator
+
+
+def test_starts_at_ceiling_until_first_sample():
+    estimator = RttEstimator(floor=0.5, ceiling=10.0)
+    assert estimator.timeout() == 10.0
+
+
+def test_fast_server_converges_to_floor():
+    estimator = RttEstimator(floor=0.5, ceiling=10.0)
+    for _ in range(20):
+        estimator.observe(0.01)
+    assert estimator.timeout() == 0.5
+    assert estimator.snapshot()["samples"] == 20
+
+
+def test_slow_server_keeps_enough_margin():
+    estimator = RttEstimator(floor=0.5, ceiling=10.0)
+    for sample in (1.0, 2.0, 1.5, 2.5, 1.0):
+        estimator.observe(sample)
+    assert 2.5 < estimator.timeout() <= 10.0
+
+
+def test_timeout_doubles_until_ceiling():
+    estimator = RttEstimator(floor=0.5, ceiling=3.0)
+    estimator.observe(0.01)
+    estimator.on_timeout()
+    assert estimator.timeout() == 1.0
+    for _ in range(5):
+        estimator.on_timeout()
+    assert estimator.timeout() == 3.0
+    assert estimator.snapshot()["timeouts"] == 6
+
+
+def test_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        RttEstimator(floor=2.0, ceiling=1.0)
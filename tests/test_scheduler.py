@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from totalatacadot1.services.scheduler import AdaptiveInterval, Scheduler
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_interval_backs_off_when_idle_and_accelerates_on_activity():
+    interval = AdaptiveInterval(5, minimum=1, maximum=30, backoff=2)
+
+    for expected in (10, 20, 30, 30):
+        interval.record(False)
+        assert interval.current == expected
+    interval.record(True)
+    assert interval.current == 1
+    interval.record(False)
+    assert interval.current == 2
+
+
+def test_jitter_stays_within_bounds():
+    interval = AdaptiveInterval(10, jitter=0.2, rng=random.Random(7))
+    delays = [interval.next_delay() for _ in range(500)]
+
+    assert all(8 <= delay <= 12 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_invalid_interval_is_rejected():
+    with pytest.raises(ValueError):
+        AdaptiveInterval(5, minimum=10)
+    with pytest.raises(ValueError):
+        AdaptiveInterval(5, jitter=1.0)
+
+
+def test_jobs_keep_independent_intervals():
+    clock = Clock()
+    scheduler = Scheduler(clock)
+    runs = []
+    scheduler.add("outbox", lambda: runs.append("outbox"), AdaptiveInterval(5))
+    scheduler.add(
+        "pdv",
+        lambda: runs.append("pdv") or True,
+        AdaptiveInterval(2, minimum=1, maximum=8),
+    )
+
+    assert scheduler.run_pending() == 2
+    assert scheduler.time_until_next() == 1  # pdv achou trabalho: intervalo mínimo
+    clock.now = 1
+    assert scheduler.run_pending() == 1
+    assert runs == ["outbox", "pdv", "pdv"]
+
+
+def test_trigger_runs_event_driven_job_once():
+    clock = Clock()
+    scheduler = Scheduler(clock)
+    runs = []
+    job = scheduler.add("cqn", lambda: runs.append(clock.now), run_now=False)
+
+    assert scheduler.time_until_next(60) == 60
+    clock.now = 3
+    scheduler.trigger(job)
+    assert scheduler.run_pending() == 1
+    assert scheduler.run_pending() == 0
+    assert runs == [3]
+
+
+def test_failing_job_backs_off_and_cancelled_job_stops():
+    clock = Clock()
+    scheduler = Scheduler(clock)
+
+    def boom():
+        raise RuntimeError("oracle fora")
+
+    job = scheduler.add("oracle", boom, AdaptiveInterval(30, maximum=300))
+    scheduler.run_pending()
+    assert job.errors == 1
+    assert scheduler.time_until_next() == 60
+
+    job.cancel()
+    clock.now = 60
+    assert scheduler.run_pending() == 0
+    assert scheduler.jobs == []
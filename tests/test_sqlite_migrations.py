@@ -0,0 +1,108 @@
+import datetime
+
+from sqlalchemy import create_engine, inspect, select
+
+from totalatacadot1.models import AppliedDiscount, ControlPDV, NotificationModel
+from totalatacadot1.sqlite_migrations import MIGRATIONS, get_schema_version, migrate
+
+
+def make_engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'control_pdv.db'}")
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+def test_fresh_database_gets_latest_schema_and_indexes(tmp_path):
+    engine = make_engine(tmp_path)
+
+    assert migrate(engine) == len(MIGRATIONS)
+    assert {"IX_NOTIFICATION_SENT_ID", "IX_NOTIFICATION_TICKETCODE_SENT"} <= index_names(
+        engine, "Notification"
+    )
+    assert {"IX_CONTROLPDV_NUMPEDECF_DATA", "IX_CONTROLPDV_NUMCUPOM_DATA"} <= index_names(
+        engine, "ControlPDV"
+    )
+
+
+def test_migrated_database_uses_incremental_auto_vacuum(tmp_path):
+    engine = make_engine(tmp_path)
+
+    migrate(engine)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2  # INCREMENTAL
+
+
+def test_legacy_database_keeps_rows_and_gains_indexes(tmp_path):
+    engine = make_engine(tmp_path)
+    with engine.begin() as conn:
+        # Esquema criado pelo create_all antigo, sem índices nem user_version
+        conn.exec_driver_sql(
+            'CREATE TABLE "Notification" (id INTEGER PRIMARY KEY, ticket_code VARCHAR(120) '
+            "NOT NULL, sent BOOLEAN, data JSON NOT NULL, created_at DATETIME)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO \"Notification\" (ticket_code, sent, data) VALUES ('T1', 0, '{}')"
+        )
+
+    migrate(engine)
+    assert migrate(engine) == len(MIGRATIONS)  # segunda execução não faz nada
+
+    with engine.connect() as conn:
+        assert get_schema_version(conn) == len(MIGRATIONS)
+        # Banco com dados: só vale depois do VACUUM feito fora de transação
+        assert conn.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2
+        assert conn.execute(select(NotificationModel.ticket_code)).scalars().all() == ["T1"]
+    assert "IX_NOTIFICATION_SENT_ID" in index_names(engine, "Notification")
+
+
+def test_repository_lookups_use_indexes(tmp_path):
+    engine = make_engine(tmp_path)
+    migrate(engine)
+    queries = [
+        select(NotificationModel)
+        .where(NotificationModel.sent == False)  # noqa: E712
+        .order_by(NotificationModel.id.desc())
+        .limit(1),
+        select(NotificationModel).where(
+            NotificationModel.ticket_code == "T1",
+            NotificationModel.sent == False,  # noqa: E712
+        ),
+        select(ControlPDV).where(
+            ControlPDV.num_cupom == 1, ControlPDV.data == datetime.date.today()
+        ),
+    ]
+    with engine.connect() as conn:
+        for query in queries:
+            compiled = query.compile(engine, compile_kwargs={"literal_binds": True})
+            plan = " ".join(
+                row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+            )
+            assert "USING INDEX" in plan or "USING COVERING INDEX" in plan, plan
+
+
+def test_last_applied_discount_is_carried_into_applied_discounts(tmp_path):
+    engine = make_engine(tmp_path)
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            'CREATE TABLE "LastAppliedDiscount" (id INTEGER PRIMARY KEY, ticket_code '
+            "VARCHAR(120) NOT NULL, num_ped_ecf INTEGER NOT NULL, num_cupom INTEGER NOT NULL, "
+            "valor_total NUMERIC(10, 2) NOT NULL, data DATE NOT NULL, applied_at DATETIME)"
+        )
+        conn.exec_driver_sql(
+            "INSERT INTO \"LastAppliedDiscount\" VALUES (1, 'T1 ', 7, 3, 12.35, '2025-03-10', NULL)"
+        )
+
+    migrate(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(
+                AppliedDiscount.ticket_code,
+                AppliedDiscount.num_ped_ecf,
+                AppliedDiscount.num_cupom,
+                AppliedDiscount.valor_centavos,
+                AppliedDiscount.data,
+            )
+        ).all()
+    assert [tuple(row) for row in rows] == [("T1", 7, 3, 1235, datetime.date(2025, 3, 10))]
@@ -0,0 +1,97 @@
+import datetime
+import threading
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from totalatacadot1.models import ControlPDV, MirroredPdvOrder
+from totalatacadot1.services.sqlite_writer import SqliteWriter
+from totalatacadot1.sqlite_migrations import migrate
+
+DAY = datetime.date(2025, 3, 10)
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'control_pdv.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    migrate(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def writer(engine):
+    writer = SqliteWriter(
+        sessionmaker(bind=engine, expire_on_commit=False), batch_window=0.05
+    )
+    yield writer
+    writer.close()
+
+
+def add(item):
+    def write(db):
+        db.add(item)
+        db.flush()
+        return item
+
+    return write
+
+
+def count(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model)).scalar()
+
+
+def test_concurrent_writes_share_commits_and_return_rows(engine, writer):
+    futures = []
+    lock = threading.Lock()
+
+    def produce(start):
+        for n in range(start, start + 25):
+            future = writer.submit(add(ControlPDV(num_ped_ecf=n, num_cupom=n, data=DAY)))
+            with lock:
+                futures.append(future)
+
+    threads = [threading.Thread(target=produce, args=(i * 100,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    items = [future.result(timeout=5) for future in futures]
+    assert len({item.id for item in items}) == 100  # ids legíveis após o commit
+    assert count(engine, ControlPDV) == 100
+    assert writer.writes == 100
+    assert writer.commits < 100
+
+
+def test_failing_write_only_fails_its_own_future(engine, writer):
+    def order(num):
+        return MirroredPdvOrder(num_ped_ecf=num, num_cupom=num, data=DAY)
+
+    writer.submit(add(order(1))).result(timeout=5)
+    duplicate = writer.submit(add(order(1)))  # mesmo lote que o próximo
+    other = writer.submit(add(order(2)))
+
+    assert other.result(timeout=5).num_ped_ecf == 2
+    with pytest.raises(IntegrityError):
+        duplicate.result(timeout=5)
+    assert count(engine, MirroredPdvOrder) == 2
+
+
+def test_close_flushes_pending_writes(engine, writer):
+    futures = [
+        writer.submit(add(ControlPDV(num_ped_ecf=n, num_cupom=n, data=DAY)))
+        for n in range(10)
+    ]
+    writer.close()
+
+    assert all(future.done() for future in futures)
+    assert count(engine, ControlPDV) == 10
+    with pytest.raises(RuntimeError):
+        writer.submit(add(ControlPDV(num_ped_ecf=99, num_cupom=99, data=DAY)))